@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# Compares requests/sec of AsyncNetworkingClient with threaded NetworkingMixin requests against local HTTP/1.1 server
+# which answers with fixed delay, like FNGS does for heavy endpoints
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fntools.networking import (
+    AsyncNetworkingClient,
+    HttpSessionPool,
+    NetworkingMixin,
+)
+
+
+RESPONSE_BODY = b'{"count": 0, "results": [], "links": {"next": null}}'
+
+
+class DelayedHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, with Nagle's algorithm every keep-alive response would wait for delayed ACK
+    disable_nagle_algorithm = True
+    response_delay_seconds = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.response_delay_seconds)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+
+class LocalServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def threaded_requests_per_second(urls, workers_count: int):
+    begin_time = time.perf_counter()
+    NetworkingMixin.http_session_pool.map(lambda url: NetworkingMixin.get_with_retries(url, headers={}), urls, workers_count)
+    return len(urls) / (time.perf_counter() - begin_time)
+
+
+def async_requests_per_second(urls, max_in_flight: int):
+    async def fetch_all():
+        async with AsyncNetworkingClient(max_in_flight=max_in_flight) as client:
+            await asyncio.gather(*[client.get_with_retries(url, headers={}) for url in urls])
+
+    begin_time = time.perf_counter()
+    asyncio.run(fetch_all())
+    return len(urls) / (time.perf_counter() - begin_time)
+
+
+def parse_command_line_args():
+    parser = argparse.ArgumentParser(description='Async FNGS client benchmark')
+    parser.add_argument('-n', '--requests-count', type=int, default=1000, help='Requests count in one run')
+    parser.add_argument('-d', '--response-delay', type=float, default=0.05, help='Server response delay in seconds')
+    parser.add_argument('-c', '--concurrency', type=int, nargs='+', default=[4, 16, 64],
+                        help='Threads count for threaded requests and requests in flight for async ones')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_command_line_args()
+    DelayedHandler.response_delay_seconds = args.response_delay
+    server = LocalServer(('127.0.0.1', 0), DelayedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f'http://127.0.0.1:{server.server_address[1]}/api/v2/gatherer/item/{i}/' for i in range(args.requests_count)]
+    NetworkingMixin.http_session_pool = HttpSessionPool()
+    NetworkingMixin.configure_http_response_cache(enabled=False)
+    try:
+        print(f'{args.requests_count} requests per run, {args.response_delay * 1000:.0f} ms server delay')
+        for concurrency in args.concurrency:
+            threaded_rps = threaded_requests_per_second(urls, concurrency)
+            async_rps = async_requests_per_second(urls, concurrency)
+            print(f'Concurrency {concurrency}: threads {threaded_rps:.0f} requests/s, '
+                  f'asyncio {async_rps:.0f} requests/s, {async_rps / threaded_rps:.1f}x')
+    finally:
+        NetworkingMixin.http_session_pool.close()
+        server.shutdown()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
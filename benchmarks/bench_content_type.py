@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# Compares single-pass TitleContentTypeClassifier with sequential keyword scans it replaced
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.articleskeywords import ARTICLES_KEYWORDS
+from data.digestrecordcontenttype import DigestRecordContentType
+from data.releaseskeywords import RELEASES_KEYWORDS
+from fntools.records import TitleContentTypeClassifier
+
+
+PROJECTS_NAMES = ('Firefox', 'LibreOffice', 'GIMP', 'Krita', 'KDE Plasma', 'GNOME', 'Blender', 'Inkscape', 'Wine',
+                  'Linux', 'Debian', 'Fedora', 'Ubuntu', 'Nextcloud', 'PostgreSQL', 'Kubernetes', 'Rust', 'Python',
+                  'Godot', 'OBS Studio', 'VLC', 'Thunderbird', 'Mesa', 'systemd', 'Qt', 'GTK', 'Tor Browser')
+FILLER_WORDS = ('open source', 'community', 'project', 'how to', 'news', 'security', 'developers', 'new', 'features',
+                'for', 'with', 'and', 'the', 'в', 'и', 'для', 'проект', 'сообщество', 'открытый', 'код', 'обзор')
+SPECIAL_TITLES = ('SD Times Open-Source Project of the Week: {project}',
+                  'weeklyOSM {number}',
+                  'DEF CON {number} Cloud Village - {project} talk',
+                  'DEF CON talks about {project}')
+
+
+def fngs_keywords():
+    keywords = [{'name': project_name, 'is_generic': False} for project_name in PROJECTS_NAMES]
+    keywords += [{'name': word, 'is_generic': True} for word in ('open source', 'Linux kernel')]
+    return keywords
+
+
+def titles_corpus(titles_count: int, seed: int = 0):
+    randomizer = random.Random(seed)
+    titles = []
+    for _ in range(titles_count):
+        project_name = randomizer.choice(PROJECTS_NAMES)
+        kind = randomizer.random()
+        if kind < 0.05:
+            title = randomizer.choice(SPECIAL_TITLES).format(project=project_name, number=randomizer.randint(1, 700))
+        else:
+            words = randomizer.sample(FILLER_WORDS, randomizer.randint(3, 8))
+            if kind < 0.35:
+                words.insert(randomizer.randint(0, len(words)), f'{project_name} {randomizer.randint(1, 30)}.{randomizer.randint(0, 9)}')
+            elif kind < 0.6:
+                words.insert(randomizer.randint(0, len(words)), randomizer.choice(RELEASES_KEYWORDS + ARTICLES_KEYWORDS))
+                words.insert(randomizer.randint(0, len(words)), project_name)
+            else:
+                words.insert(randomizer.randint(0, len(words)), project_name)
+            title = ' '.join(words)
+            if randomizer.random() < 0.5:
+                title = title.capitalize()
+        url = 'https://www.youtube.com/watch?v=1' if randomizer.random() < 0.02 else f'https://example.com/{len(titles)}'
+        titles.append((title, url))
+    return titles
+
+
+def sequential_guess_content_type(title: str, url: str, keywords):
+    # Implementation which was used before single-pass classifier
+    if 'https://www.youtube.com' in url:
+        return DigestRecordContentType.VIDEOS
+    if 'SD Times Open-Source Project of the Week' in title:
+        return DigestRecordContentType.OTHER
+    if 'weeklyOSM' in title:
+        return DigestRecordContentType.NEWS
+    if re.search(r'DEF CON \d+ Cloud Village', title):
+        return DigestRecordContentType.VIDEOS
+    for release_keyword in RELEASES_KEYWORDS:
+        if release_keyword.lower() in title.lower():
+            return DigestRecordContentType.RELEASES
+    for article_keyword in ARTICLES_KEYWORDS:
+        if article_keyword.lower() in title.lower():
+            return DigestRecordContentType.ARTICLES
+    for keyword_data in keywords:
+        if not keyword_data['is_generic']:
+            keyword_name_fixed = keyword_data['name'].replace('+', r'\+')
+            if re.search(keyword_name_fixed + r',?\s+v?\.?\d', title, re.IGNORECASE):
+                return DigestRecordContentType.RELEASES
+    return None
+
+
+def parse_command_line_args():
+    parser = argparse.ArgumentParser(description='Content type guessing benchmark')
+    parser.add_argument('-n', '--titles-count', type=int, default=5000, help='Titles count in generated corpus')
+    parser.add_argument('-r', '--repeats', type=int, default=5, help='Passes over corpus')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_command_line_args()
+    keywords = fngs_keywords()
+    titles = titles_corpus(args.titles_count)
+
+    begin_time = time.perf_counter()
+    for _ in range(args.repeats):
+        sequential_results = [sequential_guess_content_type(title, url, keywords) for title, url in titles]
+    sequential_seconds = time.perf_counter() - begin_time
+
+    begin_time = time.perf_counter()
+    classifier = TitleContentTypeClassifier(keywords)
+    build_seconds = time.perf_counter() - begin_time
+    begin_time = time.perf_counter()
+    for _ in range(args.repeats):
+        classifier_results = [classifier.classify(title, url) for title, url in titles]
+    classifier_seconds = time.perf_counter() - begin_time
+
+    mismatches_count = sum(1 for a, b in zip(sequential_results, classifier_results) if a != b)
+    titles_count = len(titles) * args.repeats
+    print(f'{len(titles)} titles, {args.repeats} passes, {mismatches_count} mismatch(es)')
+    print(f'Sequential scans: {titles_count / sequential_seconds:.0f} titles/s')
+    print(f'Classifier:       {titles_count / classifier_seconds:.0f} titles/s (built in {build_seconds * 1000:.1f} ms), '
+          f'{sequential_seconds / classifier_seconds:.1f}x')
+    return 1 if mismatches_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
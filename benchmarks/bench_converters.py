@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# Measures time which digest converters spend on grouping records into sections and on writing HTML for big digest
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.digestrecordcontentcategory import DigestRecordContentCategory
+from data.digestrecordcontenttype import DigestRecordContentType
+from data.digestrecordstate import DigestRecordState
+from fntools import (
+    HtmlFormat,
+    logger,
+)
+from fntools.converters import html_converter_class
+from fntools.records import DigestRecord
+
+
+def synthetic_digest(records_count: int = 120, similar_records_groups_count: int = 12, seed: int = 1):
+    # Covers main records, every brief content type and category, "other" section, similar records groups, both
+    # languages and URLs which are canonicalized
+    randomizer = random.Random(seed)
+    content_types = [DigestRecordContentType.NEWS, DigestRecordContentType.VIDEOS, DigestRecordContentType.ARTICLES,
+                     DigestRecordContentType.RELEASES, DigestRecordContentType.OTHER]
+    content_categories = list(DigestRecordContentCategory)
+    records = []
+    for i in range(records_count):
+        url = randomizer.choice([f'https://example.com/{i}?rss=1',
+                                 f'https://www.opennet.ru/opennews/art.shtml?num={i}',
+                                 f'https://example.org/p/{i}#ftag=abc',
+                                 f'https://news.example.net/{i}?utm_source=rss&utm_medium=rss&utm_campaign=x'])
+        record = DigestRecord(None, None, f'Title &amp; {i} {"x" * randomizer.randint(10, 40)}', url,
+                              randomizer.choice([None, f'https://additional.example.org/{i}']),
+                              state=randomizer.choice([DigestRecordState.IN_DIGEST] * 4 + [DigestRecordState.IGNORED]),
+                              digest_issue=100,
+                              content_type=randomizer.choice(content_types),
+                              content_category=randomizer.choice(content_categories + [None]),
+                              drid=i,
+                              is_main=randomizer.random() < 0.05,
+                              language=randomizer.choice(['ENGLISH', 'RUSSIAN']))
+        if record.is_main and record.content_category is None:
+            record.content_category = content_categories[0]
+        records.append(record)
+    similar_records = []
+    drids = list(range(records_count))
+    randomizer.shuffle(drids)
+    for group_i in range(similar_records_groups_count):
+        group_records = [records[drid] for drid in drids[group_i * 3:group_i * 3 + randomizer.randint(2, 3)]]
+        if group_records[0].content_type == DigestRecordContentType.OTHER:
+            group_records[0].content_type = DigestRecordContentType.NEWS
+        if group_records[0].content_category is None:
+            group_records[0].content_category = content_categories[0]
+        for record in group_records[1:]:
+            record.content_type = group_records[0].content_type
+            record.content_category = group_records[0].content_category
+        similar_records.append({'id': group_i, 'digest_issue': 100, 'digest_records': group_records})
+    return records, similar_records
+
+
+def parse_command_line_args():
+    parser = argparse.ArgumentParser(description='Digest converters benchmark')
+    parser.add_argument('-n', '--records-count', type=int, default=5000, help='Records count in generated digest')
+    parser.add_argument('-r', '--repeats', type=int, default=5, help='Conversions per format, the best time is used')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_command_line_args()
+    # Converters log every conversion
+    logger.setLevel(logging.WARNING)
+    records, similar_records = synthetic_digest(args.records_count, similar_records_groups_count=args.records_count // 10)
+    print(f'{len(records)} records, {len(similar_records)} similar records groups, {args.repeats} conversion(s) per format')
+    with tempfile.TemporaryDirectory() as temp_directory:
+        for html_format in HtmlFormat:
+            html_path = os.path.join(temp_directory, f'digest-{html_format.value}.html')
+            converter = html_converter_class(html_format.name)(records, similar_records)
+            timings = [converter.convert(html_path) for _ in range(args.repeats)]
+            layout_seconds = min(layout_seconds for layout_seconds, _ in timings)
+            write_seconds = min(write_seconds for _, write_seconds in timings)
+            print(f'{html_format.name:7} layout {layout_seconds * 1000:7.1f} ms, write {write_seconds * 1000:7.1f} ms, '
+                  f'output {os.path.getsize(html_path) / 1024:.0f} KiB')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
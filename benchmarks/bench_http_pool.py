@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# Compares requests/sec of pooled keep-alive sessions with one-off requests.get() calls they replaced, against local
+# HTTP/1.1 server, so only connection handling is measured and not FNGS response time
+
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+from multiprocessing.pool import ThreadPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from fntools.networking import (
+    NETWORK_TIMEOUT_SECONDS,
+    HttpSessionPool,
+    NetworkingMixin,
+)
+
+
+RESPONSE_BODY = b'{"count": 0, "results": [], "links": {"next": null}}'
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, with Nagle's algorithm every keep-alive response would wait for delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+
+class LocalServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def unpooled_get(url):
+    # Implementation which was used before session pool, every request opens new connection
+    response = requests.get(url, headers={}, timeout=NETWORK_TIMEOUT_SECONDS)
+    if response.status_code != 200:
+        raise Exception(f'Non-success HTTP return code {response.status_code}')
+    return response
+
+
+def pooled_get(url):
+    return NetworkingMixin.get_with_retries(url, headers={})
+
+
+def requests_per_second(get, urls, workers_count: int):
+    begin_time = time.perf_counter()
+    if workers_count <= 1:
+        for url in urls:
+            get(url)
+    else:
+        with ThreadPool(workers_count) as threads_pool:
+            threads_pool.map(get, urls)
+    return len(urls) / (time.perf_counter() - begin_time)
+
+
+def parse_command_line_args():
+    parser = argparse.ArgumentParser(description='Pooled HTTP sessions benchmark')
+    parser.add_argument('-n', '--requests-count', type=int, default=2000, help='Requests count in one run')
+    parser.add_argument('-w', '--workers-count', type=int, nargs='+', default=[1, 4], help='Concurrent workers counts')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_command_line_args()
+    server = LocalServer(('127.0.0.1', 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f'http://127.0.0.1:{server.server_address[1]}/api/v2/gatherer/item/{i}/' for i in range(args.requests_count)]
+    NetworkingMixin.http_session_pool = HttpSessionPool()
+    NetworkingMixin.configure_http_response_cache(enabled=False)
+    try:
+        print(f'{args.requests_count} requests per run')
+        for workers_count in args.workers_count:
+            unpooled_rps = requests_per_second(unpooled_get, urls, workers_count)
+            pooled_rps = requests_per_second(pooled_get, urls, workers_count)
+            print(f'{workers_count} worker(s): one-off requests {unpooled_rps:.0f} requests/s, '
+                  f'pooled sessions {pooled_rps:.0f} requests/s, {pooled_rps / unpooled_rps:.1f}x')
+    finally:
+        NetworkingMixin.http_session_pool.close()
+        server.shutdown()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
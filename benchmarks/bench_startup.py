@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# Measures import time of every CLI script with "python -X importtime" and checks it against startup budgets, so heavy
+# dependency imported at module level again is noticed
+
+import argparse
+import os
+import subprocess
+import sys
+
+
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Script module to cumulative import time budget in milliseconds, scripts which talk to FNGS need requests
+CLI_IMPORT_BUDGETS_MS = {
+    'mkiv': 50,
+    'googledoctohtml': 150,
+    'htmltohabryearly': 150,
+    'remotedatatohtml': 400,
+    'fncategorizer': 400,
+    'checkcategoryguesser': 400,
+    'syncmirror': 400,
+    'getstats': 400,
+}
+# Modules which no script needs before it does actual work
+FORBIDDEN_STARTUP_MODULES = ('selenium',)
+
+
+class ImportFailed(Exception):
+    pass
+
+
+def measure_import(module_name: str, repeats: int = 3):
+    # Returns the best cumulative import time in milliseconds of several fresh interpreters and forbidden modules
+    # loaded by import
+    code = f'import sys\nimport {module_name}\nprint(",".join(m for m in {FORBIDDEN_STARTUP_MODULES!r} if m in sys.modules))'
+    best_ms = None
+    loaded_forbidden_modules = []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                                cwd=REPOSITORY_DIRECTORY, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise ImportFailed(result.stderr.strip().splitlines()[-1])
+        import_ms = None
+        for line in result.stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package", nested imports are indented
+            if not line.startswith('import time:'):
+                continue
+            _, cumulative_us, name = line.split('|')
+            if name.rstrip() == f' {module_name}':
+                import_ms = int(cumulative_us) / 1000
+        if import_ms is None:
+            raise ImportFailed(f'No import time reported for "{module_name}"')
+        best_ms = import_ms if best_ms is None else min(best_ms, import_ms)
+        loaded_forbidden_modules = [m for m in result.stdout.strip().split(',') if m]
+    return best_ms, loaded_forbidden_modules
+
+
+def parse_command_line_args():
+    parser = argparse.ArgumentParser(description='CLI scripts startup time benchmark')
+    parser.add_argument('-r', '--repeats', type=int, default=5, help='Fresh interpreters per script, the best time is used')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_command_line_args()
+    failed_scripts = []
+    for module_name, budget_ms in CLI_IMPORT_BUDGETS_MS.items():
+        try:
+            import_ms, loaded_forbidden_modules = measure_import(module_name, args.repeats)
+        except ImportFailed as e:
+            print(f'{module_name + ".py":24} could not be imported: {e}')
+            continue
+        problems = []
+        if import_ms > budget_ms:
+            problems.append(f'over budget of {budget_ms} ms')
+        if loaded_forbidden_modules:
+            problems.append(f'loads {", ".join(loaded_forbidden_modules)}')
+        if problems:
+            failed_scripts.append(module_name)
+        print(f'{module_name + ".py":24} {import_ms:7.1f} ms (budget {budget_ms} ms){" - " + ", ".join(problems) if problems else ""}')
+    return 1 if failed_scripts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
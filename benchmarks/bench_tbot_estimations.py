@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# Compares one-pass aggregate_tbot_estimations with repeated estimations scans it replaced
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.digestrecordcontentcategory import DigestRecordContentCategory
+from data.digestrecordcontenttype import DigestRecordContentType
+from data.digestrecordstate import DigestRecordState
+from fntools.records import (
+    TBOT_ADMIN_USERNAME,
+    DigestRecord,
+    aggregate_tbot_estimations,
+)
+
+
+TBOT_USERS = (TBOT_ADMIN_USERNAME, 'operator1', 'operator2', 'operator3', 'operator4')
+ESTIMATED_STATES = (DigestRecordState.IN_DIGEST, DigestRecordState.IGNORED, DigestRecordState.OUTDATED, DigestRecordState.DUPLICATE)
+
+
+def records_batch(records_count: int, seed: int = 0):
+    # Batch like one returned by tbot categorized records endpoint, some URLs are shared by several records
+    randomizer = random.Random(seed)
+    records = []
+    for drid in range(records_count):
+        estimations = []
+        for user in randomizer.sample(TBOT_USERS, randomizer.randint(0, len(TBOT_USERS))):
+            estimations.append({'user': user,
+                                'state': randomizer.choice(ESTIMATED_STATES),
+                                'is_main': randomizer.choice([None, None, True, False]),
+                                'content_type': randomizer.choice([None, DigestRecordContentType.NEWS, DigestRecordContentType.ARTICLES]),
+                                'content_category': randomizer.choice([None, *list(DigestRecordContentCategory)[:3]])})
+        record = DigestRecord(None, None, f'Record {drid}', f'https://example.com/{randomizer.randint(0, records_count * 9 // 10)}', None,
+                              state=randomizer.choice([DigestRecordState.UNKNOWN] * 3 + [DigestRecordState.IN_DIGEST]),
+                              content_type=randomizer.choice([None, None, DigestRecordContentType.NEWS]),
+                              drid=drid,
+                              is_main=randomizer.choice([None, None, False]),
+                              language='ENGLISH',
+                              estimations=estimations)
+        records.append(record)
+    return records
+
+
+def _admins_estimation(estimations):
+    admins_estimations = [e for e in estimations if e['user'] == TBOT_ADMIN_USERNAME]
+    return admins_estimations[0] if admins_estimations else None
+
+
+def sequential_candidates(records):
+    # Selection which was used before aggregation, type and category candidates were appended once per matching
+    # estimation, so they are deduplicated here keeping order
+    ignore_candidates_records = []
+    approve_candidates_records = []
+    records_with_is_main_estimation = []
+    records_with_content_type_estimation = []
+    records_with_content_category_estimation = []
+    for record in records:
+        if not record.estimations:
+            continue
+        if record.state == DigestRecordState.UNKNOWN:
+            ignore_state_votes_count = len([estimation for estimation in record.estimations if estimation['state'] == DigestRecordState.IGNORED])
+            ignore_vote_by_admin = len([estimation for estimation in record.estimations if estimation['user'] == TBOT_ADMIN_USERNAME and estimation['state'] == DigestRecordState.IGNORED]) > 0
+            total_state_votes_count = len(record.estimations)
+            if ignore_state_votes_count / total_state_votes_count > 0.5 and total_state_votes_count > 1 or ignore_vote_by_admin:
+                ignore_candidates_records.append(record)
+            approve_state_votes_count = len([estimation for estimation in record.estimations if estimation['state'] == DigestRecordState.IN_DIGEST])
+            approve_vote_by_admin = len([estimation for estimation in record.estimations if estimation['user'] == TBOT_ADMIN_USERNAME and estimation['state'] == DigestRecordState.IN_DIGEST]) > 0
+            total_state_votes_count = len(record.estimations)
+            if approve_state_votes_count / total_state_votes_count > 0.5 and total_state_votes_count > 1 or approve_vote_by_admin:
+                approve_candidates_records.append(record)
+        if _admins_estimation(record.estimations):
+            if record.is_main is None:
+                for estimation in record.estimations:
+                    if estimation['is_main'] is not None and record.url not in [r.url for r in records_with_is_main_estimation]:
+                        records_with_is_main_estimation.append(record)
+            if record.content_type is None:
+                for estimation in record.estimations:
+                    if estimation['content_type'] is not None:
+                        records_with_content_type_estimation.append(record)
+            if record.content_category is None:
+                for estimation in record.estimations:
+                    if estimation['content_category'] is not None:
+                        records_with_content_category_estimation.append(record)
+    return (ignore_candidates_records,
+            approve_candidates_records,
+            records_with_is_main_estimation,
+            list(dict.fromkeys(records_with_content_type_estimation)),
+            list(dict.fromkeys(records_with_content_category_estimation)))
+
+
+def aggregated_candidates(records):
+    aggregation = aggregate_tbot_estimations(records)
+    return (aggregation.ignore_candidates,
+            aggregation.approve_candidates,
+            aggregation.is_main_candidates,
+            aggregation.content_type_candidates,
+            aggregation.content_category_candidates)
+
+
+def parse_command_line_args():
+    parser = argparse.ArgumentParser(description='Tbot estimations aggregation benchmark')
+    parser.add_argument('-n', '--records-count', type=int, default=10000, help='Records count in generated batch')
+    parser.add_argument('-r', '--repeats', type=int, default=3, help='Passes over batch')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_command_line_args()
+    records = records_batch(args.records_count)
+
+    begin_time = time.perf_counter()
+    for _ in range(args.repeats):
+        sequential_results = sequential_candidates(records)
+    sequential_seconds = time.perf_counter() - begin_time
+
+    begin_time = time.perf_counter()
+    for _ in range(args.repeats):
+        aggregated_results = aggregated_candidates(records)
+    aggregated_seconds = time.perf_counter() - begin_time
+
+    mismatches_count = sum(1 for a, b in zip(sequential_results, aggregated_results) if a != b)
+    print(f'{len(records)} records, {args.repeats} passes, {mismatches_count} mismatched candidates list(s)')
+    print(f'Repeated scans: {sequential_seconds / args.repeats * 1000:.1f} ms per batch')
+    print(f'Aggregation:    {aggregated_seconds / args.repeats * 1000:.1f} ms per batch, {sequential_seconds / aggregated_seconds:.1f}x')
+    return 1 if mismatches_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# PYTHON_ARGCOMPLETE_OK
+
+import argparse
+import logging
+import sys
+from pprint import pformat
+
+from fntools import (
+    DigestRecordsCollection,
+    logger,
+)
+
+
+def parse_command_line_args():
+    parser = argparse.ArgumentParser(description='Check local content category guesser against FNGS answers')
+    parser.add_argument('-d', '--debug', action='store_true', help='Debug mode')
+    parser.add_argument('-r',
+                        '--record-from',
+                        help='Text file with one title per line, FNGS answers for them are saved to RECORDED_ANSWERS '
+                             'instead of checking')
+    parser.add_argument('FNGS_CONFIG',
+                        help='Config with data for access to remote FOSS News Gathering Server server')
+    parser.add_argument('RECORDED_ANSWERS',
+                        help='JSON file with recorded FNGS content category guesses')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_command_line_args()
+    if args.debug:
+        logger.setLevel(logging.DEBUG)
+    records_collection = DigestRecordsCollection(args.FNGS_CONFIG)
+    if args.record_from:
+        with open(args.record_from, 'r') as fin:
+            titles = [line.strip() for line in fin if line.strip()]
+        records_collection.record_server_content_category_matches(titles, args.RECORDED_ANSWERS)
+        return 0
+    mismatches = records_collection.compare_content_category_guesses(args.RECORDED_ANSWERS)
+    if mismatches:
+        logger.error(f'{len(mismatches)} mismatch(es) between local and FNGS guesses:\n{pformat(mismatches)}')
+        return 1
+    logger.info('Local guesses match recorded FNGS answers')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import importlib
+import logging
+import os
+import sys
+from enum import Enum
+
+from colorama import Fore, Style
+
+
+SCRIPT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+CACHE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'fntools')
+# Unlike cache, data which could not be fetched again, e.g. not uploaded categorizations
+DATA_DIRECTORY = os.path.join(os.path.expanduser('~'), '.local', 'share', 'fntools')
+DIGEST_RECORD_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S %z'
+FNGS_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f%z'
+
+days_count = None
+
+
+class HtmlFormat(Enum):
+    HABR = 'habr'
+    REDDIT = 'reddit'
+
+
+class Language(Enum):
+    ENGLISH = 'english'
+    RUSSIAN = 'russian'
+
+
+class Formatter(logging.Formatter):
+
+    def __init__(self, fmt=None):
+        if fmt is None:
+            fmt = self._colorized_fmt()
+        logging.Formatter.__init__(self, fmt)
+
+    def _colorized_fmt(self, color=Fore.RESET):
+        return f'{color}[%(asctime)s] %(levelname)s: %(message)s{Style.RESET_ALL}'
+
+    def format(self, record):
+        # Save the original format configured by the user
+        # when the logger formatter was instantiated
+        format_orig = self._style._fmt
+
+        # Replace the original format with one customized by logging level
+        if record.levelno == logging.DEBUG:
+            color = Fore.CYAN
+        elif record.levelno == logging.INFO:
+            color = Fore.GREEN
+        elif record.levelno == logging.WARNING:
+            color = Fore.YELLOW
+        elif record.levelno == logging.ERROR:
+            color = Fore.RED
+        elif record.levelno == logging.CRITICAL:
+            color = Fore.MAGENTA
+        else:
+            color = Fore.WHITE
+        self._style._fmt = self._colorized_fmt(color)
+
+        # Call the original formatter class to do the grunt work
+        result = logging.Formatter.format(self, record)
+
+        # Restore the original format configured by the user
+        self._style._fmt = format_orig
+
+        return result
+
+
+class Logger(logging.Logger):
+
+    def __init__(self):
+        super().__init__('fntools')
+        h = logging.StreamHandler(sys.stderr)
+        f = Formatter()
+        h.setFormatter(f)
+        h.flush = sys.stderr.flush
+        self.addHandler(h)
+        self.setLevel(logging.INFO)
+
+
+logger = Logger()
+
+
+# Submodules pull heavy dependencies (requests, aiohttp, lxml, selenium), so they are imported only on first access to
+# something defined in them, e.g. scripts which need only logger do not pay for networking and browser automation
+_LAZY_ATTRIBUTES_MODULES = {
+    'NETWORK_TIMEOUT_SECONDS': 'networking',
+    'HttpSessionPool': 'networking',
+    'AuthHeaders': 'networking',
+    'CircuitBreaker': 'networking',
+    'RetryPolicy': 'networking',
+    'CachedResponse': 'networking',
+    'HttpResponseCache': 'networking',
+    'NetworkingMixin': 'networking',
+    'AsyncNetworkingClient': 'networking',
+    'jwt_expiration_time': 'networking',
+    'TokenStore': 'networking',
+    'ServerConnectionMixin': 'networking',
+    'language_from_fngs': 'records',
+    'digest_record_state_from_fngs': 'records',
+    'digest_record_content_type_from_fngs': 'records',
+    'digest_record_content_category_from_fngs': 'records',
+    'DigestRecord': 'records',
+    'KeywordsCache': 'records',
+    'AhoCorasickAutomaton': 'records',
+    'TitleContentTypeClassifier': 'records',
+    'ContentCategoryGuesser': 'records',
+    'TBOT_ADMIN_USERNAME': 'records',
+    'admins_estimation': 'records',
+    'TbotEstimationsAggregation': 'records',
+    'aggregate_tbot_estimations': 'records',
+    'DigestRecordsUploadQueue': 'records',
+    'InteractiveCategorizationPrefetcher': 'records',
+    'DigestRecordsCollection': 'records',
+    'DigestDataMirror': 'mirror',
+    'canonical_url': 'urls',
+    'same_urls': 'urls',
+    'DigestLayout': 'converters',
+    'DbToHtmlConverter': 'converters',
+    'RedditDbToHtmlConverter': 'converters',
+    'HabrDbToHtmlConverter': 'converters',
+    'html_converter_class': 'converters',
+    'convert_to_html': 'converters',
+    'views_count_from_counter_text': 'stats',
+    'habr_views_count_from_html': 'stats',
+    'vk_views_count_from_html': 'stats',
+    'PostsStatisticsStore': 'stats',
+    'ScrapingSchedule': 'stats',
+    'BasicPostsStatisticsGetter': 'stats',
+    'DigestIssuesPostsStatisticsGetter': 'stats',
+    'VkPostsStatisticsGetter': 'stats',
+    'WebDriverPool': 'stats',
+    'HabrPostsStatisticsGetter': 'stats',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    module = importlib.import_module(f'{__name__}.{module_name}')
+    return getattr(module, name)
@@ -0,0 +1,240 @@
+import io
+import time
+from abc import abstractmethod
+
+from data.digestrecordcontenttype import *
+from data.digestrecordstate import *
+from data.digestrecordcontentcategory import *
+
+from fntools import (
+    HtmlFormat,
+    Language,
+    logger,
+)
+from fntools.records import (
+    DigestRecord,
+    DigestRecordsCollection,
+)
+
+
+class DigestLayout:
+    # Splits digest records and similar records groups into digest sections (main, brief by content type and category,
+    # other) in one pass. Record which is a part of shown similar records group is shown only as a part of the group
+    BRIEF_CONTENT_TYPES = (
+        DigestRecordContentType.NEWS,
+        DigestRecordContentType.VIDEOS,
+        DigestRecordContentType.ARTICLES,
+        DigestRecordContentType.RELEASES,
+    )
+
+    def __init__(self, records, similar_records, similar_record_filter=None):
+        self.main = []
+        self.other = []
+        self._brief = {}
+        self._similar_records_drids = set()
+        self._similar_record_filter = similar_record_filter if similar_record_filter is not None else self.is_in_digest
+        for similar_records_item in similar_records:
+            self._add_similar_records_item(similar_records_item)
+        for record in records:
+            self._add_record(record)
+
+    @staticmethod
+    def is_in_digest(record: DigestRecord):
+        return record.state == DigestRecordState.IN_DIGEST
+
+    def brief(self, content_type: DigestRecordContentType):
+        # Non-empty content categories of content type with their items in order of categories declaration
+        for content_category in DigestRecordContentCategory:
+            items = self._brief.get((content_type, content_category))
+            if items:
+                yield content_category, items
+
+    def _add_similar_records_item(self, similar_records_item):
+        similar_records_item_records = similar_records_item['digest_records']
+        included_records = [dr for dr in similar_records_item_records if self._similar_record_filter(dr)]
+        if not included_records:
+            return
+        self._similar_records_drids.update(dr.drid for dr in similar_records_item_records)
+        is_main = any(dr.is_main for dr in included_records)
+        self._add(similar_records_item_records, included_records[0], is_main)
+
+    def _add_record(self, record: DigestRecord):
+        if record.state != DigestRecordState.IN_DIGEST:
+            return
+        if record.drid in self._similar_records_drids:
+            return
+        self._add(record, record, record.is_main)
+
+    def _add(self, item, record: DigestRecord, is_main: bool):
+        if is_main:
+            self.main.append(item)
+        elif record.content_type == DigestRecordContentType.OTHER:
+            self.other.append(item)
+        elif record.content_type in self.BRIEF_CONTENT_TYPES:
+            if record.content_category is not None:
+                self._brief.setdefault((record.content_type, record.content_category), []).append(item)
+        else:
+            logger.error(f'Unsupported digest record data: {record}')
+            raise NotImplementedError
+
+
+class DbToHtmlConverter:
+
+    def __init__(self, records, similar_records):
+        self._records = records
+        self._similar_records = similar_records
+
+    def convert(self, html_path):
+        logger.info('Converting DB records to HTML')
+        # Records are grouped before output file is opened, so unsupported data does not leave truncated file, then
+        # sections are written to file as they are rendered instead of building whole digest in memory
+        begin_time = time.perf_counter()
+        layout = self._layout()
+        layout_end_time = time.perf_counter()
+        with open(html_path, 'w') as fout:
+            logger.info(f'Saving output to "{html_path}"')
+            self._write(fout, layout)
+        logger.info('Converted')
+        # Seconds spent on grouping and on writing, they are summed up in batch rendering summary
+        return layout_end_time - begin_time, time.perf_counter() - layout_end_time
+
+    def _convert(self) -> str:
+        output = io.StringIO()
+        self._write(output, self._layout())
+        return output.getvalue()
+
+    def _layout(self) -> DigestLayout:
+        return DigestLayout(self._records, self._similar_records)
+
+    @abstractmethod
+    def _write(self, fout, layout: DigestLayout):
+        pass
+
+
+# TODO: Extract common code from here and HabrDbToHtmlConverter
+class RedditDbToHtmlConverter(DbToHtmlConverter):
+
+    def __init__(self, records, similar_records):
+        super().__init__(records, similar_records)
+
+    def _url_html(self, digest_record, link_text: str = None):
+        # Russian links and links with additional URL need manual attention before publication
+        if digest_record.language == Language.RUSSIAN:
+            url, needs_attention = digest_record.url, True
+        elif digest_record.additional_url:
+            url, needs_attention = digest_record.additional_url, True
+        else:
+            url, needs_attention = digest_record.url, False
+        return DigestRecordsCollection.build_url_html(url,
+                                                      digest_record.language,
+                                                      do_not_mark_language=True,
+                                                      link_text=link_text,
+                                                      needs_attention=needs_attention)
+
+    def _layout(self):
+        # TODO: Refactor additional_url and OpenNET related code
+        return DigestLayout(self._records,
+                            self._similar_records,
+                            similar_record_filter=lambda dr: dr.state == DigestRecordState.IN_DIGEST and (dr.language == Language.ENGLISH or 'opennet' in dr.url))
+
+    def _write(self, fout, layout: DigestLayout):
+        fout.write('<h2>Main</h2>\n\n')
+        for main_record in layout.main:
+            if not isinstance(main_record, list):
+                fout.write(f'<h3>{DigestRecordsCollection.clear_title(main_record.title)}</h3>\n\n')
+                fout.write(f'<i><b>Category</b>: {DIGEST_RECORD_CONTENT_TYPE_EN_MAPPING[main_record.content_type.value]}/{DIGEST_RECORD_CONTENT_CATEGORY_EN_MAPPING[main_record.content_category.value]}</i><br>\n\n')
+                fout.write(f'Details {self._url_html(main_record)}\n\n')
+            else:
+                fout.write(f'<h3>{[DigestRecordsCollection.clear_title(r.title) for r in main_record]}</h3>\n\n')
+                fout.write(f'<i><b>Category</b>: {DIGEST_RECORD_CONTENT_TYPE_EN_MAPPING[main_record[0].content_type.value]}/{DIGEST_RECORD_CONTENT_CATEGORY_EN_MAPPING[main_record[0].content_category.value]}</i><br>\n\n')
+                fout.write('Details:<br>\n\n')
+                fout.write('<ol>\n')
+                for r in main_record:
+                    fout.write(f'<li>{r.title} {self._url_html(r)}</li>\n\n')
+                fout.write('</ol>\n')
+
+        fout.write('<h2>Briefly</h2>\n\n')
+
+        for content_type in DigestLayout.BRIEF_CONTENT_TYPES:
+            fout.write(f'<h3>{DIGEST_RECORD_CONTENT_TYPE_EN_MAPPING[content_type.value]}</h3>\n\n')
+            for key_record_content_category, key_records in layout.brief(content_type):
+                fout.write(f'<h4>{DIGEST_RECORD_CONTENT_CATEGORY_EN_MAPPING[key_record_content_category.value]}</h4>\n\n')
+                for key_record in key_records:
+                    if not isinstance(key_record, list):
+                        fout.write(f'<p>{self._url_html(key_record, link_text=DigestRecordsCollection.clear_title(key_record.title))}</p>\n')
+                    else:
+                        fout.write(f'<p>{", ".join([self._url_html(r, link_text=DigestRecordsCollection.clear_title(r.title)) for r in key_record])}</p>\n')
+
+        if len(layout.other):
+            fout.write('<h2>More links</h2>\n\n')
+            for other_record in layout.other:
+                fout.write(f'<p>{self._url_html(other_record, link_text=DigestRecordsCollection.clear_title(other_record.title))}</p>\n')
+
+
+# TODO: Extract common code from here and RedditDbToHtmlConverter
+class HabrDbToHtmlConverter(DbToHtmlConverter):
+
+    def __init__(self, records, similar_records):
+        super().__init__(records, similar_records)
+
+    def _write(self, fout, layout: DigestLayout):
+        fout.write('<h2>Главное</h2>\n\n')
+        for main_record in layout.main:
+            if not isinstance(main_record, list):
+                fout.write(f'<h3>{DigestRecordsCollection.clear_title(main_record.title)}</h3>\n\n')
+                fout.write(f'<i><b>Категория</b>: {DIGEST_RECORD_CONTENT_TYPE_RU_MAPPING[main_record.content_type.value]}/{DIGEST_RECORD_CONTENT_CATEGORY_RU_MAPPING[main_record.content_category.value]}</i><br>\n\n')
+                fout.write(f'Подробности {DigestRecordsCollection.build_url_html(main_record.url, main_record.language)}\n\n')
+            else:
+                fout.write(f'<h3>{[DigestRecordsCollection.clear_title(r.title) for r in main_record]}</h3>\n\n')
+                fout.write(f'<i><b>Категория</b>: {DIGEST_RECORD_CONTENT_TYPE_RU_MAPPING[main_record[0].content_type.value]}/{DIGEST_RECORD_CONTENT_CATEGORY_RU_MAPPING[main_record[0].content_category.value]}</i><br>\n\n')
+                fout.write('Подробности:<br>\n\n')
+                fout.write('<ol>\n')
+                for r in main_record:
+                    fout.write(f'<li>{r.title} {DigestRecordsCollection.build_url_html(r.url, r.language)}</li>\n\n')
+                fout.write('</ol>\n')
+
+        fout.write('<h2>Короткой строкой</h2>\n\n')
+
+        for content_type in DigestLayout.BRIEF_CONTENT_TYPES:
+            fout.write(f'<h3>{DIGEST_RECORD_CONTENT_TYPE_RU_MAPPING[content_type.value]}</h3>\n\n')
+            for key_record_content_category, key_records in layout.brief(content_type):
+                fout.write(f'<h4>{DIGEST_RECORD_CONTENT_CATEGORY_RU_MAPPING[key_record_content_category.value]}</h4>\n\n')
+                if len(key_records) == 1:
+                    key_record = key_records[0]
+                    if not isinstance(key_record, list):
+                        fout.write(f'<p>{DigestRecordsCollection.clear_title(key_record.title)} {DigestRecordsCollection.build_url_html(key_record.url, key_record.language)}</p>\n')
+                    else:
+                        fout.write(f'<p>{[DigestRecordsCollection.clear_title(r.title) for r in key_record]} {", ".join([DigestRecordsCollection.build_url_html(r.url, r.language) for r in key_record])}</p>\n')
+                else:
+                    fout.write('<ol>\n')
+                    for key_record in key_records:
+                        if not isinstance(key_record, list):
+                            fout.write(f'<li>{DigestRecordsCollection.clear_title(key_record.title)} {DigestRecordsCollection.build_url_html(key_record.url, key_record.language)}</li>\n')
+                        else:
+                            fout.write(f'<li>{[DigestRecordsCollection.clear_title(r.title) for r in key_record]} {", ".join([DigestRecordsCollection.build_url_html(r.url, r.language) for r in key_record])}</li>\n')
+                    fout.write('</ol>\n')
+
+        if len(layout.other):
+            fout.write('<h2>Что ещё посмотреть</h2>\n\n')
+            if len(layout.other) == 1:
+                other_record = layout.other[0]
+                fout.write(f'{DigestRecordsCollection.clear_title(other_record.title)} {DigestRecordsCollection.build_url_html(other_record.url, other_record.language)}<br>\n')
+            else:
+                fout.write('<ol>\n')
+                for other_record in layout.other:
+                    fout.write(f'<li>{DigestRecordsCollection.clear_title(other_record.title)} {DigestRecordsCollection.build_url_html(other_record.url, other_record.language)}</li>\n')
+                fout.write('</ol>\n')
+
+
+def html_converter_class(format_name: str):
+    if format_name == HtmlFormat.HABR.name:
+        return HabrDbToHtmlConverter
+    elif format_name == HtmlFormat.REDDIT.name:
+        return RedditDbToHtmlConverter
+    else:
+        raise NotImplementedError
+
+
+def convert_to_html(format_name: str, records, similar_records, html_path: str):
+    # Module level function, so it could be passed to process pool
+    return html_converter_class(format_name)(records, similar_records).convert(html_path)
@@ -0,0 +1,144 @@
+import json
+import os
+import sqlite3
+import time
+from typing import List, Dict
+
+from fntools import (
+    CACHE_DIRECTORY,
+    logger,
+)
+from fntools.networking import (
+    NetworkingMixin,
+    ServerConnectionMixin,
+)
+
+
+# Local SQLite copy of FNGS digest issues, digest records, similar records groups and keywords. Server payloads are
+# stored as JSON as is, so records loaded from mirror are built by the same code as records loaded from server
+class DigestDataMirror(NetworkingMixin,
+                       ServerConnectionMixin):
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS digest_issues (number INTEGER PRIMARY KEY, data TEXT NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS digest_records (id INTEGER PRIMARY KEY, digest_issue INTEGER, position INTEGER NOT NULL, data TEXT NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS digest_records_digest_issue ON digest_records (digest_issue, position)',
+        'CREATE TABLE IF NOT EXISTS similar_records (id INTEGER PRIMARY KEY, digest_issue INTEGER, position INTEGER NOT NULL, data TEXT NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS similar_records_digest_issue ON similar_records (digest_issue, position)',
+        'CREATE TABLE IF NOT EXISTS keywords (id INTEGER PRIMARY KEY, data TEXT NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)',
+        # Digest issues which records were pulled completely, issue itself is known earlier from issues list
+        'CREATE TABLE IF NOT EXISTS synced_digest_issues (number INTEGER PRIMARY KEY, synced_time REAL NOT NULL)',
+    )
+    LAST_SYNCED_DIGEST_ISSUE_KEY = 'last_synced_digest_issue'
+    LAST_SYNC_TIME_KEY = 'last_sync_time'
+
+    def __init__(self, config_path: str, db_path: str = None):
+        self._token = None
+        self._load_config(config_path)
+        if db_path is None:
+            db_path = os.path.join(CACHE_DIRECTORY, f'mirror-{self._host}-{self._port}.sqlite3')
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connection = sqlite3.connect(db_path)
+        with self._connection:
+            for statement in self.SCHEMA:
+                self._connection.execute(statement)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    @property
+    def last_synced_digest_issue(self):
+        value = self._sync_state_value(self.LAST_SYNCED_DIGEST_ISSUE_KEY)
+        return int(value) if value is not None else None
+
+    def sync(self, full: bool = False, digest_issues: List[int] = None):
+        # Cursor is the newest digest issue seen on previous completed full or incremental sync. Only it and issues after
+        # it are pulled again, older issues are already published and do not change, use "full" to pull everything
+        # anyway. Sync of specified digest issues does not move cursor, issues between it and them are not synced yet
+        self._login()
+        sync_start_time = time.time()
+        digest_issues_plain = self.get_results_from_all_pages(f'{self.gatherer_api_url}/digest-issue/', self._auth_headers)
+        keywords_plain = self.get_results_from_all_pages(f'{self.gatherer_api_url}/keyword?page_size=5000', self._auth_headers)
+        with self._connection:
+            self._connection.executemany('INSERT OR REPLACE INTO digest_issues (number, data) VALUES (?, ?)',
+                                         [(di['number'], json.dumps(di)) for di in digest_issues_plain])
+            self._connection.execute('DELETE FROM keywords')
+            self._connection.executemany('INSERT INTO keywords (id, data) VALUES (?, ?)',
+                                         [(k['id'], json.dumps(k)) for k in keywords_plain])
+        logger.info(f'{len(digest_issues_plain)} digest issue(s) and {len(keywords_plain)} keyword(s) synced')
+
+        moves_cursor = digest_issues is None
+        if digest_issues is None:
+            cursor = None if full else self.last_synced_digest_issue
+            digest_issues = sorted(di['number'] for di in digest_issues_plain
+                                   if cursor is None or di['number'] >= cursor)
+        for digest_issue in digest_issues:
+            self._sync_digest_issue(digest_issue)
+
+        with self._connection:
+            if moves_cursor and digest_issues_plain:
+                newest_digest_issue = max(di['number'] for di in digest_issues_plain)
+                last_synced_digest_issue = self.last_synced_digest_issue
+                if last_synced_digest_issue is None or newest_digest_issue > last_synced_digest_issue:
+                    self._set_sync_state_value(self.LAST_SYNCED_DIGEST_ISSUE_KEY, newest_digest_issue)
+            self._set_sync_state_value(self.LAST_SYNC_TIME_KEY, sync_start_time)
+        logger.info(f'Mirror "{self.db_path}" synced in {time.time() - sync_start_time:.1f}s')
+        return digest_issues
+
+    def _sync_digest_issue(self, digest_issue: int):
+        logger.info(f'Syncing digest number #{digest_issue}')
+        records_plain = self.get_results_from_all_pages(f'{self.gatherer_api_url}/digest-record/detailed/?digest_issue={digest_issue}',
+                                                        self._auth_headers)
+        similar_records_plain = self.get_results_from_all_pages(f'{self.gatherer_api_url}/similar-digest-record/detailed/?digest_issue={digest_issue}',
+                                                                self._auth_headers)
+        # Whole issue is replaced in one transaction, so readers never see records of half-synced issue and records
+        # moved to another issue or deleted on server disappear from this one
+        with self._connection:
+            self._connection.execute('DELETE FROM digest_records WHERE digest_issue = ?', (digest_issue,))
+            self._connection.executemany('INSERT OR REPLACE INTO digest_records (id, digest_issue, position, data) VALUES (?, ?, ?, ?)',
+                                         [(r['id'], digest_issue, position, json.dumps(r))
+                                          for position, r in enumerate(records_plain)])
+            self._connection.execute('DELETE FROM similar_records WHERE digest_issue = ?', (digest_issue,))
+            self._connection.executemany('INSERT OR REPLACE INTO similar_records (id, digest_issue, position, data) VALUES (?, ?, ?, ?)',
+                                         [(sr['id'], digest_issue, position, json.dumps(sr))
+                                          for position, sr in enumerate(similar_records_plain)])
+            self._connection.execute('INSERT OR REPLACE INTO synced_digest_issues (number, synced_time) VALUES (?, ?)',
+                                     (digest_issue, time.time()))
+        logger.debug(f'{len(records_plain)} digest record(s) and {len(similar_records_plain)} similar records group(s) '
+                     f'synced for digest number #{digest_issue}')
+
+    def has_digest_issue(self, digest_issue: int):
+        # Only issues which records were synced, not just listed on server
+        row = self._connection.execute('SELECT 1 FROM synced_digest_issues WHERE number = ?', (digest_issue,)).fetchone()
+        return row is not None
+
+    def digest_issues(self) -> List[Dict]:
+        return self._select_data('SELECT data FROM digest_issues ORDER BY number')
+
+    def digest_records(self, digest_issue: int) -> List[Dict]:
+        return self._select_data('SELECT data FROM digest_records WHERE digest_issue = ? ORDER BY position',
+                                 (digest_issue,))
+
+    def similar_records(self, digest_issue: int) -> List[Dict]:
+        return self._select_data('SELECT data FROM similar_records WHERE digest_issue = ? ORDER BY position',
+                                 (digest_issue,))
+
+    def keywords(self) -> List[Dict]:
+        return self._select_data('SELECT data FROM keywords ORDER BY id')
+
+    def _select_data(self, query: str, parameters=()):
+        return [json.loads(data) for data, in self._connection.execute(query, parameters)]
+
+    def _sync_state_value(self, key: str):
+        row = self._connection.execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _set_sync_state_value(self, key: str, value):
+        self._connection.execute('INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)', (key, str(value)))
@@ -0,0 +1,1051 @@
+import asyncio
+import base64
+import datetime
+import email.utils
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from enum import Enum
+from multiprocessing.pool import ThreadPool
+from typing import Dict
+from urllib.parse import (
+    urlparse,
+    parse_qsl,
+    urlencode,
+    urlunparse,
+)
+
+import requests
+import requests.adapters
+
+from fntools import (
+    CACHE_DIRECTORY,
+    logger,
+)
+
+
+NETWORK_TIMEOUT_SECONDS = 30
+
+
+# requests.Session is not guaranteed to be thread-safe, so every thread gets its own keep-alive session with the same
+# per-host connection pool settings, HTTP/2 client from optional "httpx" package is thread-safe and is shared. Sessions of
+# finished threads are closed, and threads for concurrent requests are owned by pool and live as long as it does, so
+# their sessions and connections are reused by following calls. There is one threads pool per workers count, pools are
+# closed only with session pool, so calls with different workers counts do not close pool used by another thread
+class HttpSessionPool:
+
+    DEFAULT_POOL_CONNECTIONS = 10
+    DEFAULT_POOL_MAXSIZE = 10
+
+    def __init__(self,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 http2: bool = False):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.http2 = http2
+        self._thread_local = threading.local()
+        self._sessions = {}
+        self._http2_client = None
+        self._threads_pools = {}
+        self._lock = threading.Lock()
+
+    @property
+    def timeout_exceptions(self):
+        exceptions = (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError)
+        if self.http2:
+            import httpx
+            exceptions += (httpx.TimeoutException, httpx.NetworkError)
+        return exceptions
+
+    def session(self):
+        if self.http2:
+            return self._shared_http2_client()
+        session = getattr(self._thread_local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=self.pool_connections,
+                                                    pool_maxsize=self.pool_maxsize)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._thread_local.session = session
+            with self._lock:
+                self._close_finished_threads_sessions()
+                self._sessions[threading.current_thread()] = session
+        return session
+
+    def _close_finished_threads_sessions(self):
+        for thread in [thread for thread in self._sessions if not thread.is_alive()]:
+            self._sessions.pop(thread).close()
+
+    @property
+    def sessions_count(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def map(self, function, items, workers_count: int):
+        if getattr(self._thread_local, 'is_pool_worker', False):
+            # Nested call from pool worker would wait for workers which are all busy waiting for it
+            return [function(item) for item in items]
+        with self._lock:
+            if workers_count not in self._threads_pools:
+                self._threads_pools[workers_count] = ThreadPool(workers_count, initializer=self._mark_pool_worker)
+            threads_pool = self._threads_pools[workers_count]
+        return threads_pool.map(function, items)
+
+    def _mark_pool_worker(self):
+        self._thread_local.is_pool_worker = True
+
+    def _shared_http2_client(self):
+        with self._lock:
+            if self._http2_client is None:
+                try:
+                    import httpx
+                except ImportError:
+                    raise Exception('HTTP/2 support requires "httpx[http2]" package to be installed')
+                limits = httpx.Limits(max_connections=self.pool_connections * self.pool_maxsize,
+                                      max_keepalive_connections=self.pool_maxsize)
+                self._http2_client = httpx.Client(http2=True, limits=limits)
+            return self._http2_client
+
+    def close(self):
+        with self._lock:
+            for threads_pool in self._threads_pools.values():
+                # Tasks already given to pool are completed, its threads finish after that
+                threads_pool.close()
+            self._threads_pools = {}
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+            self._thread_local = threading.local()
+            if self._http2_client is not None:
+                self._http2_client.close()
+                self._http2_client = None
+
+
+class AuthHeaders(dict):
+    # Headers with access token which know how to get new token when server responds with HTTP 401, async callback gets
+    # async networking client too and is used from event loop instead of blocking one. Identity of server and user does not
+    # change with token refresh, so responses cached for user are kept between tokens
+
+    def __init__(self, headers: Dict, refresh_callback, async_refresh_callback=None, identity: str = None):
+        super().__init__(headers)
+        self.refresh_callback = refresh_callback
+        self.async_refresh_callback = async_refresh_callback
+        self.identity = identity
+
+
+class CircuitBreaker:
+    # Shared between all threads and requests to one host, after several failures in a row it stops requests to server for some
+    # time and then lets only one probe request through
+
+    class State(Enum):
+        CLOSED = 'closed'
+        OPEN = 'open'
+        HALF_OPEN = 'half_open'
+
+    DEFAULT_FAILURES_THRESHOLD = 5
+    DEFAULT_RESET_TIMEOUT_SECONDS = 30
+    PROBE_WAIT_SECONDS = 1
+
+    def __init__(self,
+                 failures_threshold: int = DEFAULT_FAILURES_THRESHOLD,
+                 reset_timeout_seconds: float = DEFAULT_RESET_TIMEOUT_SECONDS):
+        self.failures_threshold = failures_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.state = CircuitBreaker.State.CLOSED
+        self._failures_count = 0
+        self._opened_time = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def seconds_until_allowed(self) -> float:
+        with self._lock:
+            if self.state == CircuitBreaker.State.CLOSED:
+                return 0
+            if self.state == CircuitBreaker.State.OPEN:
+                seconds_left = self._opened_time + self.reset_timeout_seconds - time.monotonic()
+                if seconds_left > 0:
+                    return seconds_left
+                self.state = CircuitBreaker.State.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return self.PROBE_WAIT_SECONDS
+            self._probe_in_flight = True
+            return 0
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CircuitBreaker.State.CLOSED:
+                logger.info('Server is responding again, circuit breaker closed')
+            self.state = CircuitBreaker.State.CLOSED
+            self._failures_count = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures_count += 1
+            if self.state == CircuitBreaker.State.HALF_OPEN \
+                    or self.state == CircuitBreaker.State.CLOSED and self._failures_count >= self.failures_threshold:
+                if self.state == CircuitBreaker.State.CLOSED:
+                    logger.warning(f'{self._failures_count} failed requests in a row, pausing requests for {self.reset_timeout_seconds} seconds')
+                self.state = CircuitBreaker.State.OPEN
+                self._opened_time = time.monotonic()
+                self._probe_in_flight = False
+
+
+class RetryPolicy:
+    # Exponential backoff with full jitter, "Retry-After" support and per-endpoint attempts budgets
+    DEFAULT_MAX_ATTEMPTS = 50
+    DEFAULT_BASE_DELAY_SECONDS = 1
+    DEFAULT_MAX_DELAY_SECONDS = 60
+    MAX_RETRY_AFTER_SECONDS = 300
+    RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+    # Request could be already processed by server when gateway fails, so POST is not repeated in such case
+    NOT_IDEMPOTENT_RETRYABLE_STATUS_CODES = (429, 503)
+    # URL path prefix to attempts count
+    DEFAULT_ENDPOINTS_MAX_ATTEMPTS = {
+        '/api/v2/auth/': 5,
+    }
+
+    def __init__(self,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 base_delay_seconds: float = DEFAULT_BASE_DELAY_SECONDS,
+                 max_delay_seconds: float = DEFAULT_MAX_DELAY_SECONDS,
+                 endpoints_max_attempts: Dict[str, int] = None,
+                 circuit_breaker_failures_threshold: int = CircuitBreaker.DEFAULT_FAILURES_THRESHOLD,
+                 circuit_breaker_reset_timeout_seconds: float = CircuitBreaker.DEFAULT_RESET_TIMEOUT_SECONDS,
+                 max_retry_after_seconds: float = MAX_RETRY_AFTER_SECONDS):
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.endpoints_max_attempts = endpoints_max_attempts if endpoints_max_attempts is not None else dict(self.DEFAULT_ENDPOINTS_MAX_ATTEMPTS)
+        self.circuit_breaker_failures_threshold = circuit_breaker_failures_threshold
+        self.circuit_breaker_reset_timeout_seconds = circuit_breaker_reset_timeout_seconds
+        self.max_retry_after_seconds = max_retry_after_seconds
+        self._circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def circuit_breaker_for(self, url: str) -> CircuitBreaker:
+        # One circuit breaker per host, so failing Habr or VK does not pause requests to FNGS
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._circuit_breakers:
+                self._circuit_breakers[host] = CircuitBreaker(self.circuit_breaker_failures_threshold,
+                                                              self.circuit_breaker_reset_timeout_seconds)
+            return self._circuit_breakers[host]
+
+    def max_attempts_for(self, url: str) -> int:
+        path = urlparse(url).path
+        matched_prefixes = [prefix for prefix in self.endpoints_max_attempts if path.startswith(prefix)]
+        if not matched_prefixes:
+            return self.max_attempts
+        return self.endpoints_max_attempts[max(matched_prefixes, key=len)]
+
+    def is_retryable_status(self, status_code: int, method) -> bool:
+        if method == NetworkingMixin.RequestType.POST:
+            return status_code in self.NOT_IDEMPOTENT_RETRYABLE_STATUS_CODES
+        return status_code in self.RETRYABLE_STATUS_CODES
+
+    def delay_seconds(self, attempt_i: int, response_headers=None) -> float:
+        retry_after_seconds = self._retry_after_seconds(response_headers)
+        if retry_after_seconds is not None:
+            return retry_after_seconds
+        return random.uniform(0, min(self.max_delay_seconds, self.base_delay_seconds * 2 ** attempt_i))
+
+    def _retry_after_seconds(self, response_headers):
+        if not response_headers:
+            return None
+        retry_after = response_headers.get('Retry-After')
+        if retry_after is None:
+            return None
+        if retry_after.strip().isnumeric():
+            seconds = float(retry_after)
+        else:
+            try:
+                retry_datetime = email.utils.parsedate_to_datetime(retry_after)
+            except (TypeError, ValueError):
+                return None
+            seconds = (retry_datetime - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+        return min(max(seconds, 0), self.max_retry_after_seconds)
+
+
+class RequestAttempts:
+    # Retry policy and circuit breaker bookkeeping of one request, shared by sync and async transports, which only send
+    # request and sleep for returned delays
+
+    def __init__(self, retry_policy: RetryPolicy, url: str, method, timeout: float):
+        self.retry_policy = retry_policy
+        self.url = url
+        self.method = method
+        self.timeout = timeout
+        self.max_attempts = retry_policy.max_attempts_for(url)
+        self.circuit_breaker = retry_policy.circuit_breaker_for(url)
+        self.attempt_i = 0
+        self.auth_refreshed = False
+
+    @property
+    def retries_left(self):
+        return self.max_attempts - self.attempt_i - 1
+
+    def seconds_until_allowed(self) -> float:
+        return self.circuit_breaker.seconds_until_allowed()
+
+    def timeout_delay_seconds(self) -> float:
+        # Raises exception when attempts are exhausted
+        self.circuit_breaker.record_failure()
+        base_timeout_msg = f'Request to url {self.url} reached timeout of {self.timeout} seconds'
+        if self.retries_left <= 0:
+            raise Exception(f'{base_timeout_msg}, retries count {self.max_attempts} exceeded')
+        delay_seconds = self.retry_policy.delay_seconds(self.attempt_i)
+        logger.warning(f'{base_timeout_msg}, sleeping {delay_seconds:.1f} seconds and trying again, {self.retries_left} retries left')
+        self.attempt_i += 1
+        return delay_seconds
+
+    def abort(self):
+        # Any other exception or cancellation during request, probe request should not stay in flight forever
+        self.circuit_breaker.record_failure()
+
+    def needs_auth_refresh(self, response, headers) -> bool:
+        if response.status_code != 401 or not isinstance(headers, AuthHeaders) or self.auth_refreshed:
+            return False
+        self.circuit_breaker.record_success()
+        logger.info('Access token is not accepted by server, refreshing it')
+        # Refresh is done only once and does not take attempt, so request with refreshed token is sent even on last attempt
+        self.auth_refreshed = True
+        return True
+
+    def retry_delay_seconds(self, response):
+        # None means that response is final and should be returned
+        if not self.retry_policy.is_retryable_status(response.status_code, self.method):
+            self.circuit_breaker.record_success()
+            return None
+        self.circuit_breaker.record_failure()
+        if self.retries_left <= 0:
+            return None
+        delay_seconds = self.retry_policy.delay_seconds(self.attempt_i, response.headers)
+        logger.warning(f'Request to url {self.url} returned HTTP {response.status_code}, sleeping {delay_seconds:.1f} seconds and trying again, {self.retries_left} retries left')
+        self.attempt_i += 1
+        return delay_seconds
+
+
+class CachedResponse:
+    # Looks like requests.Response for code which only reads status code, headers and body
+
+    def __init__(self, status_code: int, content: bytes, headers: Dict):
+        self.status_code = status_code
+        self.content = content
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self.from_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+
+class HttpResponseCache:
+    # On-disk cache of GET responses for slow-changing endpoints. Fresh entries are returned without request, stale ones
+    # are revalidated with "If-None-Match"/"If-Modified-Since", so unchanged data costs only HTTP 304 without body. Total
+    # size of stored bodies is bounded, least recently used entries are evicted first. Entries of authenticated requests
+    # are stored per user, so one user's responses are never returned for another one
+    DEFAULT_MAX_SIZE_BYTES = 256 * 1024 * 1024
+    # Path suffix to TTL, zero TTL means that entry is revalidated on every request
+    DEFAULT_ENDPOINTS_TTL_SECONDS = {
+        '/gatherer/keyword': 60 * 60,
+        '/gatherer/digest-issue/': 10 * 60,
+        '/gatherer/similar-digest-record/detailed/': 0,
+    }
+
+    def __init__(self,
+                 db_path: str,
+                 max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES,
+                 endpoints_ttl_seconds: Dict[str, float] = None):
+        self.db_path = db_path
+        self.max_size_bytes = max_size_bytes
+        self.endpoints_ttl_seconds = endpoints_ttl_seconds if endpoints_ttl_seconds is not None else dict(self.DEFAULT_ENDPOINTS_TTL_SECONDS)
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.evictions = 0
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def ttl_seconds_for(self, url: str):
+        path = urlparse(url).path
+        matched_suffixes = [suffix for suffix in self.endpoints_ttl_seconds if path.endswith(suffix)]
+        if not matched_suffixes:
+            return None
+        return self.endpoints_ttl_seconds[max(matched_suffixes, key=len)]
+
+    @property
+    def counters(self):
+        return {
+            'hits': self.hits,
+            'revalidations': self.revalidations,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    @staticmethod
+    def key_for(url: str, headers=None):
+        if isinstance(headers, AuthHeaders) and headers.identity is not None:
+            return f'{headers.identity} {url}'
+        authorization = (headers or {}).get('Authorization')
+        if authorization is not None:
+            return f'sha256:{hashlib.sha256(authorization.encode()).hexdigest()} {url}'
+        return url
+
+    def get(self, url: str, fetch, headers=None):
+        # "fetch" gets conditional headers and performs actual request, request headers are used to find user's entry
+        ttl_seconds = self.ttl_seconds_for(url)
+        if ttl_seconds is None:
+            return fetch({})
+        key = self.key_for(url, headers)
+        with self._lock:
+            entry = self._db().execute('SELECT status_code, headers, body, etag, last_modified, stored_time FROM http_responses WHERE key = ?',
+                                       (key,)).fetchone()
+        if entry is not None:
+            status_code, headers_str, body, etag, last_modified, stored_time = entry
+            if time.time() - stored_time < ttl_seconds:
+                self._touch(key, stored_time)
+                with self._lock:
+                    self.hits += 1
+                logger.debug(f'Using cached response for URL "{url}"')
+                return CachedResponse(status_code, body, json.loads(headers_str))
+            conditional_headers = {}
+            if etag is not None:
+                conditional_headers['If-None-Match'] = etag
+            if last_modified is not None:
+                conditional_headers['If-Modified-Since'] = last_modified
+        else:
+            conditional_headers = {}
+        response = fetch(conditional_headers)
+        if response.status_code == 304 and entry is not None:
+            self._touch(key, time.time())
+            with self._lock:
+                self.revalidations += 1
+            logger.debug(f'Cached response for URL "{url}" is not modified')
+            return CachedResponse(status_code, body, json.loads(headers_str))
+        with self._lock:
+            self.misses += 1
+        if response.status_code == 200:
+            self._store(key, response, ttl_seconds)
+        return response
+
+    def clear(self):
+        with self._lock:
+            with self._db() as connection:
+                connection.execute('DELETE FROM http_responses')
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _db(self):
+        # Database is opened on first use only, so scripts which do not use cached endpoints do not touch it
+        if self._connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            with self._connection:
+                self._connection.execute('CREATE TABLE IF NOT EXISTS http_responses (key TEXT PRIMARY KEY, status_code INTEGER NOT NULL, '
+                                         'headers TEXT NOT NULL, body BLOB NOT NULL, etag TEXT, last_modified TEXT, '
+                                         'stored_time REAL NOT NULL, accessed_time REAL NOT NULL, size INTEGER NOT NULL)')
+                self._connection.execute('CREATE INDEX IF NOT EXISTS http_responses_accessed_time ON http_responses (accessed_time)')
+        return self._connection
+
+    def _touch(self, key: str, stored_time: float):
+        with self._lock:
+            with self._db() as connection:
+                connection.execute('UPDATE http_responses SET stored_time = ?, accessed_time = ? WHERE key = ?',
+                                   (stored_time, time.time(), key))
+
+    def _store(self, key: str, response, ttl_seconds: float):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if 'no-store' in response.headers.get('Cache-Control', ''):
+            return
+        # Without validators entry which has to be revalidated every time is useless
+        if ttl_seconds <= 0 and etag is None and last_modified is None:
+            return
+        body = response.content
+        if len(body) > self.max_size_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            with self._db() as connection:
+                connection.execute('INSERT OR REPLACE INTO http_responses (key, status_code, headers, body, etag, last_modified, stored_time, accessed_time, size) '
+                                   'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                   (key, response.status_code, json.dumps(dict(response.headers)), body, etag, last_modified, now, now, len(body)))
+                self._evict(connection)
+
+    def _evict(self, connection):
+        total_size = connection.execute('SELECT COALESCE(SUM(size), 0) FROM http_responses').fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return
+        for key, size in connection.execute('SELECT key, size FROM http_responses ORDER BY accessed_time').fetchall():
+            if total_size <= self.max_size_bytes:
+                break
+            connection.execute('DELETE FROM http_responses WHERE key = ?', (key,))
+            total_size -= size
+            self.evictions += 1
+            logger.debug(f'Evicted cached response "{key}"')
+
+
+class NetworkingMixin:
+    MAX_PAGE_SIZE = 500
+    PAGINATION_WORKERS_COUNT = 4
+
+    http_session_pool = HttpSessionPool()
+    retry_policy = RetryPolicy()
+    http_response_cache = HttpResponseCache(os.path.join(CACHE_DIRECTORY, 'http-cache.sqlite3'))
+
+    class RequestType(Enum):
+        GET = 'GET'
+        PATCH = 'PATCH'
+        POST = 'POST'
+
+    @staticmethod
+    def configure_http_session_pool(pool_connections: int = HttpSessionPool.DEFAULT_POOL_CONNECTIONS,
+                                    pool_maxsize: int = HttpSessionPool.DEFAULT_POOL_MAXSIZE,
+                                    http2: bool = False):
+        NetworkingMixin.http_session_pool.close()
+        NetworkingMixin.http_session_pool = HttpSessionPool(pool_connections=pool_connections,
+                                                            pool_maxsize=pool_maxsize,
+                                                            http2=http2)
+
+    @staticmethod
+    def configure_http_response_cache(enabled: bool = True,
+                                      db_path: str = None,
+                                      max_size_bytes: int = HttpResponseCache.DEFAULT_MAX_SIZE_BYTES,
+                                      endpoints_ttl_seconds: Dict[str, float] = None):
+        if NetworkingMixin.http_response_cache is not None:
+            NetworkingMixin.http_response_cache.close()
+        if not enabled:
+            NetworkingMixin.http_response_cache = None
+            return
+        if db_path is None:
+            db_path = os.path.join(CACHE_DIRECTORY, 'http-cache.sqlite3')
+        NetworkingMixin.http_response_cache = HttpResponseCache(db_path,
+                                                                max_size_bytes=max_size_bytes,
+                                                                endpoints_ttl_seconds=endpoints_ttl_seconds)
+
+    @staticmethod
+    def reopen_shared_connections():
+        # For child processes, sockets and SQLite connection inherited from parent process should not be used by both
+        # processes, so they are replaced with new ones with the same configuration without closing inherited ones
+        session_pool = NetworkingMixin.http_session_pool
+        NetworkingMixin.http_session_pool = HttpSessionPool(pool_connections=session_pool.pool_connections,
+                                                            pool_maxsize=session_pool.pool_maxsize,
+                                                            http2=session_pool.http2)
+        response_cache = NetworkingMixin.http_response_cache
+        if response_cache is not None:
+            NetworkingMixin.http_response_cache = HttpResponseCache(response_cache.db_path,
+                                                                    max_size_bytes=response_cache.max_size_bytes,
+                                                                    endpoints_ttl_seconds=response_cache.endpoints_ttl_seconds)
+
+    @staticmethod
+    def get_with_retries(url, headers=None, timeout=NETWORK_TIMEOUT_SECONDS, retry_policy: RetryPolicy = None):
+        response_cache = NetworkingMixin.http_response_cache
+        if response_cache is None:
+            response = NetworkingMixin.request_with_retries(url, headers=headers, method=NetworkingMixin.RequestType.GET, data=None, timeout=timeout, retry_policy=retry_policy)
+        else:
+            response = response_cache.get(url, lambda conditional_headers: NetworkingMixin.request_with_retries(url,
+                                                                                                                headers=NetworkingMixin._with_additional_headers(headers, conditional_headers),
+                                                                                                                method=NetworkingMixin.RequestType.GET,
+                                                                                                                data=None,
+                                                                                                                timeout=timeout,
+                                                                                                                retry_policy=retry_policy),
+                                          headers)
+        if response.status_code != 200:
+            raise Exception(f'Non-success HTTP return code {response.status_code}')
+        return response
+
+    @staticmethod
+    def _with_additional_headers(headers, additional_headers: Dict):
+        if not additional_headers:
+            return headers
+        if isinstance(headers, AuthHeaders):
+            return AuthHeaders({**headers, **additional_headers}, headers.refresh_callback, headers.async_refresh_callback, headers.identity)
+        return {**(headers if headers is not None else {}), **additional_headers}
+
+    @staticmethod
+    def get_results_from_all_pages(base_url, headers, timeout=NETWORK_TIMEOUT_SECONDS, workers_count=None):
+        if workers_count is None:
+            workers_count = NetworkingMixin.PAGINATION_WORKERS_COUNT
+        base_url = NetworkingMixin._url_with_page_size(base_url)
+        first_page_data = NetworkingMixin._get_page_data(base_url, headers, timeout)
+        results = list(first_page_data['results'])
+        next_url = first_page_data['links']['next']
+        if next_url:
+            remaining_pages_urls = NetworkingMixin._remaining_pages_urls(first_page_data, next_url)
+            if remaining_pages_urls is None or workers_count <= 1:
+                logger.debug('Fetching remaining pages sequentially')
+                results += NetworkingMixin._get_results_sequentially(next_url, headers, timeout)
+            else:
+                logger.debug(f'Fetching {len(remaining_pages_urls)} remaining page(s) using {workers_count} workers')
+                pages_data = NetworkingMixin.http_session_pool.map(lambda page_url: NetworkingMixin._get_page_data(page_url, headers, timeout),
+                                                                   remaining_pages_urls,
+                                                                   workers_count)
+                for page_data in pages_data:
+                    results += page_data['results']
+        logger.debug(f'{len(results)} results fetched')
+        return results
+
+    @staticmethod
+    def iterate_results_from_all_pages(base_url, headers, timeout=NETWORK_TIMEOUT_SECONDS):
+        # Only one decoded page is kept in memory at a time
+        url = NetworkingMixin._url_with_page_size(base_url)
+        results_count = 0
+        while url:
+            response_data = NetworkingMixin._get_page_data(url, headers, timeout)
+            url = response_data['links']['next']
+            page_results = response_data['results']
+            del response_data
+            results_count += len(page_results)
+            yield from page_results
+        logger.debug(f'{results_count} results fetched')
+
+    @staticmethod
+    def _url_with_page_size(url):
+        url_parts = list(urlparse(url))
+        query = dict(parse_qsl(url_parts[4]))
+        if 'page_size' not in query:
+            query.update({'page_size': NetworkingMixin.MAX_PAGE_SIZE})
+            url_parts[4] = urlencode(query)
+            url = urlunparse(url_parts)
+        return url
+
+    @staticmethod
+    def _get_page_data(url, headers, timeout=NETWORK_TIMEOUT_SECONDS):
+        response = NetworkingMixin.get_with_retries(url, headers, timeout)
+        response_str = response.content.decode()
+        return json.loads(response_str)
+
+    @staticmethod
+    def _get_results_sequentially(url, headers, timeout=NETWORK_TIMEOUT_SECONDS):
+        results = []
+        while url:
+            response_data = NetworkingMixin._get_page_data(url, headers, timeout)
+            results += response_data['results']
+            url = response_data['links']['next']
+        return results
+
+    @staticmethod
+    def _remaining_pages_urls(first_page_data, next_url):
+        # Page URLs could be predicted only for page number pagination, cursor-style links are followed one by one
+        if 'count' not in first_page_data or not first_page_data['results']:
+            return None
+        url_parts = list(urlparse(next_url))
+        query = dict(parse_qsl(url_parts[4]))
+        if 'page' not in query or not query['page'].isnumeric():
+            return None
+        page_size = len(first_page_data['results'])
+        pages_count = (first_page_data['count'] + page_size - 1) // page_size
+        pages_urls = []
+        for page_number in range(int(query['page']), pages_count + 1):
+            query['page'] = page_number
+            url_parts[4] = urlencode(query)
+            pages_urls.append(urlunparse(url_parts))
+        return pages_urls
+
+    @staticmethod
+    def patch_with_retries(url, headers=None, data=None, timeout=NETWORK_TIMEOUT_SECONDS):
+        return NetworkingMixin.request_with_retries(url, headers=headers, method=NetworkingMixin.RequestType.PATCH, data=data, timeout=timeout)
+
+    @staticmethod
+    def post_with_retries(url, headers=None, data=None, timeout=NETWORK_TIMEOUT_SECONDS):
+        return NetworkingMixin.request_with_retries(url, headers=headers, method=NetworkingMixin.RequestType.POST, data=data, timeout=timeout)
+
+    @staticmethod
+    def request_with_retries(url,
+                             headers=None,
+                             method=RequestType.GET,
+                             data=None,
+                             timeout=NETWORK_TIMEOUT_SECONDS,
+                             retry_policy: RetryPolicy = None):
+        # Retry policy could be given for requests which have their own attempts budget, shared one is used otherwise
+        if headers is None:
+            headers = {}
+        session_pool = NetworkingMixin.http_session_pool
+        attempts = RequestAttempts(retry_policy if retry_policy is not None else NetworkingMixin.retry_policy, url, method, timeout)
+        while True:
+            wait_seconds = attempts.seconds_until_allowed()
+            while wait_seconds > 0:
+                time.sleep(wait_seconds)
+                wait_seconds = attempts.seconds_until_allowed()
+            begin_datetime = datetime.datetime.now()
+            try:
+                session = session_pool.session()
+                if method == NetworkingMixin.RequestType.GET:
+                    logger.debug(f'GETting URL "{url}"')
+                    response = session.get(url,
+                                           headers=headers,
+                                           timeout=timeout)
+                elif method == NetworkingMixin.RequestType.PATCH:
+                    logger.debug(f'PATCHing URL "{url}"')
+                    response = session.patch(url,
+                                             data=data,
+                                             headers=headers,
+                                             timeout=timeout)
+                elif method == NetworkingMixin.RequestType.POST:
+                    logger.debug(f'POSTing URL "{url}"')
+                    response = session.post(url,
+                                            data=data,
+                                            headers=headers,
+                                            timeout=timeout)
+                else:
+                    raise NotImplementedError
+                end_datetime = datetime.datetime.now()
+                logger.debug(f'Response time: {end_datetime - begin_datetime}')
+            except session_pool.timeout_exceptions:
+                time.sleep(attempts.timeout_delay_seconds())
+                continue
+            except BaseException:
+                attempts.abort()
+                raise
+            if attempts.needs_auth_refresh(response, headers):
+                headers = headers.refresh_callback(headers)
+                continue
+            delay_seconds = attempts.retry_delay_seconds(response)
+            if delay_seconds is None:
+                return response
+            time.sleep(delay_seconds)
+
+
+class AsyncNetworkingClient:
+    # Asyncio counterpart of NetworkingMixin, allows to keep hundreds of requests in flight on one thread
+    DEFAULT_MAX_IN_FLIGHT = 100
+
+    class Response:
+
+        def __init__(self, status_code: int, content: bytes, headers: Dict):
+            self.status_code = status_code
+            self.content = content
+            self.headers = requests.structures.CaseInsensitiveDict(headers)
+
+        @property
+        def text(self):
+            return self.content.decode()
+
+    def __init__(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        self.max_in_flight = max_in_flight
+        self._session = None
+        self._semaphore = None
+        self.auth_refresh_lock = None
+
+    async def __aenter__(self):
+        import aiohttp
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight)
+        self._session = aiohttp.ClientSession(connector=connector)
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.auth_refresh_lock = asyncio.Lock()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._session.close()
+        self._session = None
+
+    async def get_with_retries(self, url, headers=None, timeout=NETWORK_TIMEOUT_SECONDS, retry_policy: RetryPolicy = None):
+        response = await self.request_with_retries(url, headers=headers, method=NetworkingMixin.RequestType.GET, data=None, timeout=timeout, retry_policy=retry_policy)
+        if response.status_code != 200:
+            raise Exception(f'Non-success HTTP return code {response.status_code}')
+        return response
+
+    async def patch_with_retries(self, url, headers=None, data=None, timeout=NETWORK_TIMEOUT_SECONDS):
+        return await self.request_with_retries(url, headers=headers, method=NetworkingMixin.RequestType.PATCH, data=data, timeout=timeout)
+
+    async def post_with_retries(self, url, headers=None, data=None, timeout=NETWORK_TIMEOUT_SECONDS):
+        return await self.request_with_retries(url, headers=headers, method=NetworkingMixin.RequestType.POST, data=data, timeout=timeout)
+
+    async def request_with_retries(self,
+                                   url,
+                                   headers=None,
+                                   method=NetworkingMixin.RequestType.GET,
+                                   data=None,
+                                   timeout=NETWORK_TIMEOUT_SECONDS,
+                                   retry_policy: RetryPolicy = None):
+        # Retry policy could be given for requests which have their own attempts budget, shared one is used otherwise
+        import aiohttp
+        if self._session is None:
+            raise Exception('Async networking client should be used as async context manager')
+        if headers is None:
+            headers = {}
+        attempts = RequestAttempts(retry_policy if retry_policy is not None else NetworkingMixin.retry_policy, url, method, timeout)
+        while True:
+            wait_seconds = attempts.seconds_until_allowed()
+            while wait_seconds > 0:
+                await asyncio.sleep(wait_seconds)
+                wait_seconds = attempts.seconds_until_allowed()
+            begin_datetime = datetime.datetime.now()
+            try:
+                logger.debug(f'{method.value} request to URL "{url}"')
+                async with self._semaphore:
+                    async with self._session.request(method.value,
+                                                     url,
+                                                     data=data,
+                                                     headers=headers,
+                                                     timeout=aiohttp.ClientTimeout(total=timeout)) as aiohttp_response:
+                        content = await aiohttp_response.read()
+                        response = AsyncNetworkingClient.Response(aiohttp_response.status,
+                                                                  content,
+                                                                  aiohttp_response.headers)
+                end_datetime = datetime.datetime.now()
+                logger.debug(f'Response time: {end_datetime - begin_datetime}')
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError):
+                await asyncio.sleep(attempts.timeout_delay_seconds())
+                continue
+            except BaseException:
+                attempts.abort()
+                raise
+            if attempts.needs_auth_refresh(response, headers):
+                if headers.async_refresh_callback is not None:
+                    headers = await headers.async_refresh_callback(headers, self)
+                else:
+                    # Blocking callback should not stop other requests in event loop
+                    headers = await asyncio.to_thread(headers.refresh_callback, headers)
+                continue
+            delay_seconds = attempts.retry_delay_seconds(response)
+            if delay_seconds is None:
+                return response
+            await asyncio.sleep(delay_seconds)
+
+    async def get_results_from_all_pages(self, base_url, headers, timeout=NETWORK_TIMEOUT_SECONDS):
+        base_url = NetworkingMixin._url_with_page_size(base_url)
+        first_page_data = await self._get_page_data(base_url, headers, timeout)
+        results = list(first_page_data['results'])
+        next_url = first_page_data['links']['next']
+        if next_url:
+            remaining_pages_urls = NetworkingMixin._remaining_pages_urls(first_page_data, next_url)
+            if remaining_pages_urls is None:
+                while next_url:
+                    page_data = await self._get_page_data(next_url, headers, timeout)
+                    results += page_data['results']
+                    next_url = page_data['links']['next']
+            else:
+                pages_data = await asyncio.gather(*[self._get_page_data(page_url, headers, timeout)
+                                                    for page_url in remaining_pages_urls])
+                for page_data in pages_data:
+                    results += page_data['results']
+        logger.debug(f'{len(results)} results fetched')
+        return results
+
+    async def _get_page_data(self, url, headers, timeout=NETWORK_TIMEOUT_SECONDS):
+        response = await self.get_with_retries(url, headers, timeout)
+        return json.loads(response.text)
+
+
+def jwt_expiration_time(token: str):
+    # Token signature is not checked, expiration time is needed only to avoid sending surely expired token
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))['exp']
+    except (IndexError, KeyError, ValueError, TypeError):
+        return None
+
+
+class TokenStore:
+    # Keeps FNGS JWT tokens between runs, keyed by server and user
+    EXPIRATION_MARGIN_SECONDS = 60
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Clients holding store are passed to other processes, every process saves tokens under its own lock
+        state = self.__dict__.copy()
+        state['_lock'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def load(self, key: str):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r') as fin:
+                return json.load(fin).get(key)
+        except (OSError, ValueError) as e:
+            logger.warning(f'Failed to read tokens from "{self.path}": {e}')
+            return None
+
+    def save(self, key: str, tokens: Dict):
+        with self._lock:
+            all_tokens = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r') as fin:
+                        all_tokens = json.load(fin)
+                except (OSError, ValueError):
+                    all_tokens = {}
+            all_tokens[key] = tokens
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f'{self.path}.tmp'
+            with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as fout:
+                json.dump(all_tokens, fout)
+            os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def is_alive(token: str):
+        if not token:
+            return False
+        expiration_time = jwt_expiration_time(token)
+        if expiration_time is None:
+            return False
+        return expiration_time - TokenStore.EXPIRATION_MARGIN_SECONDS > time.time()
+
+
+class ServerConnectionMixin:
+    # Requires NetworkingMixin
+    _token_lock = threading.Lock()
+    _refresh_token = None
+    _tbot_admin_username = None
+
+    def _load_config(self, config_path):
+        logger.info(f'Loading gathering server connect data from config "{config_path}"')
+        import yaml
+        with open(config_path, 'r') as fin:
+            config_data = yaml.safe_load(fin)
+            self._host = config_data['host']
+            self._protocol = config_data['protocol']
+            self._port = config_data['port']
+            self._user = config_data['user']
+            self._password = config_data['password']
+            # Optional, FNGS has no API to tell which Telegram bot user is admin
+            self._tbot_admin_username = config_data.get('tbot_admin_username')
+            logger.info('Loaded')
+        # One store per connection, so its lock serializes tokens saving from all threads
+        self._token_store = TokenStore(os.path.join(CACHE_DIRECTORY, 'tokens.json'))
+
+    def _login(self):
+        if self._use_cached_tokens():
+            return
+        if self._refresh_access_token():
+            return
+        self._login_with_password()
+
+    def _use_cached_tokens(self):
+        # Returns whether cached access token is still alive, otherwise cached refresh token is kept to get new one
+        tokens = self._token_store.load(self._token_store_key)
+        if tokens is None:
+            return False
+        self._refresh_token = tokens.get('refresh')
+        if not TokenStore.is_alive(tokens.get('access')):
+            return False
+        self._token = tokens['access']
+        logger.info('Using cached access token')
+        return True
+
+    def _login_with_password(self):
+        logger.info('Logging in')
+        response = self.post_with_retries(url=f'{self.auth_api_url}/token/',
+                                          data=self._login_data)
+        self._process_login_response(response)
+
+    def _refresh_access_token(self):
+        if not TokenStore.is_alive(self._refresh_token):
+            return False
+        logger.info('Refreshing access token')
+        response = self.post_with_retries(url=f'{self.auth_api_url}/token/refresh/',
+                                          data={'refresh': self._refresh_token})
+        if response.status_code != 200:
+            logger.warning(f'Failed to refresh access token, status code {response.status_code}')
+            return False
+        self._process_login_response(response)
+        return True
+
+    def _refresh_auth_headers(self, failed_headers: Dict):
+        with self._token_lock:
+            # Token could be already refreshed by another thread
+            if failed_headers.get('Authorization') == f'Bearer {self._token}':
+                if not self._refresh_access_token():
+                    self._login_with_password()
+            return self._auth_headers
+
+    @property
+    def _token_store_key(self):
+        return f'{self._protocol}://{self._host}:{self._port}/{self._user}'
+
+    async def _login_async(self, client: AsyncNetworkingClient):
+        if self._use_cached_tokens():
+            return
+        if await self._refresh_access_token_async(client):
+            return
+        await self._login_with_password_async(client)
+
+    async def _login_with_password_async(self, client: AsyncNetworkingClient):
+        logger.info('Logging in')
+        response = await client.post_with_retries(url=f'{self.auth_api_url}/token/',
+                                                  data=self._login_data)
+        self._process_login_response(response)
+
+    async def _refresh_access_token_async(self, client: AsyncNetworkingClient):
+        if not TokenStore.is_alive(self._refresh_token):
+            return False
+        logger.info('Refreshing access token')
+        response = await client.post_with_retries(url=f'{self.auth_api_url}/token/refresh/',
+                                                  data={'refresh': self._refresh_token})
+        if response.status_code != 200:
+            logger.warning(f'Failed to refresh access token, status code {response.status_code}')
+            return False
+        self._process_login_response(response)
+        return True
+
+    async def _refresh_auth_headers_async(self, failed_headers: Dict, client: AsyncNetworkingClient):
+        async with client.auth_refresh_lock:
+            # Token could be already refreshed by another coroutine
+            if failed_headers.get('Authorization') == f'Bearer {self._token}':
+                if not await self._refresh_access_token_async(client):
+                    await self._login_with_password_async(client)
+            return self._auth_headers
+
+    @property
+    def _login_data(self):
+        return {'username': self._user, 'password': self._password}
+
+    def _process_login_response(self, response):
+        if response.status_code != 200:
+            raise Exception(f'Invalid response code from FNGS login - {response.status_code}: {response.content.decode("utf-8")}')
+        result_data = json.loads(response.content)
+        self._token = result_data['access']
+        if 'refresh' in result_data:
+            self._refresh_token = result_data['refresh']
+        self._token_store.save(self._token_store_key, {'access': self._token, 'refresh': self._refresh_token})
+        logger.info('Logged in')
+
+    @property
+    def base_api_url(self):
+        return f'{self._protocol}://{self._host}:{self._port}/api/v2'
+
+    @property
+    def auth_api_url(self):
+        return f'{self.base_api_url}/auth'
+
+    @property
+    def gatherer_api_url(self):
+        return f'{self.base_api_url}/gatherer'
+
+    @property
+    def tbot_api_url(self):
+        return f'{self.base_api_url}/tbot'
+
+    @property
+    def admin_url(self):
+        return f'{self._protocol}://{self._host}:{self._port}/admin'
+
+    @property
+    def _auth_headers(self):
+        headers = {
+            'Authorization': f'Bearer {self._token}',
+            'Content-Type': 'application/json',
+        }
+        return AuthHeaders(headers, self._refresh_auth_headers, self._refresh_auth_headers_async, self._token_store_key)
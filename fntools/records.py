@@ -0,0 +1,1685 @@
+import asyncio
+import datetime
+import functools
+import html
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from enum import Enum
+from multiprocessing.pool import ThreadPool
+from pprint import pformat
+from typing import List, Dict
+from urllib.parse import urlencode
+
+from colorama import Style
+
+from data.releaseskeywords import *
+from data.articleskeywords import *
+from data.digestrecordcontenttype import *
+from data.digestrecordstate import *
+from data.digestrecordcontentcategory import *
+
+from fntools import (
+    CACHE_DIRECTORY,
+    DATA_DIRECTORY,
+    DIGEST_RECORD_DATETIME_FORMAT,
+    FNGS_DATETIME_FORMAT,
+    Language,
+    logger,
+)
+from fntools.networking import (
+    NETWORK_TIMEOUT_SECONDS,
+    AsyncNetworkingClient,
+    NetworkingMixin,
+    ServerConnectionMixin,
+)
+from fntools.urls import (
+    canonical_url,
+    same_urls,
+)
+
+
+@functools.lru_cache(maxsize=None)
+def language_from_fngs(name: str):
+    return Language(name.lower())
+
+
+@functools.lru_cache(maxsize=None)
+def digest_record_state_from_fngs(name: str):
+    return DigestRecordState(name.lower()) if name else None
+
+
+@functools.lru_cache(maxsize=None)
+def digest_record_content_type_from_fngs(name: str):
+    return DigestRecordContentType.from_name(name) if name else None
+
+
+@functools.lru_cache(maxsize=None)
+def digest_record_content_category_from_fngs(name: str):
+    return DigestRecordContentCategory.from_name(name) if name else None
+
+
+class DigestRecord:
+    __slots__ = (
+        'dt',
+        'source',
+        'title',
+        'url',
+        'additional_url',
+        'state',
+        'digest_issue',
+        'content_type',
+        'content_category',
+        'drid',
+        'is_main',
+        '_keywords',
+        '_proprietary_keywords_names',
+        '_not_proprietary_keywords_names',
+        'language',
+        'estimations',
+    )
+
+    def __init__(self,
+                 dt: datetime.datetime,
+                 source: str,
+                 title: str,
+                 url: str,
+                 additional_url: str,
+                 state: DigestRecordState = DigestRecordState.UNKNOWN,
+                 digest_issue: int = None,
+                 content_type: DigestRecordContentType = DigestRecordContentType.UNKNOWN,
+                 content_category: DigestRecordContentCategory = None,
+                 drid: int = None,
+                 is_main: bool = None,
+                 keywords: List = None,
+                 language: str = None,
+                 estimations: List = None):
+        self.dt = dt
+        self.source = sys.intern(source) if source is not None else None
+        self.title = title
+        self.url = url
+        self.additional_url = additional_url
+        self.state = state
+        self.digest_issue = digest_issue['number'] if isinstance(digest_issue, dict) else digest_issue
+        self.content_type = content_type
+        self.content_category = content_category
+        self.drid = drid
+        self.is_main = is_main
+        self.keywords = keywords
+        self.language = language_from_fngs(language)
+        self.estimations = estimations
+
+    @property
+    def keywords(self):
+        return self._keywords
+
+    @keywords.setter
+    def keywords(self, keywords: List):
+        self._keywords = keywords
+        self._proprietary_keywords_names = None
+        self._not_proprietary_keywords_names = None
+
+    @property
+    def proprietary_keywords_names(self):
+        if self._proprietary_keywords_names is None:
+            self._proprietary_keywords_names = set([k['name'] for k in self._keywords if k['proprietary']] if self._keywords else [])
+        return self._proprietary_keywords_names
+
+    @property
+    def not_proprietary_keywords_names(self):
+        if self._not_proprietary_keywords_names is None:
+            self._not_proprietary_keywords_names = set([k['name'] for k in self._keywords if not k['proprietary'] and not k['is_generic']] if self._keywords else [])
+        return self._not_proprietary_keywords_names
+
+    def __str__(self):
+        return pformat(self.to_dict())
+
+    def to_dict(self):
+        return {
+            'drid': self.drid,
+            'datetime': self.dt.strftime(DIGEST_RECORD_DATETIME_FORMAT) if self.dt is not None else None,
+            'source': self.source,
+            'title': self.title,
+            'url': self.url,
+            'is_main': self.is_main,
+            'state': self.state.value if self.state is not None else None,
+            'digest_issue': self.digest_issue,
+            'content_type': self.content_type.value if self.content_type is not None else None,
+            'content_category': self.content_category.value if self.content_category is not None else None,
+            'proprietary_keywords_names': self.proprietary_keywords_names,
+            'not_proprietary_keywords_names': self.not_proprietary_keywords_names,
+            'language': self.language.value,
+            'estimations': [{'user': e['user'],
+                             'state': e['state'].value}
+                            for e in self.estimations],
+        }
+
+
+class KeywordsCache:
+    DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+    def __init__(self, cache_path: str, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def is_fresh(self):
+        if not os.path.exists(self.cache_path):
+            return False
+        return time.time() - os.path.getmtime(self.cache_path) < self.ttl_seconds
+
+    def load(self, fetch_keywords) -> List[Dict]:
+        if self.is_fresh:
+            try:
+                with open(self.cache_path, 'r') as fin:
+                    keywords = json.load(fin)
+                logger.debug(f'{len(keywords)} keywords loaded from cache "{self.cache_path}"')
+                return keywords
+            except (OSError, ValueError) as e:
+                logger.warning(f'Failed to read keywords cache "{self.cache_path}", fetching keywords again: {e}')
+        keywords = fetch_keywords()
+        self.save(keywords)
+        return keywords
+
+    def save(self, keywords: List[Dict]):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f'{self.cache_path}.tmp'
+        with open(tmp_path, 'w') as fout:
+            json.dump(keywords, fout)
+        os.replace(tmp_path, self.cache_path)
+        logger.debug(f'{len(keywords)} keywords saved to cache "{self.cache_path}"')
+
+    def invalidate(self):
+        if os.path.exists(self.cache_path):
+            os.remove(self.cache_path)
+
+
+class AhoCorasickAutomaton:
+
+    def __init__(self):
+        self._transitions: List[Dict[str, int]] = [{}]
+        self._fail_links: List[int] = [0]
+        self._outputs: List[List] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, value):
+        if not pattern:
+            raise Exception('Empty pattern could not be added to automaton')
+        state = 0
+        for char in pattern:
+            next_state = self._transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self._transitions)
+                self._transitions[state][char] = next_state
+                self._transitions.append({})
+                self._fail_links.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append((len(pattern), value))
+        self._built = False
+
+    def build(self):
+        queue = list(self._transitions[0].values())
+        for state in queue:
+            self._fail_links[state] = 0
+        queue_index = 0
+        while queue_index < len(queue):
+            state = queue[queue_index]
+            queue_index += 1
+            for char, next_state in self._transitions[state].items():
+                queue.append(next_state)
+                fail_state = self._fail_links[state]
+                while fail_state and char not in self._transitions[fail_state]:
+                    fail_state = self._fail_links[fail_state]
+                self._fail_links[next_state] = self._transitions[fail_state].get(char, 0)
+                if self._fail_links[next_state] == next_state:
+                    self._fail_links[next_state] = 0
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail_links[next_state]]
+        self._built = True
+
+    def iterate_matches(self, text: str):
+        # Yields (start index, end index, value) for every pattern occurrence in one pass over text
+        if not self._built:
+            self.build()
+        transitions = self._transitions
+        fail_links = self._fail_links
+        outputs = self._outputs
+        state = 0
+        for char_i, char in enumerate(text):
+            while state and char not in transitions[state]:
+                state = fail_links[state]
+            state = transitions[state].get(char, 0)
+            for pattern_length, value in outputs[state]:
+                yield char_i + 1 - pattern_length, char_i + 1, value
+
+
+class TitleContentTypeClassifier:
+    # Rules are checked by priority, lower value wins, same order as it was with sequential checks
+    SD_TIMES_PRIORITY = 1
+    WEEKLY_OSM_PRIORITY = 2
+    DEF_CON_PRIORITY = 3
+    RELEASES_KEYWORDS_PRIORITY = 4
+    ARTICLES_KEYWORDS_PRIORITY = 5
+    FNGS_KEYWORDS_PRIORITY = 6
+
+    DEF_CON_REGEXP = re.compile(r'DEF CON \d+ Cloud Village')
+    VERSION_SUFFIX_REGEXP = re.compile(r',?\s+v?\.?\d', re.IGNORECASE)
+
+    class MatchCheck(Enum):
+        NONE = 'none'
+        CASE_SENSITIVE = 'case_sensitive'
+        DEF_CON = 'def_con'
+        VERSION_SUFFIX = 'version_suffix'
+
+    def __init__(self, keywords: List[Dict] = None):
+        self._automaton = AhoCorasickAutomaton()
+        self._add('SD Times Open-Source Project of the Week', self.SD_TIMES_PRIORITY,
+                  DigestRecordContentType.OTHER, self.MatchCheck.CASE_SENSITIVE)
+        self._add('weeklyOSM', self.WEEKLY_OSM_PRIORITY,
+                  DigestRecordContentType.NEWS, self.MatchCheck.CASE_SENSITIVE)
+        self._add('DEF CON ', self.DEF_CON_PRIORITY,
+                  DigestRecordContentType.VIDEOS, self.MatchCheck.DEF_CON)
+        for release_keyword in RELEASES_KEYWORDS:
+            self._add(release_keyword, self.RELEASES_KEYWORDS_PRIORITY,
+                      DigestRecordContentType.RELEASES, self.MatchCheck.NONE)
+        for article_keyword in ARTICLES_KEYWORDS:
+            self._add(article_keyword, self.ARTICLES_KEYWORDS_PRIORITY,
+                      DigestRecordContentType.ARTICLES, self.MatchCheck.NONE)
+        for keyword_data in keywords or []:
+            if not keyword_data['is_generic']:
+                self._add(keyword_data['name'], self.FNGS_KEYWORDS_PRIORITY,
+                          DigestRecordContentType.RELEASES, self.MatchCheck.VERSION_SUFFIX)
+        self._automaton.build()
+
+    def _add(self, pattern: str, priority: int, content_type: DigestRecordContentType, match_check: MatchCheck):
+        if pattern:
+            self._automaton.add(pattern.lower(), (priority, content_type, match_check, pattern))
+
+    def classify(self, title: str, url: str) -> DigestRecordContentType:
+        if 'https://www.youtube.com' in url:
+            return DigestRecordContentType.VIDEOS
+        title_lower = title.lower()
+        best_priority = None
+        best_content_type = None
+        for _, end, (priority, content_type, match_check, pattern) in self._automaton.iterate_matches(title_lower):
+            if best_priority is not None and priority >= best_priority:
+                continue
+            if match_check == self.MatchCheck.CASE_SENSITIVE and pattern not in title:
+                continue
+            if match_check == self.MatchCheck.DEF_CON and not self.DEF_CON_REGEXP.search(title):
+                continue
+            if match_check == self.MatchCheck.VERSION_SUFFIX and not self.VERSION_SUFFIX_REGEXP.match(title_lower, end):
+                continue
+            best_priority = priority
+            best_content_type = content_type
+        return best_content_type
+
+
+class ContentCategoryGuesser:
+    # Offline replacement of FNGS "/content-category/guess/" endpoint, returns "matches" in the same format, i.e. content
+    # category name to list of matched keywords names
+
+    def __init__(self, keywords: List[Dict], ttl_seconds: int = KeywordsCache.DEFAULT_TTL_SECONDS):
+        self._automaton = AhoCorasickAutomaton()
+        self._keywords_count = 0
+        for keyword_data in keywords:
+            content_category_name = keyword_data.get('content_category')
+            if not content_category_name or not keyword_data['name']:
+                continue
+            self._automaton.add(keyword_data['name'].lower(), (keyword_data['name'], content_category_name))
+            self._keywords_count += 1
+        self._automaton.build()
+        self._build_time = time.time()
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def is_available(self):
+        # Old FNGS versions do not return keywords content categories
+        return self._keywords_count > 0
+
+    @property
+    def is_stale(self):
+        return time.time() - self._build_time >= self.ttl_seconds
+
+    def guess(self, title: str) -> Dict[str, List[str]]:
+        title_lower = title.lower()
+        matches = {}
+        for start, end, (keyword_name, content_category_name) in self._automaton.iterate_matches(title_lower):
+            if start > 0 and self._is_word_char(title_lower[start - 1]):
+                continue
+            if end < len(title_lower) and self._is_word_char(title_lower[end]):
+                continue
+            matched_keywords = matches.setdefault(content_category_name, [])
+            if keyword_name not in matched_keywords:
+                matched_keywords.append(keyword_name)
+        return matches
+
+    @staticmethod
+    def _is_word_char(char: str):
+        return char.isalnum() or char == '_'
+
+    def compare_with_recorded(self, recorded_matches: Dict[str, Dict[str, List[str]]]) -> List[Dict]:
+        mismatches = []
+        for title, server_matches in recorded_matches.items():
+            local_matches = self.guess(title)
+            server_matches_sets = {k: set(v) for k, v in server_matches.items() if k and k != 'null'}
+            local_matches_sets = {k: set(v) for k, v in local_matches.items()}
+            if server_matches_sets != local_matches_sets:
+                mismatches.append({'title': title, 'server': server_matches, 'local': local_matches})
+        return mismatches
+
+
+# Telegram bot user whose estimations are taken as approved ones, FNGS has no API to get admins so it is used unless
+# "tbot_admin_username" is set in FNGS config
+TBOT_ADMIN_USERNAME = 'gim6626'
+
+
+def admins_estimation(estimations: List[Dict], admin_username: str = TBOT_ADMIN_USERNAME):
+    # TODO: Support multiple admins estimations
+    for estimation in estimations:
+        if estimation['user'] == admin_username:
+            return estimation
+    return None
+
+
+class TbotEstimationsAggregation:
+
+    def __init__(self):
+        self.records_by_drid: Dict[int, DigestRecord] = {}
+        self.records_by_url: Dict[str, DigestRecord] = {}
+        self.tallies: Dict[int, Dict] = {}
+        self.ignore_candidates: List[DigestRecord] = []
+        self.approve_candidates: List[DigestRecord] = []
+        self.is_main_candidates: List[DigestRecord] = []
+        self.content_type_candidates: List[DigestRecord] = []
+        self.content_category_candidates: List[DigestRecord] = []
+
+
+def aggregate_tbot_estimations(records, admin_username: str = TBOT_ADMIN_USERNAME) -> TbotEstimationsAggregation:
+    # Every record estimations are scanned once, votes are counted by state, is_main, content type and category
+    aggregation = TbotEstimationsAggregation()
+    is_main_candidates_urls = set()
+    for record in records:
+        aggregation.records_by_drid[record.drid] = record
+        aggregation.records_by_url.setdefault(canonical_url(record.url), record)
+        if not record.estimations:
+            continue
+        tally = {
+            'state': Counter(),
+            'is_main': Counter(),
+            'content_type': Counter(),
+            'content_category': Counter(),
+            'admin_estimation': None,
+            'admin_states': set(),
+        }
+        for estimation in record.estimations:
+            tally['state'][estimation['state']] += 1
+            for key in ('is_main', 'content_type', 'content_category'):
+                if estimation.get(key) is not None:
+                    tally[key][estimation[key]] += 1
+            if estimation['user'] == admin_username:
+                tally['admin_states'].add(estimation['state'])
+                if tally['admin_estimation'] is None:
+                    tally['admin_estimation'] = estimation
+        aggregation.tallies[record.drid] = tally
+
+        admin_estimation = tally['admin_estimation']
+        if record.state == DigestRecordState.UNKNOWN:
+            total_state_votes_count = len(record.estimations)
+            for state, candidates in ((DigestRecordState.IGNORED, aggregation.ignore_candidates),
+                                      (DigestRecordState.IN_DIGEST, aggregation.approve_candidates)):
+                vote_by_admin = state in tally['admin_states']
+                if tally['state'][state] / total_state_votes_count > 0.5 and total_state_votes_count > 1 or vote_by_admin:
+                    candidates.append(record)
+        if admin_estimation is not None:
+            if record.is_main is None and tally['is_main'] and canonical_url(record.url) not in is_main_candidates_urls:
+                is_main_candidates_urls.add(canonical_url(record.url))
+                aggregation.is_main_candidates.append(record)
+            if record.content_type is None and tally['content_type']:
+                aggregation.content_type_candidates.append(record)
+            if record.content_category is None and tally['content_category']:
+                aggregation.content_category_candidates.append(record)
+    return aggregation
+
+
+class DigestRecordsUploadQueue:
+    # Write-behind queue for digest records fields updates, all updates of the same record are coalesced into one PATCH,
+    # not uploaded updates are kept in journal file to survive crash. Updates rejected by FNGS (e.g. for deleted record)
+    # would be rejected again on every retry, so they are moved to separate rejected updates file instead of journal
+    DEFAULT_WORKERS_COUNT = 8
+    # Request timeout, conflict and rate limit are transient, other client errors are not fixed by retrying
+    TRANSIENT_CLIENT_ERRORS_STATUS_CODES = (408, 409, 425, 429)
+
+    def __init__(self, patch_record_fields, journal_path: str, workers_count: int = DEFAULT_WORKERS_COUNT,
+                 patch_records_fields_async=None):
+        # Function sending PATCH for (drid, fields) and returning response
+        self._patch_record_fields = patch_record_fields
+        # Optional coroutine function sending PATCH for (drid, fields) pairs with limited concurrency and returning
+        # list of responses or exceptions
+        self._patch_records_fields_async = patch_records_fields_async
+        self.journal_path = journal_path
+        self.rejected_path = f'{os.path.splitext(journal_path)[0]}-rejected.jsonl'
+        self.workers_count = workers_count
+        self._pending: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+        self._load_journal()
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def _load_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'r') as fin:
+            for line in fin:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f'Skipping broken line in upload journal "{self.journal_path}"')
+                    continue
+                self._pending.setdefault(entry['drid'], {}).update(entry['fields'])
+        if self._pending:
+            logger.info(f'{len(self._pending)} not uploaded record(s) loaded from journal "{self.journal_path}"')
+
+    def enqueue(self, record, additional_fields_keys=None):
+        fields = DigestRecordsCollection._record_upload_fields(record, additional_fields_keys)
+        with self._lock:
+            self._pending.setdefault(record.drid, {}).update(fields)
+            os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+            with open(self.journal_path, 'a') as fout:
+                fout.write(json.dumps({'drid': record.drid, 'fields': fields}) + '\n')
+                fout.flush()
+                os.fsync(fout.fileno())
+
+    def flush(self):
+        # Returns count of records which failed with transient errors, they are kept in journal for next flush
+        with self._lock:
+            pending = [(drid, dict(fields)) for drid, fields in self._pending.items()]
+        if not pending:
+            return 0
+        logger.info(f'Uploading {len(pending)} record(s) to FNGS')
+        if self._patch_records_fields_async is not None:
+            results = asyncio.run(self._patch_records_fields_async(pending, self.workers_count))
+        else:
+            with ThreadPool(min(self.workers_count, len(pending))) as threads_pool:
+                results = threads_pool.map(self._patch_one, pending)
+        transient_failures = []
+        rejected = []
+        with self._lock:
+            for (drid, fields), result in zip(pending, results):
+                status_code, error = self._status_code_and_error(result)
+                if error is None or self._is_permanent_failure(status_code):
+                    if error is not None:
+                        rejected.append({'drid': drid, 'fields': fields, 'status_code': status_code, 'error': error})
+                    if self._pending.get(drid) == fields:
+                        del self._pending[drid]
+                else:
+                    transient_failures.append((drid, error))
+            if rejected:
+                self._append_rejected(rejected)
+            self._rewrite_journal()
+        logger.info(f'Uploaded {len(pending) - len(transient_failures) - len(rejected)} record(s) to FNGS')
+        if rejected:
+            rejected_str = '\n'.join(f'#{entry["drid"]}: {entry["error"]}' for entry in rejected)
+            logger.error(f'FNGS rejected {len(rejected)} record(s) update(s), they are moved to "{self.rejected_path}" and will not be retried:\n{rejected_str}')
+        if transient_failures:
+            failures_str = '\n'.join(f'#{drid}: {error}' for drid, error in transient_failures)
+            logger.error(f'Failed to upload {len(transient_failures)} record(s), they are kept in journal "{self.journal_path}" for next upload:\n{failures_str}')
+        return len(transient_failures)
+
+    def _patch_one(self, drid_and_fields):
+        drid, fields = drid_and_fields
+        try:
+            return self._patch_record_fields(drid, fields)
+        except Exception as e:
+            return e
+
+    @staticmethod
+    def _status_code_and_error(result):
+        if isinstance(result, BaseException):
+            return None, str(result) or type(result).__name__
+        if result.status_code == 200:
+            return result.status_code, None
+        return result.status_code, f'Invalid response code from FNGS patch - {result.status_code}: {result.content.decode("utf-8")}'
+
+    def _is_permanent_failure(self, status_code):
+        return status_code is not None and 400 <= status_code < 500 and status_code not in self.TRANSIENT_CLIENT_ERRORS_STATUS_CODES
+
+    def _append_rejected(self, rejected):
+        with open(self.rejected_path, 'a') as fout:
+            for entry in rejected:
+                fout.write(json.dumps(entry) + '\n')
+            fout.flush()
+            os.fsync(fout.fileno())
+
+    def _rewrite_journal(self):
+        if not self._pending:
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            return
+        tmp_path = f'{self.journal_path}.tmp'
+        with open(tmp_path, 'w') as fout:
+            for drid, fields in self._pending.items():
+                fout.write(json.dumps({'drid': drid, 'fields': fields}) + '\n')
+            fout.flush()
+            os.fsync(fout.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+
+class InteractiveCategorizationPrefetcher:
+    # Loads next records, checks that they are still not categorized and computes data shown to operator for them in
+    # background threads while operator answers questions about current one, so prompts do not wait for network round trips
+    DEFAULT_DEPTH = 3
+    DEFAULT_WORKERS_COUNT = 4
+
+    def __init__(self, records_collection, depth: int = DEFAULT_DEPTH, workers_count: int = DEFAULT_WORKERS_COUNT):
+        self._records_collection = records_collection
+        self.depth = depth
+        self._threads_pool = ThreadPool(workers_count)
+        self._prefetched: Dict[int, Dict] = {}
+        self._non_categorized_digest_records_count = None
+        self._next_records_batch_result = None
+
+    def close(self):
+        self._threads_pool.terminate()
+        self._prefetched = {}
+        self._next_records_batch_result = None
+
+    def request_next_records_batch(self):
+        # Should be called only when all records of current batch are uploaded, otherwise server still returns them
+        self._next_records_batch_result = self._threads_pool.apply_async(self._records_collection._next_records_batch)
+
+    def next_records_batch(self):
+        # Returns records and whether they are from Telegram bot
+        if self._next_records_batch_result is None:
+            self.request_next_records_batch()
+        records_batch_result = self._next_records_batch_result
+        self._next_records_batch_result = None
+        return records_batch_result.get()
+
+    def prefetch(self, records: List[DigestRecord]):
+        for record in records[:self.depth]:
+            if record.drid in self._prefetched:
+                continue
+            self._prefetched[record.drid] = {
+                'still_not_categorized': self._threads_pool.apply_async(self._records_collection._is_still_not_categorized, (record.drid,))
+                                         if record.state == DigestRecordState.UNKNOWN
+                                         else None,
+                'similar_from_previous_digest': self._threads_pool.apply_async(self._records_collection._similar_from_previous_digest,
+                                                                               (record.keywords,))
+                                                if record.state == DigestRecordState.UNKNOWN
+                                                else None,
+                'guesses': self._threads_pool.apply_async(self._guesses, (record,)),
+            }
+
+    def _guesses(self, record: DigestRecord):
+        collection = self._records_collection
+        guesses = {
+            'content_type': collection._guess_content_type(record.title, record.url),
+            'content_category': collection._guess_content_category(record.title, record.url),
+            'similar_digest_records': None,
+        }
+        # Speculatively load similar records for guessed content type and category, they are used only if operator
+        # accepts guesses
+        if guesses['content_type'] is not None and guesses['content_category'] is not None:
+            guessed_content_categories, _ = guesses['content_category']
+            if len(guessed_content_categories) == 1:
+                digest_issue = record.digest_issue if record.digest_issue is not None else collection._current_digest_issue
+                key = (digest_issue, guesses['content_type'], guessed_content_categories[0])
+                try:
+                    guesses['similar_digest_records'] = (key, collection._similar_digest_records(*key))
+                except Exception as e:
+                    logger.debug(f'Failed to prefetch similar digest records for record #{record.drid}: {e}')
+        return guesses
+
+    def is_still_not_categorized(self, record: DigestRecord):
+        if record.state != DigestRecordState.UNKNOWN:
+            return True
+        prefetched = self._prefetched.get(record.drid)
+        if prefetched is not None and prefetched['still_not_categorized'] is not None:
+            return prefetched['still_not_categorized'].get()
+        return self._records_collection._is_still_not_categorized(record.drid)
+
+    def similar_from_previous_digest(self, record: DigestRecord):
+        prefetched = self._prefetched.get(record.drid)
+        if prefetched is not None and prefetched['similar_from_previous_digest'] is not None:
+            return prefetched['similar_from_previous_digest'].get()
+        return self._records_collection._similar_from_previous_digest(record.keywords)
+
+    def guessed_content_type(self, record: DigestRecord):
+        prefetched = self._prefetched.get(record.drid)
+        if prefetched is not None:
+            return prefetched['guesses'].get()['content_type']
+        return self._records_collection._guess_content_type(record.title, record.url)
+
+    def guessed_content_category(self, record: DigestRecord):
+        prefetched = self._prefetched.get(record.drid)
+        if prefetched is not None:
+            return prefetched['guesses'].get()['content_category']
+        return self._records_collection._guess_content_category(record.title, record.url)
+
+    def similar_digest_records(self, record: DigestRecord, digest_issue, content_type, content_category):
+        prefetched = self._prefetched.get(record.drid)
+        key = (digest_issue, content_type, content_category)
+        if prefetched is not None:
+            speculatively_loaded = prefetched['guesses'].get()['similar_digest_records']
+            if speculatively_loaded is not None and speculatively_loaded[0] == key:
+                return speculatively_loaded[1]
+        return self._records_collection._similar_digest_records(*key)
+
+    def forget(self, record: DigestRecord):
+        self._prefetched.pop(record.drid, None)
+
+    def request_non_categorized_digest_records_count(self):
+        self._non_categorized_digest_records_count = self._threads_pool.apply_async(self._records_collection._non_categorized_digest_records_count)
+
+    def non_categorized_digest_records_count(self):
+        if self._non_categorized_digest_records_count is None:
+            self.request_non_categorized_digest_records_count()
+        return self._non_categorized_digest_records_count.get()
+
+
+# TODO: Refactor
+class DigestRecordsCollection(NetworkingMixin,
+                              ServerConnectionMixin):
+
+    def __init__(self,
+                 config_path: str,
+                 records: List[DigestRecord] = None,
+                 bot_only: bool = True):
+        self._config_path = config_path
+        self.records = records if records is not None else []
+        self.similar_records = []
+        self._bot_only = bot_only
+        self._token = None
+        self._current_digest_issue = None
+        self._keywords_data = None
+        self._title_content_type_classifier = None
+        self._content_category_guesser = None
+        self._content_category_guesser_lock = threading.Lock()
+        self._prefetcher = None
+        self._records_upload_queue = None
+
+    def __str__(self):
+        return pformat([record.to_dict() for record in self.records])
+
+    def save_to_yaml(self, yaml_path: str):
+        records_plain = []
+        for record_object in self.records:
+            record_plain = {
+                'datetime': record_object.dt.strftime(DIGEST_RECORD_DATETIME_FORMAT)
+                            if record_object.dt is not None
+                            else None,
+                'title': record_object.title,
+                'url': record_object.url,
+                'state': record_object.state.value if record_object.state is not None else None,
+                'is_main': record_object.is_main,
+                'digest_issue': record_object.digest_issue,
+                'content_type': record_object.content_type.value if record_object.content_type is not None else None,
+                'content_category': record_object.content_category.value if record_object.content_category is not None else None,
+            }
+            records_plain.append(record_plain)
+        import yaml
+        with open(yaml_path, 'w') as fout:
+            logger.info(f'Saving results to "{yaml_path}"')
+            yaml.safe_dump(records_plain, fout)
+
+    def load_specific_digest_records_from_server(self,
+                                                 digest_issue: int,
+                                                 lazy: bool = False):
+        self._load_config(self._config_path)
+        self._login()
+        self._load_similar_records_for_specific_digest(digest_issue)
+        self._basic_load_digest_records_from_server(self._digest_records_url(digest_issue), lazy=lazy)
+
+    def load_specific_digest_records_from_mirror(self,
+                                                 digest_issue: int,
+                                                 mirror_path: str = None):
+        from fntools.mirror import DigestDataMirror
+        with DigestDataMirror(self._config_path, mirror_path) as mirror:
+            if not mirror.has_digest_issue(digest_issue):
+                raise Exception(f'Digest number #{digest_issue} not found in mirror "{mirror.db_path}", sync it first')
+            logger.info(f'Loading digest records for digest number #{digest_issue} from mirror "{mirror.db_path}"')
+            self.similar_records += self._similar_records_from_plain(mirror.similar_records(digest_issue))
+            self.records = [self._digest_record_from_plain(record_plain)
+                            for record_plain in mirror.digest_records(digest_issue)]
+
+    @property
+    def _unsorted_digest_record_endpoint(self):
+        base_url = f'{self.gatherer_api_url}/digest-record/not-categorized/oldest/?project=FOSS News'
+        if self._bot_only:
+            return f'{base_url}&from-bot=true'
+        else:
+            return f'{base_url}&from-bot=false'
+
+    @property
+    def _unsorted_digest_records_count_endpoint(self):
+        base_url = f'{self.gatherer_api_url}/digest-record/not-categorized/count/?project=FOSS News'
+        if self._bot_only:
+            return f'{base_url}&from-bot=true'
+        else:
+            return f'{base_url}&from-bot=false'
+
+    def _next_records_batch(self):
+        tbot_records = self._tbot_categorization_records()
+        if tbot_records:
+            return tbot_records, True
+        return self._new_digest_records_from_server(), False
+
+    def _new_digest_records_from_server(self) -> List[DigestRecord]:
+        logger.info('Getting digest records')
+        return [self._digest_record_from_plain(record_plain)
+                for record_plain in self.get_results_from_all_pages(self._unsorted_digest_record_endpoint, self._auth_headers)]
+
+    def _tbot_categorization_records(self) -> List[DigestRecord]:
+        records = []
+        logger.info('Loading TBot categorization data')
+        url = f'{self.tbot_api_url}/digest-record/categorized/'
+        response = self.get_with_retries(url, headers=self._auth_headers)
+        if response.status_code != 200:
+            raise Exception(f'Failed to retrieve similar digest records, status code {response.status_code}, response: {response.content}')
+        response_str = response.content.decode()
+        response_data = json.loads(response_str)
+        for digest_record_id, digest_record_data_and_estimations in response_data.items():
+            digest_record_data = digest_record_data_and_estimations['record']
+            estimations = digest_record_data_and_estimations['estimations']
+            if digest_record_data['dt'] is not None:
+                dt_str = datetime.datetime.strptime(digest_record_data['dt'],
+                                                    FNGS_DATETIME_FORMAT)
+            else:
+                dt_str = None
+            record_object = DigestRecord(dt_str,
+                                         digest_record_data['source'],
+                                         digest_record_data['title'],
+                                         digest_record_data['url'],
+                                         digest_record_data['additional_url'],
+                                         state=digest_record_state_from_fngs(digest_record_data['state']),
+                                         content_type=digest_record_content_type_from_fngs(digest_record_data['content_type']),
+                                         content_category=digest_record_content_category_from_fngs(digest_record_data['content_category']),
+                                         digest_issue=digest_record_data['digest_issue'],
+                                         drid=digest_record_id,
+                                         language=digest_record_data['language'],
+                                         is_main=digest_record_data['is_main'],
+                                         keywords=digest_record_data['title_keywords'],
+                                         estimations=[{'user': e['user'],
+                                                       'state': digest_record_state_from_fngs(e['state']),
+                                                       'is_main': e['is_main'],
+                                                       'content_type': digest_record_content_type_from_fngs(e['content_type']),
+                                                       'content_category': digest_record_content_category_from_fngs(e['content_category'])}
+                                                      for e in estimations])
+            records.append(record_object)
+        return records
+
+
+    def _load_similar_records_for_specific_digest(self,
+                                                  digest_issue: int):
+        logger.info(f'Getting similar digest records for digest number #{digest_issue}')
+        results = self.get_results_from_all_pages(self._similar_records_url(digest_issue), self._auth_headers)
+        self.similar_records += self._similar_records_from_plain(results)
+
+    def _similar_records_url(self, digest_issue: int):
+        return f'{self.gatherer_api_url}/similar-digest-record/detailed/?digest_issue={digest_issue}'
+
+    def _digest_records_url(self, digest_issue: int):
+        return f'{self.gatherer_api_url}/digest-record/detailed/?digest_issue={digest_issue}'
+
+    @staticmethod
+    def _similar_records_from_plain(results: List[Dict]) -> List[Dict]:
+        response_converted = []
+        for similar_records_item in results:
+            similar_records_item_converted = {}
+            for key in ('id', 'digest_issue'):
+                similar_records_item_converted[key] = similar_records_item[key]
+            if not similar_records_item['digest_records']:
+                logger.warning(f'Empty digest records list in similar records #{similar_records_item["id"]}')
+                continue
+            similar_records_item_converted['digest_records'] = []
+            for record in similar_records_item['digest_records']:
+                if record['dt'] is not None:
+                    dt_str = datetime.datetime.strptime(record['dt'],
+                                                        FNGS_DATETIME_FORMAT)
+                else:
+                    dt_str = None
+                record_obj = DigestRecord(dt_str,
+                                          None,
+                                          record['title'],
+                                          record['url'],
+                                          record['additional_url'],
+                                          digest_issue=record['digest_issue'],
+                                          drid=record['id'],
+                                          is_main=record['is_main'],
+                                          keywords=record['title_keywords'],
+                                          language=record['language'])
+                record_obj.state = digest_record_state_from_fngs(record.get('state'))
+                record_obj.content_type = digest_record_content_type_from_fngs(record.get('content_type'))
+                record_obj.content_category = digest_record_content_category_from_fngs(record.get('content_category'))
+                similar_records_item_converted['digest_records'].append(record_obj)
+            response_converted.append(similar_records_item_converted)
+        return response_converted
+
+    def load_specific_digest_records_from_server_async(self, digest_issue: int):
+        asyncio.run(self._load_specific_digest_records_async(digest_issue))
+
+    async def _load_specific_digest_records_async(self, digest_issue: int):
+        self._load_config(self._config_path)
+        async with AsyncNetworkingClient() as client:
+            await self._login_async(client)
+            self.records, similar_records = await self._load_digest_issue_async(client, digest_issue)
+        self.similar_records += similar_records
+
+    def load_digest_issues_from_server_async(self, digest_issues: List[int]) -> Dict[int, 'DigestRecordsCollection']:
+        # All issues are fetched concurrently using one login
+        return asyncio.run(self._load_digest_issues_async(digest_issues))
+
+    async def _load_digest_issues_async(self, digest_issues: List[int]):
+        self._load_config(self._config_path)
+        async with AsyncNetworkingClient() as client:
+            await self._login_async(client)
+            issues_data = await asyncio.gather(*[self._load_digest_issue_async(client, digest_issue)
+                                                 for digest_issue in digest_issues])
+        return {digest_issue: self._digest_issue_collection(records, similar_records)
+                for digest_issue, (records, similar_records) in zip(digest_issues, issues_data)}
+
+    async def _load_digest_issue_async(self, client: AsyncNetworkingClient, digest_issue: int):
+        logger.info(f'Getting similar digest records and digest records for digest number #{digest_issue}')
+        similar_records_results, records_results = await asyncio.gather(
+            client.get_results_from_all_pages(self._similar_records_url(digest_issue), self._auth_headers),
+            client.get_results_from_all_pages(self._digest_records_url(digest_issue), self._auth_headers))
+        return ([self._digest_record_from_plain(record_plain) for record_plain in records_results],
+                self._similar_records_from_plain(similar_records_results))
+
+    def load_digest_issues_from_mirror(self, digest_issues: List[int], mirror_path: str = None) -> Dict[int, 'DigestRecordsCollection']:
+        digest_issues_collections = {}
+        for digest_issue in digest_issues:
+            collection = self._digest_issue_collection([], [])
+            collection.load_specific_digest_records_from_mirror(digest_issue, mirror_path)
+            digest_issues_collections[digest_issue] = collection
+        return digest_issues_collections
+
+    def _digest_issue_collection(self, records: List[DigestRecord], similar_records: List[Dict]):
+        collection = DigestRecordsCollection(self._config_path, records=records, bot_only=self._bot_only)
+        collection.similar_records = similar_records
+        return collection
+
+
+    def _basic_load_digest_records_from_server(self, url: str, lazy: bool = False):
+        if lazy:
+            # Records are fetched and converted page by page while consumer iterates over them, so they could be
+            # iterated only once
+            self.records = self._iterate_digest_records_from_server(url)
+        else:
+            # All pages are needed at once anyway, so they are fetched concurrently
+            logger.info('Getting digest records')
+            self.records = [self._digest_record_from_plain(record_plain)
+                            for record_plain in self.get_results_from_all_pages(url, self._auth_headers)]
+
+    def _iterate_digest_records_from_server(self, url: str):
+        logger.info('Getting digest records')
+        for record_plain in self.iterate_results_from_all_pages(url, self._auth_headers):
+            yield self._digest_record_from_plain(record_plain)
+
+    @staticmethod
+    def _digest_record_from_plain(record_plain: Dict) -> DigestRecord:
+        if record_plain['dt'] is not None:
+            dt_str = datetime.datetime.strptime(record_plain['dt'],
+                                                FNGS_DATETIME_FORMAT)
+        else:
+            dt_str = None
+        record_object = DigestRecord(dt_str,
+                                     None,
+                                     record_plain['title'],
+                                     record_plain['url'],
+                                     record_plain['additional_url'],
+                                     digest_issue=record_plain['digest_issue'],
+                                     drid=record_plain['id'],
+                                     is_main=record_plain['is_main'],
+                                     keywords=record_plain['title_keywords'],
+                                     language=record_plain['language'],
+                                     estimations=[{'user': e['telegram_bot_user']['username'],
+                                                   'state': digest_record_state_from_fngs(e['estimated_state'])}
+                                                  for e in record_plain['tbot_estimations']])
+        record_object.state = digest_record_state_from_fngs(record_plain.get('state'))
+        record_object.content_type = digest_record_content_type_from_fngs(record_plain.get('content_type'))
+        record_object.content_category = digest_record_content_category_from_fngs(record_plain.get('content_category'))
+        return record_object
+
+    @staticmethod
+    def clear_title(title: str):
+        fixed_title = html.unescape(title)
+        return fixed_title
+
+    @staticmethod
+    def build_url_html(url: str, lang: Language, do_not_mark_language: bool = False, link_text: str = None, needs_attention: bool = False):
+        if not isinstance(lang, Language):
+            raise Exception('"lang" variable should be instance of "Language" class')
+        url = canonical_url(url)
+        return f'{"!!! " if needs_attention else ""}<a href="{url}">{link_text if link_text is not None else url}</a>{" (en)" if lang == Language.ENGLISH and not do_not_mark_language else ""}'
+
+    def records_to_html(self, format_name, html_path):
+        from fntools.converters import html_converter_class
+        converter = html_converter_class(format_name)(self.records, self.similar_records)
+        converter.convert(html_path)
+
+    def _guess_content_type(self, title: str, url: str) -> DigestRecordContentType:
+        if self._title_content_type_classifier is None:
+            self._title_content_type_classifier = TitleContentTypeClassifier(self._keywords())
+        return self._title_content_type_classifier.classify(title, url)
+
+    def _keywords(self):
+        if self._keywords_data is None:
+            self._keywords_data = self._keywords_cache.load(self._fetch_keywords)
+        return self._keywords_data
+
+    def _fetch_keywords(self):
+        url = f'{self.gatherer_api_url}/keyword?page_size=5000'
+        results = self.get_results_from_all_pages(url, self._auth_headers)
+        return results
+
+    @property
+    def _keywords_cache(self):
+        return KeywordsCache(os.path.join(CACHE_DIRECTORY, f'keywords-{self._host}-{self._port}.json'))
+
+    def _similar_from_previous_digest(self, keywords: List[Dict]):
+        if not keywords:
+            logger.debug('Could not search for similar records from previous digest cause keywords list is empty')
+            return None
+        url = f'{self.gatherer_api_url}/digest-issue/{self._current_digest_issue}/previous/similar-records/?keywords={",".join([k["name"] for k in keywords])}'
+        response = self.get_with_retries(url, self._auth_headers)
+        if response.status_code != 200:
+            logger.error(f'Failed to retrieve guessed subcategories, status code {response.status_code}, response: {response.content}')
+            raise Exception('Failed to retrieve guessed subcategories')
+        response_str = response.content.decode()
+        return json.loads(response_str)
+
+    def _show_similar_from_previous_digest(self, similar_records_in_previous_digest):
+        if similar_records_in_previous_digest:
+            print(f'Similar records in previous digest:')
+            for record in similar_records_in_previous_digest:
+                is_main_ru = "главная" if record["is_main"] else "не главная"
+                if record["content_type"]:
+                    content_type_ru = DIGEST_RECORD_CONTENT_TYPE_RU_MAPPING[DigestRecordContentType.from_name(record["content_type"]).value].lower()
+                else:
+                    content_type_ru = None
+                if record["content_category"]:
+                    content_category_ru = DIGEST_RECORD_CONTENT_CATEGORY_RU_MAPPING[DigestRecordContentCategory.from_name(record["content_category"]).value].lower()
+                else:
+                    content_category_ru = None
+                print(f'- {record["title"]} ({is_main_ru}, {content_type_ru}, {content_category_ru}) - {record["url"]}')
+
+    def _guess_content_category(self, record_title: str, record_url: str) -> (List[DigestRecordContentCategory], Dict):
+        if 'weeklyOSM' in record_title:
+            return [DigestRecordContentCategory.ORG], {}
+        if re.search(r'DEF CON \d+ Cloud Village', record_title):
+            return [DigestRecordContentCategory.SECURITY], {}
+
+        matches = self._content_category_matches(record_title)
+        if matches is None:
+            # TODO: Raise exception and handle above
+            return None
+
+        guessed_content_categories: List[DigestRecordContentCategory] = []
+        matched_subcategories_keywords = {}
+
+        for guessed_content_category_name, matched_keywords in matches.items():
+            if not guessed_content_category_name or guessed_content_category_name == 'null':
+                continue
+            subcategory = DigestRecordContentCategory(guessed_content_category_name.lower()
+                                                      if guessed_content_category_name != 'DATABASES'
+                                                      else 'db')
+            guessed_content_categories.append(subcategory)
+            matched_subcategories_keywords[guessed_content_category_name.lower()] = matched_keywords
+
+        diy_category = DigestRecordContentCategory('diy')
+        if 'https://hackaday.com' in record_url and diy_category not in guessed_content_categories:
+            guessed_content_categories.append(diy_category)
+
+        return guessed_content_categories, matched_subcategories_keywords
+
+    def _content_category_matches(self, record_title: str):
+        guesser = self._content_category_guesser
+        if guesser is None or guesser.is_stale:
+            with self._content_category_guesser_lock:
+                guesser = self._content_category_guesser
+                if guesser is None or guesser.is_stale:
+                    # Called from prefetching threads, so new keywords and guesser are built aside and then replaced
+                    # old ones, other threads keep using old ones meanwhile
+                    keywords_data = self._keywords_cache.load(self._fetch_keywords)
+                    guesser = ContentCategoryGuesser(keywords_data)
+                    self._keywords_data = keywords_data
+                    self._content_category_guesser = guesser
+        if guesser.is_available:
+            return guesser.guess(record_title)
+        logger.debug('Local content categories index is not available, asking FNGS')
+        return self._server_content_category_matches(record_title)
+
+    def _server_content_category_matches(self, record_title: str):
+        url = f'{self.gatherer_api_url}/content-category/guess/?{urlencode({"title": record_title})}'
+        response = self.get_with_retries(url, self._auth_headers)
+        if response.status_code != 200:
+            logger.error(f'Failed to retrieve guessed content categories, status code {response.status_code}, response: {response.content}')
+            return None
+        response_str = response.content.decode()
+        response = json.loads(response_str)
+        # TODO: Check title
+        return response['matches']
+
+    def record_server_content_category_matches(self, titles: List[str], output_path: str):
+        self._load_config(self._config_path)
+        self._login()
+        recorded_matches = {}
+        for title in titles:
+            recorded_matches[title] = self._server_content_category_matches(title)
+        with open(output_path, 'w') as fout:
+            logger.info(f'Saving {len(recorded_matches)} FNGS answer(s) to "{output_path}"')
+            json.dump(recorded_matches, fout, ensure_ascii=False, indent=2)
+
+    def compare_content_category_guesses(self, recorded_matches_path: str) -> List[Dict]:
+        self._load_config(self._config_path)
+        self._login()
+        with open(recorded_matches_path, 'r') as fin:
+            recorded_matches = json.load(fin)
+        guesser = ContentCategoryGuesser(self._keywords())
+        if not guesser.is_available:
+            raise Exception('FNGS keywords do not contain content categories, local guesser could not be used')
+        return guesser.compare_with_recorded(recorded_matches)
+
+    def categorize_interactively(self):
+        self._load_config(self._config_path)
+        self._login()
+        if self._upload_queue.pending_count:
+            # Records which still could not be uploaded are kept in journal, categorization is not blocked by them
+            logger.warning(f'Uploading {self._upload_queue.pending_count} record(s) left from previous interrupted session')
+            if self._upload_queue.flush():
+                logger.warning('Continuing categorization, not uploaded record(s) will be retried later')
+        # Warm up keywords cache before it is used from prefetching threads
+        self._keywords()
+        self._prefetcher = InteractiveCategorizationPrefetcher(self)
+        try:
+            self._categorize_interactively_loop()
+        finally:
+            self._prefetcher.close()
+            self._prefetcher = None
+            self._report_pending_uploads()
+
+    def _report_pending_uploads(self):
+        pending_count = self._upload_queue.pending_count
+        if pending_count:
+            logger.error(f'{pending_count} categorized record(s) are still not uploaded to FNGS, they are kept in journal '
+                         f'"{self._upload_queue.journal_path}" and will be uploaded on next categorizer start')
+
+    def _categorize_interactively_loop(self):
+        prefetcher = self._prefetcher
+        # Records are loaded while operator inputs digest number
+        prefetcher.request_non_categorized_digest_records_count()
+        prefetcher.request_next_records_batch()
+        while True:
+            if self._current_digest_issue is None:
+                self._current_digest_issue = self._ask_digest_issue()
+            print(f'Digest record(s) left to process: {prefetcher.non_categorized_digest_records_count()}')
+            self.records, from_tbot = prefetcher.next_records_batch()
+            if from_tbot:
+                # TODO: Think how to process left record in non-conflicting with Tbot usage way
+                self._process_estimations_from_tbot()
+                prefetcher.request_non_categorized_digest_records_count()
+            self._categorize_new_records()
+            if prefetcher.non_categorized_digest_records_count() == 0:
+                logger.info('No uncategorized digest records left')
+                break
+
+    def _non_categorized_digest_records_count(self):
+        response = self.get_with_retries(url=self._unsorted_digest_records_count_endpoint,
+                                         headers=self._auth_headers)
+        response_str = response.content.decode()
+        response_data = json.loads(response_str)
+        return response_data['count']
+
+    @property
+    def _admin_username(self):
+        return self._tbot_admin_username or TBOT_ADMIN_USERNAME
+
+    def _admins_estimation(self, estimations):
+        return admins_estimation(estimations, self._admin_username)
+
+    def _process_estimations_from_tbot(self):
+        # TODO: Refactor, split into steps and extract them into separate methods and extract common selection code
+        aggregation = aggregate_tbot_estimations(self.records, self._admin_username)
+        ignore_candidates_records = aggregation.ignore_candidates
+        approve_candidates_records = aggregation.approve_candidates
+        records_with_is_main_estimation = aggregation.is_main_candidates
+        records_with_content_type_estimation = aggregation.content_type_candidates
+        records_with_content_category_estimation = aggregation.content_category_candidates
+
+        records_left_from_tbot = []
+        if ignore_candidates_records:
+            print('Candidates to ignore:')
+            for ignore_candidate_record_i, ignore_candidate_record in enumerate(ignore_candidates_records):
+                print(f'{ignore_candidate_record_i + 1}. {ignore_candidate_record.title} {ignore_candidate_record.url}')
+            do_not_ignore_records_indexes = self._ask_all_or_skipped_indexes('Approve all records ignoring with typing "all" or comma-separated input records indexes which you want to left non-ignored: ')
+            records_to_ignore = [ignore_candidate_record
+                                 for ignore_candidate_record_i, ignore_candidate_record in enumerate(ignore_candidates_records)
+                                 if ignore_candidate_record_i not in do_not_ignore_records_indexes]
+            if records_to_ignore:
+                for record_to_ignore_i, record_to_ignore in enumerate(records_to_ignore):
+                    record_to_ignore.digest_issue = self._current_digest_issue
+                    record_to_ignore.state = DigestRecordState.IGNORED
+                    self._upload_queue.enqueue(record_to_ignore, ['state'])
+
+            # TODO: Research if this is really needed because records are taken from server
+            # records_left_from_tbot += [digest_record
+            #                            for digest_record_i, digest_record in
+            #                            enumerate(ignore_candidates_records)
+            #                            if digest_record_i in do_not_ignore_records_indexes]
+
+        if approve_candidates_records:
+            print('Candidates to approve:')
+            for approve_candidate_record_i, approve_candidate_record in enumerate(approve_candidates_records):
+                print(f'{approve_candidate_record_i + 1}. {approve_candidate_record.title} {approve_candidate_record.url}')
+            do_not_approve_records_indexes = self._ask_all_or_skipped_indexes('Approve all records inclusion in digest with typing "all" or comma-separated input records indexes which you want to left to be processed separately: ')
+            records_to_approve = [approve_candidate_record
+                                  for approve_candidate_record_i, approve_candidate_record in enumerate(approve_candidates_records)
+                                  if approve_candidate_record_i not in do_not_approve_records_indexes]
+            if records_to_approve:
+                for record_to_approve_i, record_to_approve in enumerate(records_to_approve):
+                    record_to_approve.digest_issue = self._current_digest_issue
+                    record_to_approve.state = DigestRecordState.IN_DIGEST
+                    self._upload_queue.enqueue(record_to_approve, ['state'])
+
+            # TODO: Research if this is really needed because records are taken from server
+            # records_left_from_tbot += [digest_record
+            #                            for digest_record_i, digest_record in
+            #                            enumerate(approve_candidates_records)
+            #                            if digest_record_i in do_not_approve_records_indexes]
+
+        if records_with_is_main_estimation:
+            print('Main or not main estimations from Telegram bot to process:')
+            for mark_as_main_record_i, mark_as_main_record in enumerate(records_with_is_main_estimation):
+                # TODO: Add support for multiple estimations
+                print(f'{mark_as_main_record_i + 1}. {"MAIN" if self._admins_estimation(mark_as_main_record.estimations)["is_main"] else "NOT MAIN"} {mark_as_main_record.title} {mark_as_main_record.url}')
+            not_accepted_estimations_records_indexes = self._ask_all_or_skipped_indexes('Approve all specified above records "is_main" estimations with typing "all" or specify comma-separated list of records indexes to ignore estimation and process separately: ')
+            records_with_approved_estimations = [digest_record
+                                                 for digest_record_i, digest_record in
+                                                 enumerate(records_with_is_main_estimation)
+                                                 if digest_record_i not in not_accepted_estimations_records_indexes]
+            if records_with_approved_estimations:
+                for record_with_approved_estimations in records_with_approved_estimations:
+                    # TODO: Add support for multiple estimations
+                    record_with_approved_estimations.is_main = record_with_approved_estimations.estimations[0]['is_main']
+                    self._upload_queue.enqueue(record_with_approved_estimations, ['is_main'])
+
+        if records_with_content_type_estimation:
+            print('Content type estimations from Telegram bot to process:')
+            for estimated_record_i, estimated_record in enumerate(records_with_content_type_estimation):
+                # TODO: Add support for multiple estimations
+                print(f'{estimated_record_i + 1}. {self._admins_estimation(estimated_record.estimations)["content_type"].name} {estimated_record.title} {estimated_record.url}')
+            not_accepted_estimations_records_indexes = self._ask_all_or_skipped_indexes('Approve all specified above content type estimations with typing "all" or specify comma-separated list of records indexes to ignore estimation and process separately: ')
+            records_with_approved_estimations = [digest_record
+                                                 for digest_record_i, digest_record in
+                                                 enumerate(records_with_content_type_estimation)
+                                                 if digest_record_i not in not_accepted_estimations_records_indexes]
+            if records_with_approved_estimations:
+                for record_with_approved_estimations in records_with_approved_estimations:
+                    # TODO: Add support for multiple estimations
+                    record_with_approved_estimations.content_type = self._admins_estimation(record_with_approved_estimations.estimations)['content_type']
+                    self._upload_queue.enqueue(record_with_approved_estimations, ['content_type'])
+
+        if records_with_content_category_estimation:
+            print('Content category estimations from Telegram bot to process:')
+            for estimated_record_i, estimated_record in enumerate(records_with_content_category_estimation):
+                # TODO: Add support for multiple estimations
+                print(f'{estimated_record_i + 1}. {self._admins_estimation(estimated_record.estimations)["content_category"].name} {estimated_record.title} {estimated_record.url}')
+            not_accepted_estimations_records_indexes = self._ask_all_or_skipped_indexes('Approve all specified above content category estimations with typing "all" or specify comma-separated list of records indexes to ignore estimation and process separately: ')
+            records_with_approved_estimations = [digest_record
+                                                 for digest_record_i, digest_record in
+                                                 enumerate(records_with_content_category_estimation)
+                                                 if digest_record_i not in not_accepted_estimations_records_indexes]
+            if records_with_approved_estimations:
+                for record_with_approved_estimations in records_with_approved_estimations:
+                    # TODO: Add support for multiple estimations
+                    record_with_approved_estimations.content_category = self._admins_estimation(record_with_approved_estimations.estimations)['content_category']
+                    self._upload_queue.enqueue(record_with_approved_estimations, ['content_category'])
+
+        not_uploaded_count = self._upload_queue.flush()
+        if not_uploaded_count:
+            logger.warning(f'{not_uploaded_count} record(s) with TBot estimations are not uploaded yet, they will be retried on next categorizer start')
+
+        # TODO: Research if this is really needed because records are taken from server
+        # self.records = records_left_from_tbot
+
+    def _ask_all_or_skipped_indexes(self, question):
+        while True:
+            answer = input(question)
+            if answer == 'all':
+                skipped_indexes = []
+                break
+            elif re.fullmatch(r'[0-9]+(,[0-9]+)*?', answer):
+                skipped_indexes = [int(i) - 1 for i in answer.split(',')]
+                break
+            else:
+                print('Invalid answer, please input "all" or comma-separated indexes list')
+                continue
+        return skipped_indexes
+
+    def _categorize_new_records(self):
+        prefetcher = self._prefetcher
+        for record_i, record in enumerate(self.records):
+            prefetcher.prefetch(self.records[record_i:])
+            if not prefetcher.is_still_not_categorized(record):
+                logger.warning(f'Record #{record.drid} is already categorized by another operator or deleted, skipping it')
+                prefetcher.forget(record)
+                if record_i == len(self.records) - 1:
+                    prefetcher.request_next_records_batch()
+                continue
+            print(f'Digest record(s) left to process: {prefetcher.non_categorized_digest_records_count()}')
+            # TODO: Rewrite using FSM
+            logger.info(f'Processing record "{record.title}" from date {record.dt}')
+            print(f'New record:\n{record}')
+            initial_state = record.state
+            # Similar records are changed only together with record upload
+            similar_records_change = None
+            if record.state == DigestRecordState.UNKNOWN:
+                self._show_similar_from_previous_digest(prefetcher.similar_from_previous_digest(record))
+                record.state = self._ask_state(record)
+            if record.digest_issue is None:
+                record.digest_issue = self._current_digest_issue
+            if record.state in (DigestRecordState.IN_DIGEST,
+                                DigestRecordState.OUTDATED):
+                if record.is_main is None:
+                    is_main = self._ask_bool(f'Please input whether or no "{record.title}" is main (y/n): ')
+                    logger.info(f'{"Marking" if is_main else "Not marking"} "{record.title}" as one of main records')
+                    record.is_main = is_main
+
+                if record.content_type is None or record.content_type == DigestRecordContentType.UNKNOWN:
+                    guessed_content_type = prefetcher.guessed_content_type(record)
+                    if guessed_content_type is not None:
+                        msg = f'Guessed content_type is "{DIGEST_RECORD_CONTENT_TYPE_RU_MAPPING[guessed_content_type.value]}". Accept? y/n: '
+                        accepted = self._ask_bool(msg)
+                        if accepted:
+                            logger.info(f'Setting content_type of record "{record.title}" to "{DIGEST_RECORD_CONTENT_TYPE_RU_MAPPING[guessed_content_type.value]}"')
+                            record.content_type = guessed_content_type
+
+                    if guessed_content_type != DigestRecordContentType.OTHER and record.content_category is None:
+                        guessed_content_categories, matched_subcategories_keywords = prefetcher.guessed_content_category(record)
+                        if guessed_content_categories:
+                            if matched_subcategories_keywords:
+                                matched_subcategories_keywords_translated = {}
+                                for matched_content_category, keywords in matched_subcategories_keywords.items():
+                                    matched_subcategories_keywords_translated[DIGEST_RECORD_CONTENT_CATEGORY_RU_MAPPING[matched_content_category if matched_content_category != 'databases' else 'db']] = keywords
+                                print(f'Matched subcategories keywords:\n{pformat(matched_subcategories_keywords_translated)}')
+                            if len(guessed_content_categories) == 1:
+                                guessed_content_category = guessed_content_categories[0]
+                                msg = f'Guessed content_category is "{DIGEST_RECORD_CONTENT_CATEGORY_RU_MAPPING[guessed_content_category.value]}". Accept? y/n: '
+                                accepted = self._ask_bool(msg)
+                                if accepted:
+                                    logger.info(f'Setting content_category of record "{record.title}" to "{DIGEST_RECORD_CONTENT_CATEGORY_RU_MAPPING[guessed_content_category.value]}"')
+                                    record.content_category = guessed_content_category
+                            else:
+                                msg = f'Guessed subcategories are:'
+                                for guessed_content_category_i, guessed_content_category in enumerate(guessed_content_categories):
+                                    msg += f'\n{guessed_content_category_i + 1}. {DIGEST_RECORD_CONTENT_CATEGORY_RU_MAPPING[guessed_content_category.value]}'
+                                msg += f'\nType guessed content_category index or "n" if no match: '
+                                guessed_content_category_index = self._ask_guessed_content_category_index(msg,
+                                                                                                len(guessed_content_categories))
+                                if guessed_content_category_index is not None:
+                                    guessed_content_category = guessed_content_categories[guessed_content_category_index - 1]
+                                    logger.info(f'Setting content_category of record "{record.title}" to "{DIGEST_RECORD_CONTENT_CATEGORY_RU_MAPPING[guessed_content_category.value]}"')
+                                    record.content_category = guessed_content_category
+
+                if record.content_type == DigestRecordContentType.UNKNOWN or record.content_type is None:
+                    record.content_type = self._ask_content_type(record,
+                                                             DIGEST_RECORD_CONTENT_TYPE_RU_MAPPING)
+                if record.content_category is None:
+                    if record.content_type != DigestRecordContentType.OTHER:
+                        record.content_category = self._ask_content_category(record,
+                                                                        DIGEST_RECORD_CONTENT_CATEGORY_RU_MAPPING)
+
+                if record.state == DigestRecordState.IN_DIGEST \
+                        and record.content_type is not None \
+                        and record.content_category is not None:
+                    current_records_with_similar_categories = prefetcher.similar_digest_records(record,
+                                                                                                record.digest_issue,
+                                                                                                record.content_type,
+                                                                                                record.content_category)
+                    similar_records_lists_without_record_itself = {}
+                    similar_records_without_record_itself = []
+                    if current_records_with_similar_categories:
+                        for similar_records in current_records_with_similar_categories['similar_records']:
+                            similar_records_one_without_record_itself = []
+                            for dr in similar_records['digest_records']:
+                                if not same_urls(dr['url'], record.url):
+                                    similar_records_one_without_record_itself.append(dr)
+                            if similar_records_one_without_record_itself:
+                                similar_records_lists_without_record_itself[similar_records['id']] = similar_records_one_without_record_itself
+                    if current_records_with_similar_categories:
+                        for similar_record in current_records_with_similar_categories['records']:
+                            if not same_urls(similar_record['url'], record.url):
+                                similar_records_without_record_itself.append(similar_record)
+                    if similar_records_lists_without_record_itself or similar_records_without_record_itself:
+                        if len(similar_records_lists_without_record_itself) + len(similar_records_without_record_itself) == 1:
+                            if similar_records_lists_without_record_itself:
+                                obj = list(similar_records_lists_without_record_itself.values())[0]
+                                text = f'[{"; ".join([dr["title"] + " " + dr["url"] for dr in obj])}]'
+                                options_indexes = [list(similar_records_lists_without_record_itself.keys())[0]]
+                            else:
+                                obj = similar_records_without_record_itself[0]
+                                text = f'"{obj["title"]}" {obj["url"]}'
+                                options_indexes = [obj['id']]
+                            question = f'Is the record(s) {text} similar to current (y/n)? '
+                            confirmation = self._ask_bool(question)
+                            if confirmation:
+                                option_index = 0
+                            else:
+                                option_index = None
+                        else:
+                            print(f'Are there any similar records for digest record "{record.title}" ({record.url})? Here is list of possible ones:')
+                            i = 1
+                            options_indexes = []
+                            for option_id, option_values in similar_records_lists_without_record_itself.items():
+                                print(f'{i}. {"; ".join([dr["title"] + " " + dr["url"] for dr in option_values])}')
+                                options_indexes.append(option_id)
+                                i += 1
+                            for option in similar_records_without_record_itself:
+                                print(f'{i}. {option["title"]} {option["url"]}')
+                                options_indexes.append(option['id'])
+                                i += 1
+                            option_index = self._ask_option_index_or_no(i - 1)
+                        print(Style.RESET_ALL, end='')
+                        if option_index is not None:
+                            if current_records_with_similar_categories['similar_records'] and option_index <= len(current_records_with_similar_categories['similar_records']):
+                                existing_drids = []
+                                for option in current_records_with_similar_categories['similar_records']:
+                                    if option['id'] == options_indexes[option_index - 1]:
+                                        existing_drids = [dr['id'] for dr in option['digest_records']]
+                                similar_records_change = (self._add_digest_record_do_similar,
+                                                          (options_indexes[option_index - 1], existing_drids, record.drid),
+                                                          'Added to existing similar records item')  # TODO: More details
+                            else:
+                                similar_records_change = (self._create_similar_digest_records_item,
+                                                          (record.digest_issue, [options_indexes[option_index - 1], record.drid]),
+                                                          'New similar records item created')  # TODO: More details
+                        else:
+                            logger.info('No similar records specified')
+                    else:
+                        logger.info('Similar digest records not found')
+
+            prefetcher.forget(record)
+            if initial_state == DigestRecordState.UNKNOWN and not self._is_still_not_categorized(record.drid):
+                logger.warning(f'Record #{record.drid} was already categorized by another operator or deleted, skipping upload')
+            else:
+                if similar_records_change is not None:
+                    change_function, change_args, change_message = similar_records_change
+                    change_function(*change_args)
+                    logger.info(change_message)
+                self._upload_record(record)
+            if record_i == len(self.records) - 1:
+                prefetcher.request_next_records_batch()
+            prefetcher.request_non_categorized_digest_records_count()
+
+    def _is_still_not_categorized(self, drid: int):
+        # FNGS has no way to lock record, so it is only checked before record is shown and once again before upload.
+        # Check and upload are not atomic, so concurrent operators still could both categorize the same record
+        server_record = self._digest_record_by_id(drid)
+        if server_record is None:
+            return False
+        return server_record.get('state') in (None, 'UNKNOWN', DigestRecordState.UNKNOWN.value)
+
+    def _upload_record(self, record, additional_fields_keys=None):
+        logger.info(f'Uploading record #{record.drid} to FNGS')
+        self._upload_record_fields(record.drid, self._record_upload_fields(record, additional_fields_keys))
+        logger.info(f'Uploaded record #{record.drid} for digest #{record.digest_issue} to FNGS')
+        logger.info(f'If you want to change some parameters that you\'ve set - go to {self.admin_url}/gatherer/digestrecord/{record.drid}/change/')
+
+    @staticmethod
+    def _record_upload_fields(record, additional_fields_keys=None):
+        base_fields = {
+            'id': record.drid,
+            'digest_issue': record.digest_issue,
+        }
+        all_additional_fields = {
+            'state': record.state.name if record.state is not None else None,
+            'is_main': record.is_main,
+            'content_type': record.content_type.name if record.content_type is not None else None,
+            'content_category': record.content_category.name if record.content_category is not None else None,
+        }
+        if additional_fields_keys is None:
+            additional_fields = all_additional_fields
+        else:
+            additional_fields = {k: v for k, v in all_additional_fields.items() if k in additional_fields_keys}
+        return dict(**base_fields, **additional_fields)
+
+    def _upload_record_fields(self, drid, fields):
+        response = self._patch_record_fields(drid, fields)
+        if response.status_code != 200:
+            raise Exception(f'Invalid response code from FNGS patch - {response.status_code} (request data was {json.dumps(fields)}): {response.content.decode("utf-8")}')
+
+    def _patch_record_fields(self, drid, fields):
+        return self.patch_with_retries(url=f'{self.gatherer_api_url}/digest-record/{drid}/',
+                                       headers=self._auth_headers,
+                                       data=json.dumps(fields))
+
+    @property
+    def _upload_queue(self):
+        if self._records_upload_queue is None:
+            # Journal is not kept in cache directory, so clearing cache does not lose categorizations
+            journal_path = os.path.join(DATA_DIRECTORY, f'upload-journal-{self._host}-{self._port}.jsonl')
+            self._records_upload_queue = DigestRecordsUploadQueue(self._patch_record_fields,
+                                                                  journal_path,
+                                                                  patch_records_fields_async=self._patch_records_fields_async)
+        return self._records_upload_queue
+
+    async def _patch_records_fields_async(self, drids_and_fields, workers_count: int):
+        semaphore = asyncio.Semaphore(workers_count)
+
+        async def patch(client, drid, fields):
+            async with semaphore:
+                return await client.patch_with_retries(url=f'{self.gatherer_api_url}/digest-record/{drid}/',
+                                                       headers=self._auth_headers,
+                                                       data=json.dumps(fields))
+
+        async with AsyncNetworkingClient() as client:
+            return await asyncio.gather(*[patch(client, drid, fields) for drid, fields in drids_and_fields],
+                                        return_exceptions=True)
+
+    def _ask_state(self, record: DigestRecord):
+        return self._ask_enum('digest record state', DigestRecordState, record)
+
+    def _ask_option_index_or_no(self, max_index):
+        while True:
+            option_index_str = input(f'Please input option number or "n" to create new one: ')
+            if option_index_str.isnumeric():
+                option_index = int(option_index_str)
+                if 0 < option_index <= max_index:
+                    return option_index
+                else:
+                    logger.error(f'Index should be positive and not more than {max_index}')
+            elif option_index_str == 'n':
+                return None
+            else:
+                print('Invalid answer, it should be integer or "n"')
+        raise NotImplementedError
+
+    def _ask_digest_issue(self):
+        while True:
+            digest_issue_str = input(f'Please input current digest number: ')
+            if digest_issue_str.isnumeric():
+                digest_issue = int(digest_issue_str)
+                return digest_issue
+            else:
+                print('Invalid digest number, it should be integer')
+        raise NotImplementedError
+
+    def _ask_guessed_content_category_index(self,
+                                       question: str,
+                                       indexes_count: int):
+        while True:
+            answer = input(question)
+            if answer.isnumeric():
+                index = int(answer)
+                if 1 <= index <= indexes_count:
+                    return index
+                else:
+                    print(f'Invalid index, it should be between 1 and {indexes_count}')
+                    continue
+            elif answer == 'n':
+                return None
+            else:
+                print(f'Invalid answer, it should be positive integer between 1 and {indexes_count} or "n"')
+                continue
+        raise NotImplementedError
+
+    def _ask_bool(self, question: str):
+        while True:
+            bool_str = input(question)
+            if bool_str == 'y':
+                return True
+            elif bool_str == 'n':
+                return False
+            else:
+                print('Invalid boolean, it should be "y" or "n"')
+        raise NotImplementedError
+
+    def _ask_content_type(self,
+                      record: DigestRecord,
+                      translations: Dict[str, str] = None):
+        return self._ask_enum('digest record content_type', DigestRecordContentType, record, translations)
+
+    def _ask_content_category(self,
+                         record: DigestRecord,
+                         translations: Dict[str, str] = None):
+        enum_name = 'digest record content_category'
+        if record.content_type != DigestRecordContentType.UNKNOWN and record.content_type != DigestRecordContentType.OTHER:
+            return self._ask_enum(enum_name, DigestRecordContentCategory, record, translations)
+        else:
+            raise NotImplementedError
+
+    def _similar_digest_records(self,
+                                digest_issue,
+                                content_type,
+                                content_category):
+        logger.debug(f'Getting records looking similar for digest number #{digest_issue}, content_type "{content_type.value}" and content_category "{content_category.value}"')
+        url = f'{self.gatherer_api_url}/digest-record/similar/?digest_issue={digest_issue}&content_type={content_type.name}&content_category={content_category.name}'
+        results = self.get_results_from_all_pages(url, self._auth_headers, timeout=5*NETWORK_TIMEOUT_SECONDS)
+        if not results:
+            logger.info('No similar records found')
+            return None
+        options_similar_records = []
+        options_records = []
+        for similar_record_i, similar_record in enumerate(results):
+            similar_records_item = similar_record['similar_records']
+            if similar_records_item:
+                for similar_records_item_one in similar_records_item:
+                    options_similar_records.append(similar_records_item_one)
+            else:
+                options_records.append({'id': similar_record['id'], 'title': similar_record['title'], 'url': similar_record['url']})
+        options_similar_records_filtered = []
+        for option_similar_records_one in options_similar_records:
+            similar_digest_records = []
+            for similar_digest_records_record in option_similar_records_one['digest_records']:
+                similar_digest_records.append({'id': similar_digest_records_record['id'], 'title': similar_digest_records_record['title'], 'url': similar_digest_records_record['url']})
+            exists = False
+            for option_similar_records_filtered in options_similar_records_filtered:
+                if option_similar_records_filtered['id'] == option_similar_records_one['id']:
+                    exists = True
+                    break
+            if not exists:
+                options_similar_records_filtered.append({'id': option_similar_records_one['id'], 'digest_records': similar_digest_records})
+        return {
+            'similar_records': options_similar_records_filtered,
+            'records': options_records,
+        }
+
+    def _add_digest_record_do_similar(self, similar_digest_records_item_id, existing_drids, digest_record_id):
+        logger.debug(f'Adding digest record #{digest_record_id} to similar digest records item #{similar_digest_records_item_id}')
+        url = f'{self.gatherer_api_url}/similar-digest-record/{similar_digest_records_item_id}/'
+        data = {
+            'id': similar_digest_records_item_id,
+            'digest_records': existing_drids + [digest_record_id],
+        }
+        response = self.patch_with_retries(url=url,
+                                           data=json.dumps(data),
+                                           headers=self._auth_headers)
+        if response.status_code != 200:
+            logger.error(f'Failed to update similar digest records item, status code {response.status_code}, response: {response.content}')
+            # TODO: Raise exception and handle above
+
+    def _create_similar_digest_records_item(self,
+                                            digest_issue,
+                                            digest_records_ids,
+                                            ):
+        logger.debug(f'Creating similar digest records item from #{digest_records_ids}')
+        url = f'{self.gatherer_api_url}/similar-digest-record/'
+        data = {
+            'digest_issue': digest_issue,
+            'digest_records': digest_records_ids,
+        }
+        logger.debug(f'POSTing data {data} to URL {url}')
+        response = self.post_with_retries(url,
+                                          data=json.dumps(data),
+                                          headers=self._auth_headers)
+        if response.status_code != 201:
+            logger.error(f'Failed to create similar digest records item, status code {response.status_code}, response: {response.content}')
+            # TODO: Raise exception and handle above
+
+    def _digest_record_by_id(self, digest_record_id):
+        logger.debug(f'Loading digest record #{digest_record_id}')
+        url = f'{self.gatherer_api_url}/digest-record/{digest_record_id}'
+        response = self.request_with_retries(url, headers=self._auth_headers)
+        if response.status_code == 404:
+            logger.warning(f'Digest record #{digest_record_id} not found, it could be deleted')
+            return None
+        if response.status_code != 200:
+            raise Exception(f'Failed to retrieve digest record, status code {response.status_code}, response: {response.content}')
+        # logger.debug(f'Received response: {response.content}')  # TODO: Make "super debug" level and enable for it only
+        response_str = response.content.decode()
+        response = json.loads(response_str)
+        if not response:
+            # TODO: Raise exception and handle above
+            logger.error('No digest record in response')
+            return None
+        return response
+
+    def _similar_digest_records_by_digest_record(self, digest_record_id):
+        logger.debug(f'Checking if there are similar records for digest record #{digest_record_id}')
+        url = f'{self.gatherer_api_url}/similar-digest-record/detailed/?digest_record={digest_record_id}'
+        results = self.get_results_from_all_pages(url, self._auth_headers)
+        if not results:
+            logger.debug(f'No similar records found for digest record #{digest_record_id}')
+            return None
+        return results[0] # TODO: Handle multiple case
+
+    def _ask_enum(self,
+                  enum_name,
+                  enum_class,
+                  record: DigestRecord,
+                  translations: Dict[str, str] = None):
+        while True:
+            logger.info(f'Waiting for {enum_name}')
+            print(f'Available values:')
+            enum_options_values = [enum_variant.value for enum_variant in enum_class]
+            for enum_option_value_i, enum_option_value in enumerate(enum_options_values):
+                enum_option_value_mod = translations[enum_option_value] if translations is not None else enum_option_value
+                print(f'{enum_option_value_i + 1}. {enum_option_value_mod}')
+            enum_value_index_str = input(f'Please input index of {enum_name} for "{record.title}": ')
+            if enum_value_index_str.isnumeric():
+                enum_value_index = int(enum_value_index_str)
+                if 0 <= enum_value_index <= len(enum_options_values):
+                    try:
+                        enum_value = enum_options_values[enum_value_index - 1]
+                        enum_obj = enum_class(enum_value)
+                        enum_obj_value_mod = translations[enum_obj.value] if translations is not None else enum_obj.value
+                        logger.info(f'Setting {enum_name} of record "{record.title}" to "{enum_obj_value_mod}"')
+                        return enum_obj
+                    except ValueError:
+                        print(f'Invalid {enum_name} value "{enum_value}"')
+                        continue
+                else:
+                    print(f'Invalid index, it should be positive and not more than {len(enum_options_values)}')
+                    continue
+            else:
+                print('Invalid index, it should be integer')
+                continue
+        raise NotImplementedError
@@ -0,0 +1,643 @@
+import asyncio
+import contextlib
+import functools
+import json
+import multiprocessing
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from abc import (
+    ABCMeta,
+    abstractmethod,
+)
+from multiprocessing.pool import ThreadPool
+from typing import List, Dict, Tuple
+
+from fntools import logger
+from fntools.networking import (
+    AsyncNetworkingClient,
+    NetworkingMixin,
+    RetryPolicy,
+    ServerConnectionMixin,
+)
+
+
+HABR_VIEWS_COUNTER_XPATH = '//div[contains(@class, "tm-page__main tm-page__main_has-sidebar")]//div[contains(@class, "tm-data-icons tm-article-sticky-panel__icons")]//span[contains(@class, "tm-icon-counter tm-data-icons__item")]/span'
+HABR_INITIAL_STATE_SCRIPT_XPATH = '//script[contains(text(), "window.__INITIAL_STATE__")]/text()'
+HABR_ARTICLE_ID_RE = re.compile(r'/(\d+)/?(?:[?#].*)?$')
+VIEWS_COUNTER_TEXT_RE = re.compile(r'((\d+)([\.,](\d+))?)[Kk]?')
+
+
+def views_count_from_counter_text(counter_text: str):
+    # Counter is shown like "874", "12K" or "12.3K"
+    re_result = VIEWS_COUNTER_TEXT_RE.fullmatch(counter_text.strip())
+    if re_result is None:
+        return None
+    statistics_without_k = re_result.group(1)
+    statistics_before_comma = re_result.group(2)
+    statistics_after_comma = re_result.group(4)
+    if 'K' in counter_text or 'k' in counter_text:
+        views_count = int(statistics_before_comma) * 1000
+        if statistics_after_comma is not None:
+            views_count += int(statistics_after_comma) * 100
+    else:
+        views_count = int(statistics_without_k)
+    return views_count
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled_xpath(xpath: str):
+    from lxml import etree
+    return etree.XPath(xpath)
+
+
+def habr_views_count_from_html(html_text: str, url: str = None):
+    # Exact views count is taken from article state embedded to server-rendered page, rounded counter from page markup
+    # is used if state is missing or its format changed
+    import lxml.html
+    from lxml import etree
+    try:
+        document = lxml.html.fromstring(html_text)
+    except (ValueError, etree.ParserError):
+        return None
+    for script_text in _compiled_xpath(HABR_INITIAL_STATE_SCRIPT_XPATH)(document):
+        views_count = _habr_views_count_from_initial_state(script_text, url)
+        if views_count is not None:
+            return views_count
+    for counter_element in _compiled_xpath(HABR_VIEWS_COUNTER_XPATH)(document):
+        views_count = views_count_from_counter_text(counter_element.text_content())
+        if views_count is not None:
+            return views_count
+    return None
+
+
+def _habr_views_count_from_initial_state(script_text: str, url: str = None):
+    state_begin_index = script_text.find('{', script_text.find('__INITIAL_STATE__'))
+    if state_begin_index < 0:
+        return None
+    try:
+        state, _ = json.JSONDecoder().raw_decode(script_text, state_begin_index)
+        articles = state['articlesList']['articlesById']
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not isinstance(articles, dict) or not articles:
+        return None
+    re_result = HABR_ARTICLE_ID_RE.search(url) if url else None
+    if re_result is not None and re_result.group(1) in articles:
+        article = articles[re_result.group(1)]
+    elif len(articles) == 1:
+        article = next(iter(articles.values()))
+    else:
+        return None
+    try:
+        return int(article['statistics']['readingCount'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+VK_VIEWS_COUNTER_XPATH = '//div[contains(@class, "articleView__footer_views")]'
+VK_VIEWS_COUNTER_TEXT_RE = re.compile(r'(\d[\d\s]*)\s*просмотр')
+
+
+def vk_views_count_from_html(html_text: str):
+    import lxml.html
+    from lxml import etree
+    try:
+        document = lxml.html.fromstring(html_text)
+    except (ValueError, etree.ParserError):
+        return None
+    for counter_element in _compiled_xpath(VK_VIEWS_COUNTER_XPATH)(document):
+        re_result = VK_VIEWS_COUNTER_TEXT_RE.search(counter_element.text_content())
+        if re_result is not None:
+            return int(re.sub(r'\s', '', re_result.group(1)))
+    return None
+
+
+class PostsStatisticsStore:
+    # Time series of views counts, one row per observation, every observation is committed at once, so interrupted
+    # run loses nothing and next run continues from where it stopped. Past views counts could not be scraped again, so
+    # history is data rather than cache and is kept next to "stats.csv" by default
+    DEFAULT_PATH = 'stats.sqlite3'
+
+    def __init__(self, db_path: str = DEFAULT_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS observations (source TEXT NOT NULL, issue INTEGER NOT NULL, '
+                                     'observed_time REAL NOT NULL, views INTEGER NOT NULL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS observations_source_issue ON observations (source, issue, observed_time)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def add_observation(self, source: str, issue: int, views: int, observed_time: float = None):
+        if observed_time is None:
+            observed_time = time.time()
+        with self._lock:
+            with self._connection:
+                self._connection.execute('INSERT INTO observations (source, issue, observed_time, views) VALUES (?, ?, ?, ?)',
+                                         (source, issue, observed_time, views))
+
+    def latest_observations(self, source: str) -> Dict[int, Tuple[float, int]]:
+        # Issue number to time and views count of its latest observation
+        with self._lock:
+            rows = self._connection.execute('SELECT issue, MAX(observed_time), views FROM observations WHERE source = ? GROUP BY issue',
+                                            (source,)).fetchall()
+        return {issue: (observed_time, views) for issue, observed_time, views in rows}
+
+    def history(self, source: str, issue: int) -> List[Tuple[float, int]]:
+        with self._lock:
+            return self._connection.execute('SELECT observed_time, views FROM observations WHERE source = ? AND issue = ? ORDER BY observed_time',
+                                            (source, issue)).fetchall()
+
+
+class ScrapingSchedule:
+    # Views of fresh issues grow fast while old issues barely change, so issues are re-scraped less often the older
+    # they are. Age is counted in issues from the newest one
+    DEFAULT_AGE_INTERVALS_SECONDS = (
+        (4, 6 * 60 * 60),
+        (12, 24 * 60 * 60),
+        (52, 7 * 24 * 60 * 60),
+        (None, 30 * 24 * 60 * 60),
+    )
+
+    def __init__(self, age_intervals_seconds=DEFAULT_AGE_INTERVALS_SECONDS):
+        self.age_intervals_seconds = age_intervals_seconds
+
+    def interval_seconds(self, age: int) -> float:
+        for max_age, interval_seconds in self.age_intervals_seconds:
+            if max_age is None or age < max_age:
+                return interval_seconds
+        return self.age_intervals_seconds[-1][1]
+
+    def due_numbers(self, numbers, last_observed_times: Dict[int, float], now: float = None) -> List[int]:
+        if now is None:
+            now = time.time()
+        due_numbers = []
+        for age, number in enumerate(sorted(numbers, reverse=True)):
+            last_observed_time = last_observed_times.get(number)
+            if last_observed_time is None or now - last_observed_time >= self.interval_seconds(age):
+                due_numbers.append(number)
+        return sorted(due_numbers)
+
+
+class BasicPostsStatisticsGetter(NetworkingMixin,
+                                 metaclass=ABCMeta):
+
+    SHARD_POLL_SECONDS = 5
+
+    def __init__(self, sessions_count, store: PostsStatisticsStore = None, schedule: ScrapingSchedule = None, shards_count: int = 1):
+        self.sessions_count = sessions_count
+        self._posts_urls = {}
+        self.source_name = None
+        self._posts_statistics = {}
+        self._lock = threading.Lock()
+        self.store = store
+        self.schedule = schedule
+        self.shards_count = shards_count
+        self._shard_index = None
+        self._results_queue = None
+
+    def __getstate__(self):
+        # Only plain data is passed to shard process, lock, store connection and browser sessions are not shared
+        state = self.__dict__.copy()
+        state['_lock'] = None
+        state['store'] = None
+        state['_posts_statistics'] = {}
+        state['_results_queue'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def gather_posts_statistics(self):
+        self._posts_statistics = {}
+        posts_urls = self.posts_urls
+        latest_observations = self.store.latest_observations(self.source_name) if self.store is not None else {}
+        if self.schedule is not None:
+            # Issues which are not published yet have no URL, they do not shift ages of published ones and are always
+            # reported as before
+            published_numbers = [number for number, url in posts_urls.items() if url]
+            due_numbers = set(self.schedule.due_numbers(published_numbers,
+                                                        {number: observed_time for number, (observed_time, _) in latest_observations.items()}))
+            due_numbers.update(number for number, url in posts_urls.items() if not url)
+            logger.info(f'{len(due_numbers)} of {len(posts_urls)} {self.source_name} post(s) are due for scraping')
+            posts_urls = {number: url for number, url in posts_urls.items() if number in due_numbers}
+        if self.shards_count > 1 and len(posts_urls) > 1:
+            self._scrape_posts_statistics_sharded(posts_urls)
+        else:
+            self._scrape_posts_statistics(posts_urls)
+        # Posts which were not scraped this time are reported with their latest stored views counts
+        for number, (_, views_count) in latest_observations.items():
+            if number in self.posts_urls and self._posts_statistics.get(number) is None:
+                self._posts_statistics[number] = views_count
+        return self._posts_statistics
+
+    def _scrape_posts_statistics(self, posts_urls):
+        self._gather_posts_statistics(posts_urls, self.sessions_count)
+
+    def _shards(self, posts_urls) -> List[Dict[int, str]]:
+        # Numbers are dealt to shards one by one in ascending order, so every shard gets both fresh and old posts and
+        # the same posts always go to the same shards
+        numbers = sorted(posts_urls.keys())
+        shards_count = min(self.shards_count, len(numbers))
+        return [{number: posts_urls[number] for number in numbers[shard_index::shards_count]}
+                for shard_index in range(shards_count)]
+
+    def _scrape_posts_statistics_sharded(self, posts_urls):
+        # Every shard is scraped in its own process with its own HTTP sessions and browsers, so parsing does not compete
+        # for one GIL. Shards report posts through queue, parent process logs and stores them, and merges results in
+        # ascending numbers order regardless of order of arrival
+        shards = self._shards(posts_urls)
+        shard_sessions_count = max(1, self.sessions_count // len(shards))
+        logger.info(f'Scraping {len(posts_urls)} {self.source_name} post(s) in {len(shards)} shard(s) with {shard_sessions_count} session(s) each')
+        results_queue = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=_scrape_posts_statistics_shard,
+                                             args=(self, shard_index, shard_posts_urls, shard_sessions_count, results_queue),
+                                             name=f'{self.source_name}-shard-{shard_index}')
+                     for shard_index, shard_posts_urls in enumerate(shards)]
+        for process in processes:
+            process.start()
+        shards_results = [{} for _ in shards]
+        finished_shards = set()
+        while len(finished_shards) < len(shards):
+            try:
+                shard_index, number, url, views_count = results_queue.get(timeout=self.SHARD_POLL_SECONDS)
+            except queue.Empty:
+                for shard_index, process in enumerate(processes):
+                    if shard_index not in finished_shards and not process.is_alive():
+                        logger.error(f'{self.source_name} shard {shard_index + 1}/{len(shards)} exited with code {process.exitcode} without finishing')
+                        finished_shards.add(shard_index)
+                continue
+            if number is None:
+                logger.info(f'{self.source_name} shard {shard_index + 1}/{len(shards)} finished')
+                finished_shards.add(shard_index)
+                continue
+            self._checkpoint_post_statistics(number, url, views_count)
+            shards_results[shard_index][number] = views_count
+            logger.info(f'{self.source_name} shard {shard_index + 1}/{len(shards)}: '
+                        f'{len(shards_results[shard_index])}/{len(shards[shard_index])} post(s) done')
+        for process in processes:
+            process.join()
+        merged_results = {}
+        for shard_results in shards_results:
+            merged_results.update(shard_results)
+        for number in sorted(posts_urls.keys()):
+            self._posts_statistics[number] = merged_results.get(number)
+
+    def _gather_posts_statistics(self, posts_urls, workers_count):
+        with ThreadPool(workers_count) as threads_pool:
+            threads_pool.map(self._gather_post_statistics, [(self, number, url, self._lock) for number, url in posts_urls.items()])
+
+    def _gather_post_statistics(self, data):
+        obj, number, url, lock = data
+        views_count = obj._internal_gather_post_statistics(number, url)
+        obj._save_post_statistics(number, url, views_count)
+
+    def _save_post_statistics(self, number, url, views_count):
+        if self._results_queue is not None:
+            # Shard process, post is logged and stored by parent process
+            self._results_queue.put((self._shard_index, number, url, views_count))
+        else:
+            self._checkpoint_post_statistics(number, url, views_count)
+        with self._lock:
+            self._posts_statistics[number] = views_count
+
+    def _checkpoint_post_statistics(self, number, url, views_count):
+        logger.info(f'Views count for {self.source_name} post #{number} ({url}): {views_count}')
+        if views_count is not None and self.store is not None:
+            self.store.add_observation(self.source_name, number, views_count)
+
+    @abstractmethod
+    def _internal_gather_post_statistics(self, number, url):
+        pass
+
+    @property
+    def posts_urls(self):
+        return self._posts_urls
+
+
+def _scrape_posts_statistics_shard(getter: BasicPostsStatisticsGetter, shard_index: int, posts_urls, sessions_count: int, results_queue):
+    # Module level function, so it could be used as shard process target
+    NetworkingMixin.reopen_shared_connections()
+    getter.sessions_count = sessions_count
+    getter._shard_index = shard_index
+    getter._results_queue = results_queue
+    try:
+        getter._scrape_posts_statistics(posts_urls)
+    finally:
+        results_queue.put((shard_index, None, None, None))
+
+
+class DigestIssuesPostsStatisticsGetter(BasicPostsStatisticsGetter,
+                                        ServerConnectionMixin):
+    # Posts are taken from digest issues list of FNGS
+
+    def __init__(self, config_path, sessions_count, store: PostsStatisticsStore = None, schedule: ScrapingSchedule = None, shards_count: int = 1):
+        super().__init__(sessions_count, store=store, schedule=schedule, shards_count=shards_count)
+        self._load_config(config_path)
+        self._login()
+        self._posts_urls = {}
+        for digest_issue in self._digest_issues:
+            post_url = self._post_url(digest_issue)
+            if post_url is not None:
+                self._posts_urls[digest_issue['number']] = post_url
+
+    @property
+    def _digest_issues(self):
+        return self.get_results_from_all_pages(f'{self.gatherer_api_url}/digest-issue/', self._auth_headers)
+
+    @abstractmethod
+    def _post_url(self, digest_issue: Dict):
+        pass
+
+
+class VkPostsStatisticsGetter(DigestIssuesPostsStatisticsGetter):
+    VK_POST_URL_TEMPLATE = 'https://vk.com/@permlug-foss-news-{number}'
+
+    def __init__(self, config_path, sessions_count, store: PostsStatisticsStore = None, schedule: ScrapingSchedule = None, shards_count: int = 1):
+        super().__init__(config_path, sessions_count, store=store, schedule=schedule, shards_count=shards_count)
+        self.source_name = 'VK'
+
+    def _post_url(self, digest_issue: Dict):
+        # VK article is published together with Habr one, so issues without Habr URL are not published yet
+        if digest_issue.get('vk_url'):
+            return digest_issue['vk_url']
+        if not digest_issue.get('habr_url'):
+            return None
+        return self.VK_POST_URL_TEMPLATE.format(number=digest_issue['number'])
+
+    def _scrape_posts_statistics(self, posts_urls):
+        asyncio.run(self._scrape_posts_statistics_async(posts_urls))
+
+    async def _scrape_posts_statistics_async(self, posts_urls):
+        # Requests go through the same retry policy and per-host circuit breaker as FNGS ones, every post is saved as
+        # soon as it is parsed
+        async with AsyncNetworkingClient(max_in_flight=self.sessions_count) as client:
+            await asyncio.gather(*[self._gather_post_statistics_async(client, number, url)
+                                   for number, url in posts_urls.items()])
+
+    async def _gather_post_statistics_async(self, client: AsyncNetworkingClient, number, url):
+        try:
+            response = await client.get_with_retries(url)
+        except Exception as e:
+            logger.error(f'Failed to get FOSS News #{number} ({url}) from VK: {e}')
+            views_count = None
+        else:
+            views_count = self._views_count_from_response(number, url, response)
+        self._save_post_statistics(number, url, views_count)
+
+    def _internal_gather_post_statistics(self, number, url):
+        response = NetworkingMixin.get_with_retries(url)
+        return self._views_count_from_response(number, url, response)
+
+    @staticmethod
+    def _views_count_from_response(number, url, response):
+        views_count = vk_views_count_from_html(response.text)
+        if views_count is None:
+            logger.error(f'Failed to find statistics in FOSS News #{number} ({url}) on VK')
+        return views_count
+
+
+class WebDriverPool:
+    # Browser sessions shared by worker threads. Worker takes idle driver from queue for one page and always gives its
+    # slot back, dead drivers are replaced on checkout and drivers which loaded too many pages are recycled to keep
+    # memory usage of browser bounded. Slot of recycled driver or of driver which could not be started is kept in queue
+    # as None and driver for it is started by next checkout, so failing browser start never shrinks pool
+    DEFAULT_MAX_PAGES_PER_DRIVER = 50
+    DEFAULT_CHECKOUT_TIMEOUT_SECONDS = 10 * 60
+
+    def __init__(self, size: int, max_pages_per_driver: int = DEFAULT_MAX_PAGES_PER_DRIVER, driver_factory=None,
+                 checkout_timeout_seconds: float = DEFAULT_CHECKOUT_TIMEOUT_SECONDS):
+        self.size = size
+        self.max_pages_per_driver = max_pages_per_driver
+        self.checkout_timeout_seconds = checkout_timeout_seconds
+        self._driver_factory = driver_factory if driver_factory is not None else self._create_firefox_driver
+        self._idle_drivers = queue.Queue()
+        self._pages_counts = {}
+        self._lock = threading.Lock()
+        self._start_time = None
+        self._end_time = None
+        self.leases_count = 0
+        self.wait_seconds_total = 0
+        self.wait_seconds_max = 0
+        self.busy_seconds_total = 0
+        self.created_count = 0
+        self.recycled_count = 0
+        self.replaced_dead_count = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _create_firefox_driver():
+        from selenium import webdriver
+        return webdriver.Firefox()
+
+    def start(self):
+        self._start_time = time.monotonic()
+        started_drivers = []
+        try:
+            for _ in range(self.size):
+                started_drivers.append(self._new_driver())
+        except BaseException:
+            # Pool is not entered, so nobody else would quit already started browsers
+            for driver in started_drivers:
+                self._quit(driver)
+            raise
+        for driver in started_drivers:
+            self._idle_drivers.put(driver)
+
+    def close(self):
+        self._end_time = time.monotonic()
+        while True:
+            try:
+                driver = self._idle_drivers.get_nowait()
+            except queue.Empty:
+                break
+            if driver is not None:
+                self._quit(driver)
+
+    @contextlib.contextmanager
+    def lease(self):
+        wait_begin_time = time.monotonic()
+        try:
+            driver = self._idle_drivers.get(timeout=self.checkout_timeout_seconds)
+        except queue.Empty:
+            raise Exception(f'No browser session was given back to pool in {self.checkout_timeout_seconds} seconds')
+        wait_seconds = time.monotonic() - wait_begin_time
+        try:
+            if driver is not None and not self._is_alive(driver):
+                logger.warning('Browser session is dead, replacing it')
+                self._quit(driver)
+                driver = None
+                with self._lock:
+                    self.replaced_dead_count += 1
+            if driver is None:
+                driver = self._new_driver()
+        except BaseException:
+            self._idle_drivers.put(None)
+            raise
+        lease_begin_time = time.monotonic()
+        try:
+            yield driver
+        finally:
+            with self._lock:
+                self.leases_count += 1
+                self.wait_seconds_total += wait_seconds
+                self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+                self.busy_seconds_total += time.monotonic() - lease_begin_time
+                self._pages_counts[id(driver)] += 1
+                recycle = self._pages_counts[id(driver)] >= self.max_pages_per_driver
+            if recycle:
+                logger.debug(f'Browser session loaded {self.max_pages_per_driver} pages, recycling it')
+                self._quit(driver)
+                driver = None
+                with self._lock:
+                    self.recycled_count += 1
+            self._idle_drivers.put(driver)
+
+    @property
+    def utilization(self):
+        # Share of pool time drivers spent loading pages, long checkout waits mean that more sessions are needed and low
+        # utilization means that fewer sessions would do
+        if self._start_time is None:
+            return 0
+        elapsed_seconds = (self._end_time if self._end_time is not None else time.monotonic()) - self._start_time
+        return self.busy_seconds_total / (self.size * elapsed_seconds) if elapsed_seconds > 0 else 0
+
+    def metrics_summary(self):
+        average_wait_seconds = self.wait_seconds_total / self.leases_count if self.leases_count else 0
+        return (f'Browser pool of {self.size} session(s): {self.leases_count} page(s), utilization {self.utilization:.0%}, '
+                f'checkout wait average {average_wait_seconds:.2f}s and max {self.wait_seconds_max:.2f}s, '
+                f'{self.created_count} session(s) started, {self.recycled_count} recycled, {self.replaced_dead_count} replaced as dead')
+
+    def _new_driver(self):
+        driver = self._driver_factory()
+        with self._lock:
+            self._pages_counts[id(driver)] = 0
+            self.created_count += 1
+        return driver
+
+    def _quit(self, driver):
+        with self._lock:
+            self._pages_counts.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f'Failed to quit browser session: {e}')
+
+    @staticmethod
+    def _is_alive(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+
+class HabrPostsStatisticsGetter(DigestIssuesPostsStatisticsGetter):
+    FAST_PATH_WORKERS_COUNT = 16
+    # Browser is the fallback for pages which could not be got without it, so fast path does not wait long for them
+    FAST_PATH_RETRY_POLICY = RetryPolicy(max_attempts=2,
+                                         base_delay_seconds=1,
+                                         max_delay_seconds=2,
+                                         endpoints_max_attempts={},
+                                         max_retry_after_seconds=2)
+
+    def __init__(self, config_path, sessions_count, store: PostsStatisticsStore = None, schedule: ScrapingSchedule = None, shards_count: int = 1):
+        super().__init__(config_path, sessions_count, store=store, schedule=schedule, shards_count=shards_count)
+        self.source_name = 'Habr'
+        self._drivers_pool = None
+        self._browser_posts_urls = {}
+
+    def __getstate__(self):
+        # Browser sessions belong to process which started them
+        state = super().__getstate__()
+        state['_drivers_pool'] = None
+        return state
+
+    def _post_url(self, digest_issue: Dict):
+        return digest_issue['habr_url']
+
+    def _scrape_posts_statistics(self, posts_urls):
+        # Server-rendered pages are fetched and parsed without browser first, browser sessions are started only for
+        # pages which could not be parsed this way
+        self._drivers_pool = None
+        self._browser_posts_urls = {}
+        self._gather_posts_statistics(posts_urls, self.FAST_PATH_WORKERS_COUNT)
+        browser_posts_urls = dict(sorted(self._browser_posts_urls.items()))
+        if browser_posts_urls:
+            logger.info(f'{len(browser_posts_urls)} Habr post(s) could not be parsed without browser, using browser for them')
+            with WebDriverPool(min(self.sessions_count, len(browser_posts_urls))) as drivers_pool:
+                self._drivers_pool = drivers_pool
+                self._gather_posts_statistics(browser_posts_urls, drivers_pool.size)
+            logger.info(drivers_pool.metrics_summary())
+            self._drivers_pool = None
+
+    def _internal_gather_post_statistics(self, number, url):
+        if self._drivers_pool is None:
+            return self._fast_post_statistics(number, url)
+        return self._browser_post_statistics(number, url)
+
+    def _save_post_statistics(self, number, url, views_count):
+        if views_count is None and url and self._drivers_pool is None:
+            # Post is tried with browser then, only its final views count is logged and stored
+            with self._lock:
+                self._browser_posts_urls[number] = url
+            return
+        super()._save_post_statistics(number, url, views_count)
+
+    def _fast_post_statistics(self, number, url):
+        if not url:
+            logger.error(f'Empty URL for digest issue #{number}')
+            return None
+        try:
+            response = self.get_with_retries(url, retry_policy=self.FAST_PATH_RETRY_POLICY)
+        except Exception as e:
+            logger.warning(f'Failed to get FOSS News #{number} ({url}) from Habr without browser: {e}')
+            return None
+        views_count = habr_views_count_from_html(response.text, url)
+        if views_count is None:
+            logger.debug(f'Statistics not found in server-rendered page of FOSS News #{number} ({url}) on Habr')
+        return views_count
+
+    def _browser_post_statistics(self, number, url):
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        if not url:
+            logger.error(f'Empty URL for digest issue #{number}')
+            return None
+        with self._drivers_pool.lease() as driver:
+            driver.get(url)
+            try:
+                element = WebDriverWait(driver, 20).until(EC.element_to_be_clickable((By.XPATH, HABR_VIEWS_COUNTER_XPATH)))
+            except TimeoutException:
+                logger.error(f'Statistics not found in FOSS News #{number} ({url}) on Habr in time')
+                return None
+            full_statistics_str = element.text
+
+        logger.debug(f'Full statistics string for FOSS News #{number}: "{full_statistics_str}"')
+        views_count = views_count_from_counter_text(full_statistics_str)
+        if views_count is None:
+            logger.error(f'Invalid statistics format in FOSS News #{number} ({url}) on Habr: {full_statistics_str}')
+        return views_count
@@ -0,0 +1,46 @@
+import functools
+import re
+from urllib.parse import (
+    urlsplit,
+    urlunsplit,
+)
+
+
+CANONICAL_URLS_CACHE_SIZE = 65536
+
+# Whole query parameter or fragment should match, parameters are compared as is, without decoding
+TRACKING_QUERY_PARAMETER_RE = re.compile(r'utm_[^=]*(=.*)?|rss=1')
+TRACKING_FRAGMENT_RE = re.compile(r'ftag=\w+')
+DEFAULT_PORTS = {
+    'http': 80,
+    'https': 443,
+}
+
+
+@functools.lru_cache(maxsize=CANONICAL_URLS_CACHE_SIZE)
+def canonical_url(url: str) -> str:
+    # The same URLs are met many times while rendering and comparing records, so results are memoized
+    if not url:
+        return url
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc
+    if '@' not in netloc:
+        netloc = netloc.lower()
+    default_port = DEFAULT_PORTS.get(scheme)
+    if default_port is not None and netloc.endswith(f':{default_port}'):
+        netloc = netloc[:-len(f':{default_port}')]
+    query = '&'.join(parameter for parameter in parts.query.split('&')
+                     if not TRACKING_QUERY_PARAMETER_RE.fullmatch(parameter))
+    fragment = '' if TRACKING_FRAGMENT_RE.fullmatch(parts.fragment) else parts.fragment
+    if (scheme, netloc, query, fragment) == (parts.scheme, parts.netloc, parts.query, parts.fragment):
+        # Nothing to fix, original string is kept as is, e.g. with empty query after "?"
+        return url
+    return urlunsplit((scheme, netloc, parts.path, query, fragment))
+
+
+def same_urls(first_url: str, second_url: str) -> bool:
+    return canonical_url(first_url) == canonical_url(second_url)
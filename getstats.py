@@ -8,6 +8,8 @@ import logging
 from fntools import (
     logger,
     HabrPostsStatisticsGetter,
+    PostsStatisticsStore,
+    ScrapingSchedule,
     VkPostsStatisticsGetter,
 )
 
@@ -17,12 +19,19 @@ def main():
     if args.debug:
         logger.setLevel(logging.DEBUG)
     config_path = args.FNGS_CONFIG
-    vk_posts_statistics_getter = VkPostsStatisticsGetter(args.SESSIONS_COUNT)
+    store = PostsStatisticsStore(args.store)
+    schedule = ScrapingSchedule() if not args.all else None
+    vk_posts_statistics_getter = VkPostsStatisticsGetter(config_path, args.SESSIONS_COUNT, store=store, schedule=schedule, shards_count=args.shards)
     vk_posts_statistics = vk_posts_statistics_getter.gather_posts_statistics()
-    stats_str = f'{vk_posts_statistics[0]}\t'
-    habr_posts_statistics_getter = HabrPostsStatisticsGetter(config_path, args.SESSIONS_COUNT)
+    # Full VK history is kept in store, only the latest post goes to CSV as before
+    stats_str = f'{vk_posts_statistics[max(vk_posts_statistics.keys())] if vk_posts_statistics else None}\t'
+    habr_posts_statistics_getter = HabrPostsStatisticsGetter(config_path, args.SESSIONS_COUNT, store=store, schedule=schedule, shards_count=args.shards)
     habr_posts_statistics = habr_posts_statistics_getter.gather_posts_statistics()
-    for number in range(max(habr_posts_statistics.keys()) + 1):
+    store.close()
+    if not habr_posts_statistics:
+        # Nothing was due for scraping and store has no history yet
+        logger.warning('No Habr posts statistics gathered')
+    for number in range(max(habr_posts_statistics.keys(), default=-1) + 1):
         if number in habr_posts_statistics:
             stats_str += f'{habr_posts_statistics[number]}\t'
     fout_name = 'stats.csv'
@@ -39,6 +48,20 @@ def parse_command_line_args():
     parser.add_argument('FNGS_CONFIG',
                         help='Config with data for access to remote FOSS News Gathering Server server')
     parser.add_argument('-d', '--debug', action='store_true', help='Debug mode')
+    parser.add_argument('-s',
+                        '--store',
+                        default=PostsStatisticsStore.DEFAULT_PATH,
+                        help='SQLite file with history of views counts, it could not be regenerated, so by default it is '
+                             'kept in current directory next to "stats.csv"')
+    parser.add_argument('-a',
+                        '--all',
+                        action='store_true',
+                        help='Scrape all posts, not only ones due according to schedule (recent issues often, old ones rarely)')
+    parser.add_argument('-j',
+                        '--shards',
+                        type=int,
+                        default=1,
+                        help='Scrape posts in several processes, sessions are split between them')
     args = parser.parse_args()
     return args
 
@@ -3,15 +3,43 @@
 
 import argparse
 import logging
+import os
 import sys
+import time
+from multiprocessing import Pool
 
 from fntools import (
     logger,
     HtmlFormat,
     DigestRecordsCollection,
+    convert_to_html,
 )
 
 
+def parse_digest_numbers(digest_numbers_str: str):
+    digest_numbers = []
+    for part in digest_numbers_str.split(','):
+        if '-' in part:
+            first_str, last_str = part.split('-', 1)
+            first, last = int(first_str), int(last_str)
+            if first > last:
+                raise ValueError(f'range "{part}" is reversed')
+            digest_numbers += range(first, last + 1)
+        else:
+            digest_numbers.append(int(part))
+    return sorted(set(digest_numbers))
+
+
+def parse_formats(formats_str: str):
+    formats = []
+    for format_name in formats_str.split(','):
+        if format_name not in [f.name for f in HtmlFormat]:
+            raise argparse.ArgumentTypeError(f'invalid format "{format_name}", choose from {", ".join(f.name for f in HtmlFormat)}')
+        if format_name not in formats:
+            formats.append(format_name)
+    return formats
+
+
 def parse_command_line_args():
     parser = argparse.ArgumentParser(
                         description='FOSS News Converter')
@@ -19,27 +47,84 @@ def parse_command_line_args():
                         '--debug',
                         action='store_true',
                         help='Enable debug output')
+    parser.add_argument('-m',
+                        '--mirror',
+                        action='store_true',
+                        help='Load digest records from local mirror synced by "syncmirror.py" instead of server')
+    parser.add_argument('--mirror-path',
+                        help='SQLite mirror file, by default it is kept in cache directory separately for every server')
+    parser.add_argument('-j',
+                        '--processes',
+                        type=int,
+                        default=os.cpu_count(),
+                        help='Rendering processes count in batch mode')
     parser.add_argument('FNGS_CONFIG',
                         help='Config with data for access to remote FOSS News Gathering Server server')
     parser.add_argument('FORMAT',
-                        help='Output format',
-                        choices=[f.name for f in HtmlFormat])
+                        type=parse_formats,
+                        help=f'Output format ({", ".join(f.name for f in HtmlFormat)}), several formats could be separated by commas')
     parser.add_argument('DIGEST_NUMBER',
-                        help='Digest number')
+                        help='Digest number, range like "120-125" or comma-separated list of numbers and ranges')
     parser.add_argument('DESTINATION',
-                        help='Destination HTML file')
+                        help='Destination HTML file, when several digest numbers or formats are given it should contain '
+                             '"{number}" and/or "{format}" placeholders, e.g. "fn-{number}-{format}.html"')
     args = parser.parse_args()
+    try:
+        args.DIGEST_NUMBER = parse_digest_numbers(args.DIGEST_NUMBER)
+    except ValueError as e:
+        parser.error(f'invalid digest number "{args.DIGEST_NUMBER}": {e}')
+    if not args.DIGEST_NUMBER:
+        parser.error('no digest numbers given')
+    if len(args.DIGEST_NUMBER) > 1 and '{number}' not in args.DESTINATION:
+        parser.error('DESTINATION should contain "{number}" placeholder when several digest numbers are given')
+    if len(args.FORMAT) > 1 and '{format}' not in args.DESTINATION:
+        parser.error('DESTINATION should contain "{format}" placeholder when several formats are given')
     if args.debug:
         logger.setLevel(logging.DEBUG)
     return args
 
 
+def destination_path(destination_template: str, digest_number: int, format_name: str):
+    return destination_template.replace('{number}', str(digest_number)).replace('{format}', format_name.lower())
+
+
+def render_batch(args):
+    stages_seconds = {}
+    begin_time = time.perf_counter()
+    digest_records_collection = DigestRecordsCollection(args.FNGS_CONFIG)
+    if args.mirror:
+        digest_issues_collections = digest_records_collection.load_digest_issues_from_mirror(args.DIGEST_NUMBER, args.mirror_path)
+    else:
+        digest_issues_collections = digest_records_collection.load_digest_issues_from_server_async(args.DIGEST_NUMBER)
+    stages_seconds['fetch'] = time.perf_counter() - begin_time
+
+    begin_time = time.perf_counter()
+    jobs = [(format_name, collection.records, collection.similar_records, destination_path(args.DESTINATION, digest_number, format_name))
+            for digest_number, collection in digest_issues_collections.items()
+            for format_name in args.FORMAT]
+    with Pool(max(1, min(args.processes, len(jobs)))) as processes_pool:
+        jobs_seconds = processes_pool.starmap(convert_to_html, jobs)
+    stages_seconds['render'] = time.perf_counter() - begin_time
+
+    logger.info(f'Rendered {len(jobs)} file(s) for {len(digest_issues_collections)} digest issue(s) in {len(args.FORMAT)} format(s)')
+    logger.info(f'Fetch: {stages_seconds["fetch"]:.2f}s, '
+                f'render: {stages_seconds["render"]:.2f}s wall '
+                f'(grouping {sum(s[0] for s in jobs_seconds):.2f}s and writing {sum(s[1] for s in jobs_seconds):.2f}s summed over processes)')
+
+
 def main():
     args = parse_command_line_args()
+    if len(args.DIGEST_NUMBER) > 1 or len(args.FORMAT) > 1:
+        render_batch(args)
+        return
+    digest_number = args.DIGEST_NUMBER[0]
+    format_name = args.FORMAT[0]
     digest_records_collection = DigestRecordsCollection(args.FNGS_CONFIG)
-    # TODO: Check digest number if it is int
-    digest_records_collection.load_specific_digest_records_from_server(int(args.DIGEST_NUMBER))
-    digest_records_collection.records_to_html(args.FORMAT, args.DESTINATION)
+    if args.mirror:
+        digest_records_collection.load_specific_digest_records_from_mirror(digest_number, args.mirror_path)
+    else:
+        digest_records_collection.load_specific_digest_records_from_server(digest_number, lazy=True)
+    digest_records_collection.records_to_html(format_name, destination_path(args.DESTINATION, digest_number, format_name))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# PYTHON_ARGCOMPLETE_OK
+
+import argparse
+import logging
+import sys
+
+from fntools import (
+    DigestDataMirror,
+    logger,
+)
+
+
+def parse_command_line_args():
+    parser = argparse.ArgumentParser(description='Sync local mirror of FOSS News Gathering Server digest data')
+    parser.add_argument('-d', '--debug', action='store_true', help='Debug mode')
+    parser.add_argument('-f',
+                        '--full',
+                        action='store_true',
+                        help='Pull all digest issues, not only ones changed since previous sync')
+    parser.add_argument('-i',
+                        '--digest-issue',
+                        type=int,
+                        action='append',
+                        help='Pull only specified digest number, could be repeated')
+    parser.add_argument('-m',
+                        '--mirror-path',
+                        help='SQLite mirror file, by default it is kept in cache directory separately for every server')
+    parser.add_argument('FNGS_CONFIG',
+                        help='Config with data for access to remote FOSS News Gathering Server server')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_command_line_args()
+    if args.debug:
+        logger.setLevel(logging.DEBUG)
+    with DigestDataMirror(args.FNGS_CONFIG, args.mirror_path) as mirror:
+        synced_digest_issues = mirror.sync(full=args.full, digest_issues=args.digest_issue)
+    logger.info(f'Synced digest number(s): {", ".join(f"#{n}" for n in synced_digest_issues)}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import base64
+import json
+import os
+import sys
+import threading
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fntools.networking import (
+    HttpResponseCache,
+    HttpSessionPool,
+    NetworkingMixin,
+    RetryPolicy,
+)
+
+
+class StubServer:
+    # Local HTTP/1.1 server with keep-alive, handlers are registered by path prefix and return (status, headers, body)
+
+    def __init__(self):
+        self.handlers = {}
+        self.requests = []
+        self.client_ports = set()
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _handle(self):
+                content_length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(content_length) if content_length else b''
+                self.body = body
+                with stub._lock:
+                    stub.requests.append((self.command, self.path, dict(self.headers), body))
+                    stub.client_ports.add(self.client_address[1])
+                handler = stub._handler_for(self.path)
+                if handler is None:
+                    status, headers, response_body = 404, {}, b'{}'
+                else:
+                    status, headers, response_body = handler(self)
+                if isinstance(response_body, (dict, list)):
+                    response_body = json.dumps(response_body).encode()
+                elif isinstance(response_body, str):
+                    response_body = response_body.encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(response_body)))
+                self.end_headers()
+                self.wfile.write(response_body)
+
+            do_GET = _handle
+            do_PATCH = _handle
+            do_POST = _handle
+
+        class Server(ThreadingHTTPServer):
+            # Default listen backlog of 5 drops connections of concurrent clients
+            request_queue_size = 128
+
+        self._server = Server(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    def route(self, path_prefix: str, handler):
+        self.handlers[path_prefix] = handler
+
+    def _handler_for(self, path: str):
+        matched_prefixes = [prefix for prefix in self.handlers if path.startswith(prefix)]
+        if not matched_prefixes:
+            return None
+        return self.handlers[max(matched_prefixes, key=len)]
+
+    def requests_to(self, path_prefix: str):
+        with self._lock:
+            return [request for request in self.requests if request[1].startswith(path_prefix)]
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(autouse=True)
+def isolated_networking(tmp_path, monkeypatch):
+    # Shared networking state is replaced for every test, so tests neither touch user cache nor wait for long backoffs
+    import fntools.networking
+    import fntools.records
+    monkeypatch.setattr(fntools.networking, 'CACHE_DIRECTORY', str(tmp_path / 'cache'))
+    monkeypatch.setattr(fntools.records, 'CACHE_DIRECTORY', str(tmp_path / 'cache'))
+    monkeypatch.setattr(fntools.records, 'DATA_DIRECTORY', str(tmp_path / 'data'))
+    session_pool = HttpSessionPool()
+    monkeypatch.setattr(NetworkingMixin, 'http_session_pool', session_pool)
+    monkeypatch.setattr(NetworkingMixin, 'retry_policy', RetryPolicy(base_delay_seconds=0.01, max_delay_seconds=0.05))
+    monkeypatch.setattr(NetworkingMixin, 'http_response_cache', HttpResponseCache(str(tmp_path / 'http-cache.sqlite3')))
+    yield
+    NetworkingMixin.http_session_pool.close()
+    session_pool.close()
+    if NetworkingMixin.http_response_cache is not None:
+        NetworkingMixin.http_response_cache.close()
+
+
+def paginated_handler(items, page_size: int):
+    # Django REST framework style page number pagination
+    def handler(request):
+        from urllib.parse import parse_qsl, urlparse
+        query = dict(parse_qsl(urlparse(request.path).query))
+        page = int(query.get('page', 1))
+        results = items[(page - 1) * page_size:page * page_size]
+        next_url = None
+        if page * page_size < len(items):
+            base_path = urlparse(request.path).path
+            next_url = f'http://{request.headers["Host"]}{base_path}?page={page + 1}&page_size={page_size}'
+        return 200, {'Content-Type': 'application/json'}, {'count': len(items), 'results': results, 'links': {'next': next_url}}
+    return handler
+
+
+def fake_jwt(expiration_time: float, subject: str = 'user'):
+    payload = base64.urlsafe_b64encode(json.dumps({'exp': expiration_time, 'sub': subject}).encode()).decode().rstrip('=')
+    return f'header.{payload}.signature'
+
+
+@pytest.fixture
+def fngs_config(stub_server, tmp_path):
+    # Config of FNGS served by stub server, login returns long-living tokens
+    import time
+    stub_server.route('/api/v2/auth/token/', lambda request: (200, {}, {'access': fake_jwt(time.time() + 3600, 'access'),
+                                                                        'refresh': fake_jwt(time.time() + 7200, 'refresh')}))
+    port = stub_server.url.rsplit(':', 1)[1]
+    config_path = tmp_path / 'fngs.yaml'
+    config_path.write_text(f'host: 127.0.0.1\nprotocol: http\nport: {port}\nuser: user\npassword: password\n')
+    return str(config_path)
+
+
+def digest_record_plain(drid: int, digest_issue: int = 1, **fields):
+    # Digest record in format of FNGS "digest-record/detailed" endpoint
+    record_plain = {
+        'id': drid,
+        'dt': '2022-01-01T10:00:00.000000Z',
+        'title': f'Record {drid}',
+        'url': f'https://example.com/{drid}',
+        'additional_url': None,
+        'digest_issue': digest_issue,
+        'is_main': False,
+        'title_keywords': [],
+        'language': 'ENGLISH',
+        'tbot_estimations': [],
+        'state': 'UNKNOWN',
+        'content_type': None,
+        'content_category': None,
+    }
+    record_plain.update(fields)
+    return record_plain
@@ -0,0 +1,110 @@
+import json
+import re
+from urllib.parse import urlparse
+
+import pytest
+from conftest import digest_record_plain
+
+from fntools.records import DigestRecordsCollection
+
+
+class StubCategorizationServer:
+    # FNGS part used by interactive categorizer, another operator is simulated by changing or deleting records
+
+    def __init__(self, stub_server, drids):
+        self.records = {drid: digest_record_plain(drid, digest_issue=None) for drid in drids}
+        # Records categorized by another operator as soon as they are requested by this one
+        self.taken_drids = set()
+        self.mutations = []
+        stub_server.route('/api/v2/tbot/digest-record/categorized/', lambda request: (200, {}, {}))
+        stub_server.route('/api/v2/gatherer/keyword', lambda request: (200, {}, {'count': 0, 'results': [], 'links': {'next': None}}))
+        stub_server.route('/api/v2/gatherer/content-category/guess/', lambda request: (200, {}, {'matches': {}}))
+        stub_server.route('/api/v2/gatherer/digest-record/not-categorized/count/', self._count)
+        stub_server.route('/api/v2/gatherer/digest-record/not-categorized/oldest/', self._oldest)
+        stub_server.route('/api/v2/gatherer/digest-record/', self._record)
+
+    def _not_categorized(self):
+        return [record for drid, record in sorted(self.records.items()) if record['state'] == 'UNKNOWN']
+
+    def _count(self, request):
+        return 200, {}, {'count': len(self._not_categorized())}
+
+    def _oldest(self, request):
+        return 200, {}, {'count': 1, 'results': self._not_categorized()[:1], 'links': {'next': None}}
+
+    def _record(self, request):
+        drid = int(re.fullmatch(r'/api/v2/gatherer/digest-record/(\d+)/?', urlparse(request.path).path).group(1))
+        if drid not in self.records:
+            return 404, {}, {'detail': 'Not found.'}
+        if request.command == 'PATCH':
+            fields = json.loads(request.body)
+            self.mutations.append(('patch', drid))
+            self.records[drid].update({k: v for k, v in fields.items() if k != 'id'})
+            return 200, {}, self.records[drid]
+        if drid in self.taken_drids:
+            self.records[drid]['state'] = 'IGNORED'
+        return 200, {}, self.records[drid]
+
+
+@pytest.fixture
+def operator_inputs(monkeypatch):
+    # Digest number and then "ignored" state for every record, callbacks are called when record is shown to operator
+    prompts = []
+    answers = iter(['1'] + ['5'] * 100)
+    on_record_shown = {}
+
+    def fake_input(prompt=''):
+        prompts.append(prompt)
+        shown_drid = shown_drids([prompt])
+        if shown_drid and shown_drid[0] in on_record_shown:
+            on_record_shown[shown_drid[0]]()
+        return next(answers)
+
+    monkeypatch.setattr('builtins.input', fake_input)
+    return prompts, on_record_shown
+
+
+def shown_drids(prompts):
+    return [int(re.search(r'"Record (\d+)"', prompt).group(1)) for prompt in prompts if 'digest record state' in prompt]
+
+
+def test_record_categorized_by_other_operator_is_neither_shown_nor_changed(stub_server, fngs_config, operator_inputs):
+    prompts, _ = operator_inputs
+    server = StubCategorizationServer(stub_server, [1, 2, 3])
+    server.taken_drids.add(2)
+    collection = DigestRecordsCollection(fngs_config, bot_only=False)
+    collection.categorize_interactively()
+
+    assert shown_drids(prompts) == [1, 3]
+    assert server.mutations == [('patch', 1), ('patch', 3)]
+    # Only endpoints which FNGS has are used
+    assert {request[0] for request in stub_server.requests} <= {'GET', 'POST', 'PATCH'}
+    assert not [request for request in stub_server.requests if '/claim/' in request[1] or '/not-categorized/?' in request[1]]
+
+
+@pytest.mark.parametrize('change', ['categorized', 'deleted'])
+def test_record_changed_by_other_operator_while_shown_is_not_uploaded(stub_server, fngs_config, operator_inputs, change):
+    prompts, on_record_shown = operator_inputs
+    server = StubCategorizationServer(stub_server, [1, 2, 3])
+
+    def change_record():
+        if change == 'categorized':
+            server.records[2]['state'] = 'IN_DIGEST'
+        else:
+            del server.records[2]
+    on_record_shown[2] = change_record
+    collection = DigestRecordsCollection(fngs_config, bot_only=False)
+    collection.categorize_interactively()
+
+    assert shown_drids(prompts) == [1, 2, 3]
+    assert server.mutations == [('patch', 1), ('patch', 3)]
+
+
+def test_deleted_record_is_not_categorized_anymore(stub_server, fngs_config):
+    StubCategorizationServer(stub_server, [1])
+    collection = DigestRecordsCollection(fngs_config, bot_only=False)
+    collection._load_config(fngs_config)
+    collection._login()
+    assert collection._digest_record_by_id(2) is None
+    assert not collection._is_still_not_categorized(2)
+    assert collection._is_still_not_categorized(1)
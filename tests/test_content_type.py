@@ -0,0 +1,25 @@
+from benchmarks.bench_content_type import (
+    fngs_keywords,
+    sequential_guess_content_type,
+    titles_corpus,
+)
+
+from data.digestrecordcontenttype import DigestRecordContentType
+from fntools.records import TitleContentTypeClassifier
+
+
+def test_classifier_matches_sequential_scans():
+    keywords = fngs_keywords()
+    classifier = TitleContentTypeClassifier(keywords)
+    for title, url in titles_corpus(2000):
+        assert classifier.classify(title, url) == sequential_guess_content_type(title, url, keywords), title
+
+
+def test_special_cases_priority():
+    classifier = TitleContentTypeClassifier(fngs_keywords())
+    assert classifier.classify('Beta of something', 'https://www.youtube.com/watch?v=1') == DigestRecordContentType.VIDEOS
+    assert classifier.classify('SD Times Open-Source Project of the Week: release', 'https://example.com') == DigestRecordContentType.OTHER
+    assert classifier.classify('weeklyosm 600', 'https://example.com') is None
+    assert classifier.classify('DEF CON 30 Cloud Village guide', 'https://example.com') == DigestRecordContentType.VIDEOS
+    assert classifier.classify('Firefox 100 guide', 'https://example.com') == DigestRecordContentType.ARTICLES
+    assert classifier.classify('Firefox 100', 'https://example.com') == DigestRecordContentType.RELEASES
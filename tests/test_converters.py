@@ -0,0 +1,20 @@
+import os
+
+import pytest
+from benchmarks.bench_converters import synthetic_digest
+
+from fntools import HtmlFormat
+from fntools.converters import html_converter_class
+
+
+GOLDEN_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+
+
+@pytest.mark.parametrize('html_format', [HtmlFormat.HABR, HtmlFormat.REDDIT])
+def test_converter_output_matches_golden_file(html_format, tmp_path):
+    # Golden files were rendered by converters which built whole digest as one string, before output streaming
+    records, similar_records = synthetic_digest()
+    html_path = tmp_path / 'digest.html'
+    html_converter_class(html_format.name)(records, similar_records).convert(str(html_path))
+    with open(os.path.join(GOLDEN_DIRECTORY, f'digest-{html_format.value}.html')) as fin:
+        assert html_path.read_text() == fin.read()
@@ -0,0 +1,80 @@
+import json
+
+from fntools.networking import NetworkingMixin
+
+
+class VersionedHandler:
+    # Endpoint with ETag validator, body is sent only when client does not have current version
+
+    def __init__(self):
+        self.version = 1
+
+    @property
+    def etag(self):
+        return f'"v{self.version}"'
+
+    def __call__(self, request):
+        if request.headers.get('If-None-Match') == self.etag:
+            return 304, {'ETag': self.etag}, b''
+        return 200, {'ETag': self.etag, 'Content-Type': 'application/json'}, {'version': self.version}
+
+
+def test_stale_entry_is_revalidated_with_etag(stub_server):
+    handler = VersionedHandler()
+    path = '/api/v2/gatherer/similar-digest-record/detailed/'
+    stub_server.route(path, handler)
+    url = f'{stub_server.url}{path}'
+    cache = NetworkingMixin.http_response_cache
+
+    for _ in range(3):
+        response = NetworkingMixin.get_with_retries(url)
+        assert json.loads(response.content) == {'version': 1}
+    requests = stub_server.requests_to(path)
+    # Zero TTL, so every call goes to server, but only the first one gets body
+    assert len(requests) == 3
+    assert 'If-None-Match' not in requests[0][2]
+    assert [request[2].get('If-None-Match') for request in requests[1:]] == ['"v1"', '"v1"']
+    assert cache.counters['revalidations'] == 2
+    assert cache.counters['misses'] == 1
+
+    handler.version = 2
+    response = NetworkingMixin.get_with_retries(url)
+    assert json.loads(response.content) == {'version': 2}
+    assert json.loads(NetworkingMixin.get_with_retries(url).content) == {'version': 2}
+    assert cache.counters['revalidations'] == 3
+
+
+def test_fresh_entry_is_returned_without_request(stub_server):
+    handler = VersionedHandler()
+    path = '/api/v2/gatherer/keyword'
+    stub_server.route(path, handler)
+    url = f'{stub_server.url}{path}'
+
+    assert json.loads(NetworkingMixin.get_with_retries(url).content) == {'version': 1}
+    handler.version = 2
+    response = NetworkingMixin.get_with_retries(url)
+    assert response.from_cache
+    assert json.loads(response.content) == {'version': 1}
+    assert len(stub_server.requests_to(path)) == 1
+    assert NetworkingMixin.http_response_cache.counters['hits'] == 1
+
+
+def test_entries_are_not_shared_between_users(stub_server):
+    from fntools.networking import AuthHeaders
+
+    path = '/api/v2/gatherer/keyword'
+    stub_server.route(path, lambda request: (200, {}, {'user': request.headers['Authorization']}))
+    url = f'{stub_server.url}{path}'
+
+    for token in ('first', 'second', 'first', 'second'):
+        response = NetworkingMixin.get_with_retries(url, headers={'Authorization': f'Bearer {token}'})
+        assert json.loads(response.content) == {'user': f'Bearer {token}'}
+    assert len(stub_server.requests_to(path)) == 2
+
+    # Entry of user is kept when access token is refreshed
+    def user_headers(user, token):
+        return AuthHeaders({'Authorization': f'Bearer {token}'}, None, identity=f'{stub_server.url}/{user}')
+    assert json.loads(NetworkingMixin.get_with_retries(url, headers=user_headers('user', 'old')).content) == {'user': 'Bearer old'}
+    assert json.loads(NetworkingMixin.get_with_retries(url, headers=user_headers('user', 'new')).content) == {'user': 'Bearer old'}
+    assert json.loads(NetworkingMixin.get_with_retries(url, headers=user_headers('other', 'new')).content) == {'user': 'Bearer new'}
+    assert len(stub_server.requests_to(path)) == 4
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from benchmarks.bench_startup import (
+    CLI_IMPORT_BUDGETS_MS,
+    ImportFailed,
+    measure_import,
+)
+
+
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize('import_statement', ['import fntools', 'from fntools import logger'])
+def test_package_import_does_not_load_heavy_dependencies(import_statement):
+    # Fresh interpreter is needed, other tests have already imported everything
+    code = f'{import_statement}\nimport sys\nprint(",".join(sorted(m for m in ("requests", "selenium") if m in sys.modules)))'
+    result = subprocess.run([sys.executable, '-c', code], cwd=REPOSITORY_DIRECTORY, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
+
+
+def test_lazy_attribute_loads_its_module():
+    code = 'import fntools\nimport sys\nfntools.DigestRecordsCollection\nprint("requests" in sys.modules)'
+    result = subprocess.run([sys.executable, '-c', code], cwd=REPOSITORY_DIRECTORY, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'True'
+
+
+@pytest.mark.parametrize('module_name', list(CLI_IMPORT_BUDGETS_MS))
+def test_cli_script_starts_within_budget(module_name):
+    try:
+        import_ms, loaded_forbidden_modules = measure_import(module_name)
+    except ImportFailed as e:
+        pytest.skip(f'Script dependencies are not installed: {e}')
+    assert import_ms <= CLI_IMPORT_BUDGETS_MS[module_name]
+    assert loaded_forbidden_modules == []
@@ -0,0 +1,48 @@
+import pytest
+from conftest import (
+    digest_record_plain,
+    paginated_handler,
+)
+
+from fntools.mirror import DigestDataMirror
+from fntools.records import DigestRecordsCollection
+
+
+def mirror_stub_routes(stub_server, digest_issues, failing_digest_issues=()):
+    stub_server.route('/api/v2/gatherer/digest-issue/', paginated_handler([{'number': n} for n in digest_issues], page_size=100))
+    stub_server.route('/api/v2/gatherer/keyword', paginated_handler([], page_size=100))
+    stub_server.route('/api/v2/gatherer/similar-digest-record/detailed/', paginated_handler([], page_size=100))
+
+    def records_handler(request):
+        digest_issue = int(request.path.split('digest_issue=')[1].split('&')[0])
+        if digest_issue in failing_digest_issues:
+            return 500, {}, {}
+        return paginated_handler([digest_record_plain(digest_issue * 10 + i, digest_issue) for i in range(3)], page_size=100)(request)
+    stub_server.route('/api/v2/gatherer/digest-record/detailed/', records_handler)
+
+
+def test_sync_of_specified_digest_issues_does_not_move_cursor(stub_server, fngs_config, tmp_path):
+    mirror_stub_routes(stub_server, [1, 2, 3])
+    with DigestDataMirror(fngs_config, str(tmp_path / 'mirror.sqlite3')) as mirror:
+        assert mirror.sync(digest_issues=[1]) == [1]
+        assert mirror.last_synced_digest_issue is None
+        assert mirror.has_digest_issue(1)
+        # Listed on server, but not pulled
+        assert not mirror.has_digest_issue(3)
+        assert mirror.sync() == [1, 2, 3]
+        assert mirror.last_synced_digest_issue == 3
+
+
+def test_interrupted_sync_does_not_move_cursor(stub_server, fngs_config, tmp_path):
+    mirror_stub_routes(stub_server, [1, 2, 3], failing_digest_issues=[2])
+    mirror_path = str(tmp_path / 'mirror.sqlite3')
+    with DigestDataMirror(fngs_config, mirror_path) as mirror:
+        with pytest.raises(Exception):
+            mirror.sync()
+        assert mirror.last_synced_digest_issue is None
+        assert mirror.has_digest_issue(1)
+        assert not mirror.has_digest_issue(2)
+
+    collection = DigestRecordsCollection(fngs_config)
+    with pytest.raises(Exception, match='sync it first'):
+        collection.load_specific_digest_records_from_mirror(2, mirror_path)
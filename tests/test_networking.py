@@ -0,0 +1,294 @@
+import pytest
+from conftest import paginated_handler
+
+from fntools.networking import (
+    NetworkingMixin,
+    ServerConnectionMixin,
+)
+
+
+def test_paginated_calls_reuse_pool_threads_sessions(stub_server):
+    items = [{'id': i} for i in range(50)]
+    stub_server.route('/items/', paginated_handler(items, page_size=5))
+    for _ in range(5):
+        results = NetworkingMixin.get_results_from_all_pages(f'{stub_server.url}/items/', headers={}, workers_count=4)
+        assert results == items
+    # Calling thread and pool workers only, not new sessions for every call
+    assert NetworkingMixin.http_session_pool.sessions_count <= 1 + 4
+    # Keep-alive connections are reused between calls
+    assert len(stub_server.client_ports) <= 1 + 4
+
+
+
+def test_threads_pools_are_kept_for_every_workers_count():
+    import threading
+    import time
+
+    session_pool = NetworkingMixin.http_session_pool
+    threads_ids = set()
+
+    def remember_thread(item):
+        # Every worker gets a task
+        time.sleep(0.01)
+        threads_ids.add(threading.get_ident())
+        return item
+
+    for _ in range(5):
+        for workers_count in (2, 3):
+            assert session_pool.map(remember_thread, range(6), workers_count) == list(range(6))
+    # Pool is not closed and replaced when another thread calls map with different workers count
+    assert len(threads_ids) <= 2 + 3
+
+
+def test_nested_map_from_pool_worker_does_not_deadlock():
+    import threading
+
+    session_pool = NetworkingMixin.http_session_pool
+    result = []
+
+    def nested_map():
+        result.append(session_pool.map(lambda i: session_pool.map(lambda j: i * 10 + j, range(3), 2), range(4), 2))
+
+    thread = threading.Thread(target=nested_map, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert result == [[[i * 10 + j for j in range(3)] for i in range(4)]]
+
+def test_async_client_keeps_requests_in_flight(stub_server):
+    import asyncio
+    import time
+    from fntools.networking import AsyncNetworkingClient
+
+    response_delay_seconds = 0.05
+    requests_count = 100
+
+    def slow_handler(request):
+        time.sleep(response_delay_seconds)
+        return 200, {}, {'path': request.path}
+    stub_server.route('/slow/', slow_handler)
+
+    async def fetch_all():
+        async with AsyncNetworkingClient(max_in_flight=50) as client:
+            return await asyncio.gather(*[client.get_with_retries(f'{stub_server.url}/slow/{i}') for i in range(requests_count)])
+
+    begin_time = time.perf_counter()
+    responses = asyncio.run(fetch_all())
+    elapsed_seconds = time.perf_counter() - begin_time
+    assert [response.status_code for response in responses] == [200] * requests_count
+    # Sequential requests would take at least 5 seconds
+    assert elapsed_seconds < requests_count * response_delay_seconds / 4
+
+
+def test_async_response_headers_are_case_insensitive(stub_server):
+    import asyncio
+    from fntools.networking import AsyncNetworkingClient
+
+    stub_server.route('/limited/', lambda request: (200, {'x-fngs-records-left': '0'}, {}))
+
+    async def fetch():
+        async with AsyncNetworkingClient() as client:
+            return await client.request_with_retries(f'{stub_server.url}/limited/')
+
+    response = asyncio.run(fetch())
+    assert response.headers.get('X-FNGS-Records-Left') == '0'
+
+
+class FaultyHandler:
+    # Server failure modes, "broken" response body can not be decoded by client, which is not a timeout
+
+    def __init__(self):
+        self.mode = 'ok'
+
+    def __call__(self, request):
+        if self.mode == 'unavailable':
+            return 503, {}, {}
+        if self.mode == 'broken':
+            return 200, {'Content-Encoding': 'gzip'}, b'not gzip at all'
+        if self.mode == 'slow':
+            import time
+            time.sleep(1)
+        return 200, {}, {'ok': True}
+
+
+def open_circuit_breaker(stub_server, monkeypatch, faulty_handler):
+    import time
+    from fntools.networking import RetryPolicy
+
+    retry_policy = RetryPolicy(max_attempts=1, circuit_breaker_failures_threshold=1, circuit_breaker_reset_timeout_seconds=0.05)
+    monkeypatch.setattr(NetworkingMixin, 'retry_policy', retry_policy)
+    stub_server.route('/faulty/', faulty_handler)
+    faulty_handler.mode = 'unavailable'
+    assert NetworkingMixin.request_with_retries(f'{stub_server.url}/faulty/').status_code == 503
+    circuit_breaker = retry_policy.circuit_breaker_for(stub_server.url)
+    assert circuit_breaker.state == circuit_breaker.State.OPEN
+    # Next request is the half-open probe
+    time.sleep(0.1)
+    return circuit_breaker
+
+
+def test_circuit_breaker_probe_is_released_after_unexpected_exception(stub_server, monkeypatch):
+    import time
+    import requests
+
+    faulty_handler = FaultyHandler()
+    circuit_breaker = open_circuit_breaker(stub_server, monkeypatch, faulty_handler)
+    faulty_handler.mode = 'broken'
+    with pytest.raises(requests.exceptions.ContentDecodingError):
+        NetworkingMixin.request_with_retries(f'{stub_server.url}/faulty/')
+    assert circuit_breaker.state == circuit_breaker.State.OPEN
+    assert not circuit_breaker._probe_in_flight
+
+    time.sleep(0.1)
+    faulty_handler.mode = 'ok'
+    begin_time = time.perf_counter()
+    assert NetworkingMixin.request_with_retries(f'{stub_server.url}/faulty/').status_code == 200
+    assert time.perf_counter() - begin_time < circuit_breaker.PROBE_WAIT_SECONDS
+    assert circuit_breaker.state == circuit_breaker.State.CLOSED
+
+
+def test_circuit_breaker_probe_is_released_after_cancellation(stub_server, monkeypatch):
+    import asyncio
+    from fntools.networking import AsyncNetworkingClient
+
+    faulty_handler = FaultyHandler()
+    circuit_breaker = open_circuit_breaker(stub_server, monkeypatch, faulty_handler)
+    faulty_handler.mode = 'slow'
+
+    async def cancelled_probe():
+        async with AsyncNetworkingClient() as client:
+            try:
+                await asyncio.wait_for(client.request_with_retries(f'{stub_server.url}/faulty/'), timeout=0.1)
+            except asyncio.TimeoutError:
+                return True
+        return False
+
+    assert asyncio.run(cancelled_probe())
+    assert circuit_breaker.state == circuit_breaker.State.OPEN
+    assert not circuit_breaker._probe_in_flight
+
+
+class FngsClient(NetworkingMixin, ServerConnectionMixin):
+    pass
+
+
+def expiring_token_routes(stub_server, fresh_token_statuses=()):
+    # Token issued by login is already rejected by server, refreshed one is accepted after given statuses
+    import time
+    from conftest import fake_jwt
+
+    fresh_token = fake_jwt(time.time() + 3600, 'fresh')
+    fresh_token_statuses = iter(fresh_token_statuses)
+    stub_server.route('/api/v2/auth/token/refresh/', lambda request: (200, {}, {'access': fresh_token}))
+    stub_server.route('/api/v2/gatherer/protected/',
+                      lambda request: (next(fresh_token_statuses, 200), {}, {}) if request.headers['Authorization'] == f'Bearer {fresh_token}' else (401, {}, {}))
+    return f'{stub_server.url}/api/v2/gatherer/protected/'
+
+
+def test_auth_refresh_does_not_take_attempt(stub_server, fngs_config, monkeypatch):
+    from fntools.networking import RetryPolicy
+
+    monkeypatch.setattr(NetworkingMixin, 'retry_policy', RetryPolicy(max_attempts=2, base_delay_seconds=0.01))
+    # Both attempts are left for request with refreshed token
+    url = expiring_token_routes(stub_server, fresh_token_statuses=[503])
+    client = FngsClient()
+    client._load_config(fngs_config)
+    client._login()
+    response = client.get_with_retries(url, client._auth_headers)
+    assert response.status_code == 200
+    assert len(stub_server.requests_to('/api/v2/auth/token/refresh/')) == 1
+
+
+def test_async_auth_refresh_does_not_block_event_loop(stub_server, fngs_config, monkeypatch):
+    import asyncio
+    from fntools.networking import (
+        AsyncNetworkingClient,
+        RetryPolicy,
+    )
+
+    monkeypatch.setattr(NetworkingMixin, 'retry_policy', RetryPolicy(max_attempts=1))
+    url = expiring_token_routes(stub_server)
+    client = FngsClient()
+    client._load_config(fngs_config)
+    client._login()
+    monkeypatch.setattr(client, '_refresh_auth_headers', lambda *args: pytest.fail('Blocking refresh is called from event loop'))
+
+    async def fetch_all():
+        async with AsyncNetworkingClient() as async_client:
+            return await asyncio.gather(*[async_client.request_with_retries(url, client._auth_headers) for _ in range(5)])
+
+    responses = asyncio.run(fetch_all())
+    assert [response.status_code for response in responses] == [200] * 5
+    # Concurrent 401 responses lead to one refresh
+    assert len(stub_server.requests_to('/api/v2/auth/token/refresh/')) == 1
+
+
+def test_endpoints_attempts_budgets_match_path_prefixes():
+    from fntools.networking import RetryPolicy
+
+    retry_policy = RetryPolicy(max_attempts=10, endpoints_max_attempts={'/api/v2/gatherer/keyword': 3})
+    assert retry_policy.max_attempts_for('http://fngs/api/v2/gatherer/keyword/?page=2') == 3
+    assert retry_policy.max_attempts_for('http://fngs/api/v2/gatherer/digest-record/?search=/api/v2/gatherer/keyword') == 10
+    assert retry_policy.max_attempts_for('http://fngs/proxy/api/v2/gatherer/keyword') == 10
+    assert RetryPolicy().max_attempts_for('http://fngs/api/v2/auth/token/') == 5
+
+
+@pytest.mark.parametrize('transport', ['sync', 'async'])
+def test_per_call_retry_policy_is_used_by_both_transports(stub_server, transport):
+    import asyncio
+    from fntools.networking import (
+        AsyncNetworkingClient,
+        RetryPolicy,
+    )
+
+    stub_server.route('/unavailable/', lambda request: (503, {}, {}))
+    url = f'{stub_server.url}/unavailable/'
+    retry_policy = RetryPolicy(max_attempts=2, base_delay_seconds=0.01)
+
+    async def request_async():
+        async with AsyncNetworkingClient() as client:
+            return await client.request_with_retries(url, retry_policy=retry_policy)
+
+    if transport == 'sync':
+        response = NetworkingMixin.request_with_retries(url, retry_policy=retry_policy)
+    else:
+        response = asyncio.run(request_async())
+    assert response.status_code == 503
+    assert len(stub_server.requests_to('/unavailable/')) == 2
+
+
+@pytest.mark.parametrize('transport', ['sync', 'async'])
+def test_login_uses_cached_refresh_token(stub_server, fngs_config, transport):
+    import asyncio
+    import time
+    from conftest import fake_jwt
+    from fntools.networking import AsyncNetworkingClient
+
+    stub_server.route('/api/v2/auth/token/refresh/', lambda request: (200, {}, {'access': fake_jwt(time.time() + 3600, 'fresh')}))
+    client = FngsClient()
+    client._load_config(fngs_config)
+    token_store = client._token_store
+    # Access token saved by previous run is expired, refresh one is still alive
+    token_store.save(client._token_store_key, {'access': fake_jwt(time.time() - 10, 'access'),
+                                               'refresh': fake_jwt(time.time() + 3600, 'refresh')})
+
+    async def login_async():
+        async with AsyncNetworkingClient() as async_client:
+            await client._login_async(async_client)
+
+    if transport == 'sync':
+        client._login()
+    else:
+        asyncio.run(login_async())
+    assert len(stub_server.requests_to('/api/v2/auth/token/refresh/')) == 1
+    assert not [request for request in stub_server.requests if request[1] == '/api/v2/auth/token/']
+    assert client._token_store is token_store
+
+
+def test_client_with_token_store_can_be_pickled(fngs_config):
+    import pickle
+    client = FngsClient()
+    client._load_config(fngs_config)
+    unpickled_client = pickle.loads(pickle.dumps(client))
+    assert unpickled_client._token_store.path == client._token_store.path
+    unpickled_client._token_store.save(unpickled_client._token_store_key, {'access': 'a', 'refresh': 'r'})
+    assert client._token_store.load(client._token_store_key) == {'access': 'a', 'refresh': 'r'}
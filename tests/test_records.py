@@ -0,0 +1,136 @@
+from conftest import (
+    digest_record_plain,
+    paginated_handler,
+)
+
+from fntools.networking import NetworkingMixin
+from fntools.records import DigestRecordsCollection
+
+
+def logged_in_collection(config_path: str) -> DigestRecordsCollection:
+    collection = DigestRecordsCollection(config_path)
+    collection._load_config(config_path)
+    collection._login()
+    return collection
+
+
+def test_eager_loading_fetches_pages_concurrently(stub_server, fngs_config, monkeypatch):
+    records_plain = [digest_record_plain(drid) for drid in range(1, 13)]
+    stub_server.route('/api/v2/gatherer/digest-record/detailed/', paginated_handler(records_plain, page_size=5))
+    collection = logged_in_collection(fngs_config)
+    iterated = []
+    monkeypatch.setattr(NetworkingMixin, 'iterate_results_from_all_pages',
+                        lambda *args, **kwargs: iterated.append(args) or iter([]))
+    collection._basic_load_digest_records_from_server(collection._digest_records_url(1))
+    assert not iterated
+    assert [record.drid for record in collection.records] == list(range(1, 13))
+
+
+def test_lazy_loading_iterates_pages(stub_server, fngs_config):
+    records_plain = [digest_record_plain(drid) for drid in range(1, 13)]
+    stub_server.route('/api/v2/gatherer/digest-record/detailed/', paginated_handler(records_plain, page_size=5))
+    collection = logged_in_collection(fngs_config)
+    collection._basic_load_digest_records_from_server(collection._digest_records_url(1), lazy=True)
+    assert not stub_server.requests_to('/api/v2/gatherer/digest-record/')
+    assert [record.drid for record in collection.records] == list(range(1, 13))
+
+
+def test_content_category_guesser_rebuild_is_thread_safe(monkeypatch):
+    import threading
+    from fntools import records
+    keywords = [{'name': 'Firefox', 'is_generic': False, 'proprietary': False, 'content_category': 'INTERNET'}]
+    loads = []
+
+    class Cache:
+        def load(self, fetch_keywords):
+            loads.append(1)
+            return list(keywords)
+
+    monkeypatch.setattr(DigestRecordsCollection, '_keywords_cache', property(lambda self: Cache()))
+    monkeypatch.setattr(records.ContentCategoryGuesser, 'is_stale', property(lambda self: len(loads) < 50))
+    collection = DigestRecordsCollection('unused.yaml')
+    errors = []
+
+    def guess():
+        try:
+            for _ in range(200):
+                assert collection._content_category_matches('Firefox 100') == {'INTERNET': ['Firefox']}
+                assert collection._keywords() is not None
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=guess) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+def upload_queue_stub_routes(stub_server, statuses):
+    # statuses maps record id to PATCH response status code
+    def handler(request):
+        drid = int(request.path.rstrip('/').rsplit('/', 1)[1])
+        return statuses[drid], {}, {'id': drid}
+    stub_server.route('/api/v2/gatherer/digest-record/', handler)
+
+
+def test_upload_queue_rejected_updates_do_not_block_next_flushes(stub_server, fngs_config, monkeypatch):
+    import datetime
+    import json
+    from fntools.networking import RetryPolicy
+    from data.digestrecordstate import DigestRecordState
+    from fntools.records import (
+        DigestRecord,
+        DigestRecordsUploadQueue,
+    )
+
+    monkeypatch.setattr(NetworkingMixin, 'retry_policy', RetryPolicy(max_attempts=2, base_delay_seconds=0.01, max_delay_seconds=0.01))
+    # Deleted record, server failure and successful upload
+    upload_queue_stub_routes(stub_server, {1: 200, 2: 404, 3: 503})
+    collection = logged_in_collection(fngs_config)
+    queue = collection._upload_queue
+    for drid in (1, 2, 3):
+        record = DigestRecord(datetime.datetime.now(), None, f'Record {drid}', f'https://example.com/{drid}', None,
+                              state=DigestRecordState.IGNORED, digest_issue=1, drid=drid, language='ENGLISH')
+        queue.enqueue(record, ['state'])
+
+    assert queue.flush() == 1
+    with open(queue.rejected_path) as fin:
+        assert [json.loads(line)['drid'] for line in fin] == [2]
+    # Transient failure is kept in journal, permanent one is not retried
+    reloaded_queue = DigestRecordsUploadQueue(collection._patch_record_fields, queue.journal_path, workers_count=1)
+    assert reloaded_queue.pending_count == 1
+    upload_queue_stub_routes(stub_server, {3: 200})
+    assert reloaded_queue.flush() == 0
+    assert reloaded_queue.pending_count == 0
+    assert len(stub_server.requests_to('/api/v2/gatherer/digest-record/2/')) == 1
+
+
+def test_not_uploaded_records_are_reported_and_kept_out_of_cache(stub_server, fngs_config, monkeypatch):
+    import datetime
+    import logging
+    import os
+    from fntools import logger
+    from fntools.networking import RetryPolicy
+    from fntools.records import CACHE_DIRECTORY, DigestRecord
+    from data.digestrecordstate import DigestRecordState
+
+    monkeypatch.setattr(NetworkingMixin, 'retry_policy', RetryPolicy(max_attempts=1))
+    upload_queue_stub_routes(stub_server, {1: 503})
+    collection = logged_in_collection(fngs_config)
+    queue = collection._upload_queue
+    assert not os.path.abspath(queue.journal_path).startswith(os.path.abspath(CACHE_DIRECTORY))
+    queue.enqueue(DigestRecord(datetime.datetime.now(), None, 'Record 1', 'https://example.com/1', None,
+                               state=DigestRecordState.IGNORED, digest_issue=1, drid=1, language='ENGLISH'), ['state'])
+    assert queue.flush() == 1
+
+    messages = []
+    handler = logging.Handler()
+    handler.emit = lambda record: messages.append(record.getMessage())
+    logger.addHandler(handler)
+    try:
+        collection._report_pending_uploads()
+    finally:
+        logger.removeHandler(handler)
+    assert any('1 categorized record(s) are still not uploaded' in message and queue.journal_path in message for message in messages)
@@ -0,0 +1,22 @@
+import sys
+
+import pytest
+
+import remotedatatohtml
+
+
+def parsed_args(monkeypatch, digest_number: str):
+    monkeypatch.setattr(sys, 'argv', ['remotedatatohtml.py', 'fngs.yaml', 'HABR', digest_number, 'fn-{number}-{format}.html'])
+    return remotedatatohtml.parse_command_line_args()
+
+
+def test_digest_numbers_ranges_and_lists(monkeypatch):
+    assert parsed_args(monkeypatch, '120-122,125,121').DIGEST_NUMBER == [120, 121, 122, 125]
+
+
+@pytest.mark.parametrize('digest_number', ['125-120', '', ',', '120-', 'abc'])
+def test_invalid_digest_numbers_are_rejected(monkeypatch, capsys, digest_number):
+    with pytest.raises(SystemExit) as exit_info:
+        parsed_args(monkeypatch, digest_number)
+    assert exit_info.value.code == 2
+    assert 'digest number' in capsys.readouterr().err
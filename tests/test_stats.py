@@ -0,0 +1,212 @@
+import os
+import threading
+
+import pytest
+from conftest import paginated_handler
+
+from fntools import CACHE_DIRECTORY
+from fntools.networking import RetryPolicy
+from fntools.stats import (
+    HabrPostsStatisticsGetter,
+    PostsStatisticsStore,
+    ScrapingSchedule,
+    WebDriverPool,
+    habr_views_count_from_html,
+    vk_views_count_from_html,
+)
+
+
+class FakeDriver:
+
+    def __init__(self):
+        self.is_alive = True
+        self.quit_called = False
+
+    @property
+    def current_url(self):
+        if not self.is_alive:
+            raise Exception('Browser session is dead')
+        return 'about:blank'
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FlakyDriverFactory:
+    # Fails to start browser on given calls
+
+    def __init__(self, failing_calls=()):
+        self.failing_calls = set(failing_calls)
+        self.calls_count = 0
+        self.drivers = []
+
+    def __call__(self):
+        self.calls_count += 1
+        if self.calls_count in self.failing_calls:
+            raise Exception('Browser failed to start')
+        driver = FakeDriver()
+        self.drivers.append(driver)
+        return driver
+
+
+def test_pool_keeps_slot_when_recycled_driver_could_not_be_started():
+    factory = FlakyDriverFactory(failing_calls=[2])
+    with WebDriverPool(1, max_pages_per_driver=1, driver_factory=factory, checkout_timeout_seconds=1) as pool:
+        with pool.lease():
+            pass
+        with pytest.raises(Exception, match='failed to start'):
+            with pool.lease():
+                pass
+        with pool.lease() as driver:
+            assert driver is factory.drivers[-1]
+    assert pool.recycled_count == 2
+    assert all(driver.quit_called for driver in factory.drivers)
+
+
+def test_pool_keeps_slot_when_dead_driver_could_not_be_replaced():
+    factory = FlakyDriverFactory()
+    with WebDriverPool(2, driver_factory=factory, checkout_timeout_seconds=1) as pool:
+        factory.failing_calls = {3}
+        for driver in factory.drivers:
+            driver.is_alive = False
+        errors = []
+
+        def worker():
+            try:
+                with pool.lease():
+                    pass
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Only checkout which failed to start browser fails, others do not wait for lost slot
+        assert len(errors) == 1
+        assert pool.leases_count == 3
+        assert pool.replaced_dead_count == 2
+
+
+def test_pool_start_quits_started_drivers_when_one_fails():
+    factory = FlakyDriverFactory(failing_calls=[3])
+    with pytest.raises(Exception, match='failed to start'):
+        with WebDriverPool(3, driver_factory=factory):
+            pass
+    assert len(factory.drivers) == 2
+    assert all(driver.quit_called for driver in factory.drivers)
+
+
+def test_pool_checkout_waits_limited_time():
+    with WebDriverPool(1, driver_factory=FakeDriver, checkout_timeout_seconds=0.05) as pool:
+        with pool.lease():
+            with pytest.raises(Exception, match='given back'):
+                with pool.lease():
+                    pass
+
+
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def fixture_text(name: str):
+    # Saved pages are trimmed to markup and scripts which parsers use
+    with open(os.path.join(FIXTURES_DIRECTORY, name), encoding='utf-8') as fin:
+        return fin.read()
+
+
+def test_habr_views_count_is_taken_from_initial_state_of_article_by_url():
+    html_text = fixture_text('habr-article.html')
+    assert habr_views_count_from_html(html_text, 'https://habr.com/ru/post/648729/') == 4937
+    assert habr_views_count_from_html(html_text, 'https://habr.com/ru/articles/650001/?utm_source=rss') == 120
+
+
+def test_habr_views_count_falls_back_to_rounded_counter():
+    assert habr_views_count_from_html(fixture_text('habr-article-without-state.html'), 'https://habr.com/ru/post/648730/') == 12300
+    # Counter of the page is used when article of URL is not found in state
+    assert habr_views_count_from_html(fixture_text('habr-article.html'), 'https://habr.com/ru/post/1/') == 4900
+
+
+def test_vk_views_count_is_parsed():
+    assert vk_views_count_from_html(fixture_text('vk-article.html')) == 12345
+    assert vk_views_count_from_html(fixture_text('habr-article.html')) is None
+
+
+def habr_getter(fngs_config, stub_server, store, digest_issues):
+    stub_server.route('/api/v2/gatherer/digest-issue/', paginated_handler(digest_issues, page_size=100))
+    return HabrPostsStatisticsGetter(fngs_config, sessions_count=2, store=store)
+
+
+def test_habr_fast_path_gives_up_quickly_and_only_final_views_count_is_saved(stub_server, fngs_config, tmp_path, monkeypatch):
+    stub_server.route('/habr/parsed/', lambda request: (200, {'Content-Type': 'text/html'}, fixture_text('habr-article-without-state.html')))
+    stub_server.route('/habr/unavailable/', lambda request: (503, {'Retry-After': '120'}, b''))
+    digest_issues = [{'number': 1, 'habr_url': f'{stub_server.url}/habr/parsed/'},
+                     {'number': 2, 'habr_url': f'{stub_server.url}/habr/unavailable/'}]
+    monkeypatch.setattr(HabrPostsStatisticsGetter, 'FAST_PATH_RETRY_POLICY', RetryPolicy(max_attempts=2, base_delay_seconds=0.01, max_delay_seconds=0.01, max_retry_after_seconds=0.01))
+    monkeypatch.setattr(WebDriverPool, '_create_firefox_driver', staticmethod(FakeDriver))
+    monkeypatch.setattr(HabrPostsStatisticsGetter, '_browser_post_statistics', lambda self, number, url: 777)
+    saved = []
+    monkeypatch.setattr(HabrPostsStatisticsGetter, '_checkpoint_post_statistics', lambda self, number, url, views_count: saved.append((number, views_count)))
+    with PostsStatisticsStore(str(tmp_path / 'stats.sqlite3')) as store:
+        getter = habr_getter(fngs_config, stub_server, store, digest_issues)
+        assert getter.gather_posts_statistics() == {1: 12300, 2: 777}
+    assert sorted(saved) == [(1, 12300), (2, 777)]
+    assert len(stub_server.requests_to('/habr/unavailable/')) == 2
+
+
+def test_habr_getter_is_passed_to_shard_process_without_browser_sessions(stub_server, fngs_config):
+    import pickle
+    getter = habr_getter(fngs_config, stub_server, None, [])
+    getter._drivers_pool = WebDriverPool(1, driver_factory=FakeDriver)
+    shard_getter = pickle.loads(pickle.dumps(getter))
+    assert shard_getter._drivers_pool is None
+    assert shard_getter.source_name == 'Habr'
+    assert getter._drivers_pool is not None
+
+
+def test_habr_fast_path_retry_policy_has_small_budget():
+    retry_policy = HabrPostsStatisticsGetter.FAST_PATH_RETRY_POLICY
+    assert retry_policy.max_attempts_for('https://habr.com/ru/post/648729/') <= 2
+    assert retry_policy.delay_seconds(10, {'Retry-After': '300'}) <= 2
+
+
+def test_schedule_ages_do_not_count_unpublished_issues(stub_server, fngs_config, tmp_path, monkeypatch):
+    import time
+
+    # Published issues 1-10 and three issues which are prepared but not published yet
+    digest_issues = [{'number': number, 'habr_url': f'https://habr.com/ru/post/{number}/' if number <= 10 else ''}
+                     for number in range(1, 14)]
+    scraped = []
+    monkeypatch.setattr(HabrPostsStatisticsGetter, '_scrape_posts_statistics', lambda self, posts_urls: scraped.append(dict(posts_urls)))
+    with PostsStatisticsStore(str(tmp_path / 'stats.sqlite3')) as store:
+        for number in range(1, 11):
+            store.add_observation('Habr', number, 100, observed_time=time.time() - 12 * 60 * 60)
+        getter = habr_getter(fngs_config, stub_server, store, digest_issues)
+        getter.schedule = ScrapingSchedule()
+        getter.gather_posts_statistics()
+    # Four newest published issues are scraped every 6 hours, unpublished ones are reported anyway
+    assert sorted(scraped[0]) == [7, 8, 9, 10, 11, 12, 13]
+
+
+def test_store_is_not_kept_in_cache_directory():
+    assert not os.path.abspath(PostsStatisticsStore.DEFAULT_PATH).startswith(os.path.abspath(CACHE_DIRECTORY))
+
+
+def test_getstats_writes_csv_when_no_habr_posts_are_gathered(tmp_path, monkeypatch):
+    import sys
+    import getstats
+
+    class FakeGetter:
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def gather_posts_statistics(self):
+            return {}
+
+    monkeypatch.setattr(getstats, 'VkPostsStatisticsGetter', FakeGetter)
+    monkeypatch.setattr(getstats, 'HabrPostsStatisticsGetter', FakeGetter)
+    monkeypatch.setattr(sys, 'argv', ['getstats.py', '1', 'fngs.yaml'])
+    monkeypatch.chdir(tmp_path)
+    getstats.main()
+    assert (tmp_path / 'stats.csv').read_text() == 'None\t'
@@ -0,0 +1,50 @@
+import pytest
+
+from benchmarks.bench_tbot_estimations import (
+    aggregated_candidates,
+    records_batch,
+    sequential_candidates,
+)
+
+from data.digestrecordstate import DigestRecordState
+from fntools.records import (
+    TBOT_ADMIN_USERNAME,
+    DigestRecord,
+    aggregate_tbot_estimations,
+)
+
+
+def test_aggregation_matches_repeated_scans():
+    records = records_batch(2000)
+    assert aggregated_candidates(records) == sequential_candidates(records)
+
+
+def test_record_with_several_estimations_is_candidate_once():
+    estimations = [{'user': user, 'state': DigestRecordState.IN_DIGEST, 'is_main': True, 'content_type': None, 'content_category': None}
+                   for user in (TBOT_ADMIN_USERNAME, 'operator1', 'operator2')]
+    records = [DigestRecord(None, None, f'Record {drid}', 'https://example.com/same', None, drid=drid, language='ENGLISH',
+                            estimations=estimations)
+               for drid in (1, 2)]
+    aggregation = aggregate_tbot_estimations(records)
+    assert aggregation.approve_candidates == records
+    # Records with the same URL get one "is_main" question
+    assert aggregation.is_main_candidates == records[:1]
+    assert aggregation.records_by_url['https://example.com/same'] is records[0]
+    assert aggregation.tallies[1]['state'][DigestRecordState.IN_DIGEST] == 3
+
+
+@pytest.mark.parametrize('config_line, expected_admin_username', [
+    ('', TBOT_ADMIN_USERNAME),
+    ('tbot_admin_username:\n', TBOT_ADMIN_USERNAME),
+    ('tbot_admin_username: operator2\n', 'operator2'),
+])
+def test_tbot_admin_username_is_taken_from_config(fngs_config, config_line, expected_admin_username):
+    from fntools.records import DigestRecordsCollection
+
+    with open(fngs_config, 'a') as fout:
+        fout.write(config_line)
+    estimations = [{'user': user, 'state': DigestRecordState.IN_DIGEST, 'is_main': None, 'content_type': None, 'content_category': None}
+                   for user in (TBOT_ADMIN_USERNAME, 'operator1', 'operator2')]
+    collection = DigestRecordsCollection(fngs_config, bot_only=False)
+    collection._load_config(fngs_config)
+    assert collection._admins_estimation(estimations)['user'] == expected_admin_username